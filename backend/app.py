@@ -1,61 +1,126 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import PyPDF2
 import re
 import os
-import requests
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta
-import bcrypt
 import jwt
 from functools import wraps
 from bson import ObjectId
+import base64
 import json
+import shutil
+import tempfile
+import threading
 
 # Load environment variables
 load_dotenv()
 
+# Local modules read their settings from the environment at import time
+from auth_cache import PrincipalCache, make_shared_store
+from candidate_search import CandidateIndex
+from chat_context import ChatContext
+from db import (
+    chat_col, chat_summaries_col, client, ensure_indexes, eval_cache_col, exec_cache_col, interview_events_col, jobs_col,
+    parsed_resumes_col, progress_col, question_bank_col, resume_heads_col, resumes_col, skills_col, tests_col, users_col
+)
+from evaluation import InterviewEvaluator, render_feedback
+from executor import CachedExecutor, make_executor, run_test_cases
+from http_client import upstream_stats
+from ingest import ingest, iter_uploads
+from interview_sessions import InterviewSessions, SessionFull
+from jobs import JobQueue, QueueFull, begin_writes
+from llm import GeminiClient
+from logs import get_logger
+from metrics import authorized, cache_collector, instrument, registry
+from passwords import HasherBusy, PasswordHasher
+from question_bank import QUESTION_BANK_REFILL, QuestionBank
+from resume_parser import RESUME_MAX_BYTES, ParsedResumeCache, ResumeTooLarge
+from resume_store import ResumeStore, decode_resume, encode_resume
+from skill_matcher import skill_registry
+from stats import format_summary, record_test
+from test_parser import (
+    coding_test_cases, grade_mcqs, parse_coding_problems, parse_mcqs, public_mcqs, render_coding_problems, render_mcqs
+)
+
 app = Flask(__name__)
 CORS(app)
+instrument(app)
+log = get_logger("app")
 
-# -------------------- MongoDB Setup --------------------
-MONGO_URI = os.getenv("MONGO_URI")  # e.g., mongodb://localhost:27017/AI_Interviewer
-client = MongoClient(MONGO_URI)
-db = client.get_database()  # Uses AI_Interviewer
-users_col = db["users"]
-tests_col = db["tests"]
-resumes_col = db["resumes"]
-progress_col = db["progress"]
-chat_col = db["chat_history"]
+# Bulk ingestion spawns pool processes that re-import this module as __mp_main__;
+# they only parse PDFs and must not create indexes (nor serve requests, which start the workers).
+IS_POOL_CHILD = __name__ == "__mp_main__"
 
+# -------------------- MongoDB Setup --------------------
 try:
     client.admin.command('ping')
-    print("✅ MongoDB is connected successfully!")
+    log.info("MongoDB is connected")
 except Exception as e:
-    print("❌ Failed to connect to MongoDB:", e)
+    log.error("failed to connect to MongoDB", error=str(e))
+
+if not IS_POOL_CHILD:
+    for collection, error in ensure_indexes().items():
+        log.error("failed to create indexes", collection=collection, error=error)
 
 # -------------------- JWT Setup --------------------
 JWT_SECRET = os.getenv("JWT_SECRET", "your_jwt_secret_key")
 JWT_ALGORITHM = "HS256"
 JWT_EXP_DELTA_SECONDS = 3600  # 1 hour
 
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
-        if "Authorization" in request.headers:
+principal_cache = PrincipalCache(users_col, shared=make_shared_store())
+passwords = PasswordHasher()
+
+def password_collector():
+    stats = passwords.stats()
+    return [
+        ("password_hashes_total", "counter", "bcrypt operations, by outcome.",
+         [({"outcome": key}, stats[key]) for key in ("hashed", "checked", "rehashed", "rejected")]),
+        ("password_hashes_pending", "gauge", "bcrypt operations queued or running.", [({}, stats["pending"])]),
+    ]
+
+registry.collect(password_collector)
+
+def hasher_busy():
+    return jsonify({"error": "Too many sign-ins in progress, try again shortly"}), 503
+
+def _authenticated(load_principal):
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            token = None
+            if "Authorization" in request.headers:
+                try:
+                    token = request.headers["Authorization"].split(" ")[1]
+                except:
+                    pass
+            if not token:
+                return jsonify({"error": "Token is missing"}), 401
             try:
-                token = request.headers["Authorization"].split(" ")[1]
-            except:
-                pass
-        if not token:
-            return jsonify({"error": "Token is missing"}), 401
-        try:
-            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-            current_user = users_col.find_one({"_id": ObjectId(payload["user_id"])})
-        except Exception as e:
-            return jsonify({"error": "Token is invalid"}), 401
+                payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+                current_user = load_principal(payload)
+            except Exception as e:
+                return jsonify({"error": "Token is invalid"}), 401
+            if current_user is None:
+                return jsonify({"error": "Token is invalid"}), 401
+            return f(current_user, *args, **kwargs)
+        return decorated
+    return decorator
+
+# Full user document (minus the password hash), served from the principal cache
+token_required = _authenticated(lambda payload: principal_cache.get(payload["user_id"]))
+
+# Fast path for routes that only need the user id: trusts the signed claims, no lookup
+claims_required = _authenticated(lambda payload: {"_id": ObjectId(payload["user_id"])})
+
+# Recruiter-only routes; the is_recruiter flag is set on the user document out of band
+def recruiter_required(f):
+    @token_required
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if not current_user.get("is_recruiter"):
+            return jsonify({"error": "Recruiter access required"}), 403
         return f(current_user, *args, **kwargs)
     return decorated
 
@@ -73,13 +138,20 @@ def signup():
     if users_col.find_one({"email": email}):
         return jsonify({"error": "Email already registered"}), 400
 
-    hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    users_col.insert_one({
-        "username": username,
-        "email": email,
-        "password": hashed_pw,
-        "created_at": datetime.now()
-    })
+    try:
+        hashed_pw = passwords.hash(password)
+    except HasherBusy:
+        return hasher_busy()
+    try:
+        users_col.insert_one({
+            "username": username,
+            "email": email,
+            "password": hashed_pw,
+            "created_at": datetime.now()
+        })
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup; the unique email index caught it
+        return jsonify({"error": "Email already registered"}), 400
     return jsonify({"message": "User registered successfully"}), 201
 
 @app.route("/login", methods=["POST"])
@@ -95,9 +167,18 @@ def login():
     if not user:
         return jsonify({"error": "Invalid email or password"}), 401
 
-    if not bcrypt.checkpw(password.encode('utf-8'), user["password"]):
+    try:
+        matches, new_hash = passwords.verify(password, user["password"])
+    except HasherBusy:
+        return hasher_busy()
+    if not matches:
         return jsonify({"error": "Invalid email or password"}), 401
 
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made; a concurrent login may already have replaced it
+        users_col.update_one({"_id": user["_id"], "password": user["password"]}, {"$set": {"password": new_hash}})
+        principal_cache.invalidate(user["_id"])
+
     payload = {
         "user_id": str(user["_id"]),
         "exp": datetime.utcnow() + timedelta(seconds=JWT_EXP_DELTA_SECONDS)
@@ -106,154 +187,277 @@ def login():
     return jsonify({"token": token, "username": user["username"], "email": user["email"]})
 
 # -------------------- Gemini & Piston Setup --------------------
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-PISTON_URL = "https://emkc.org/api/v2/piston/execute"
-
-# ---------- Skill Dictionary ----------
-TECH_SKILLS = {
-    "python", "javascript", "java", "c", "c++", "c#", "html", "css",
-    "react.js", "node.js", "express", "express.js",
-    "sql", "mysql", "postgresql", "mongodb", "aws", "docker",
-    "kubernetes", "flask", "django", "typescript", "next.js",
-    "git", "github", "api", "machine learning", "data science",
-    "analytics", "tensorflow", "pytorch", "nlp", "data analytics"
-}
+gemini = GeminiClient()
+EXEC_CACHE_SHARED = os.getenv("EXEC_CACHE_SHARED", "0") == "1"  # share run results across workers via Mongo
+EVAL_CACHE_SHARED = os.getenv("EVAL_CACHE_SHARED", "1") == "1"  # share answer evaluations across workers via Mongo
+
+# Piston by default, CODE_EXECUTOR=local for a local stand-in
+code_executor = CachedExecutor(make_executor(), collection=exec_cache_col if EXEC_CACHE_SHARED else None)
+
+def call_gemini(prompt, cache=True):
+    return gemini.generate(prompt, cache=cache)
+
+def sse_response(chunks, on_complete):
+    """
+    Relay streamed Gemini text as Server-Sent Events. Each chunk is sent as a
+    `data` event; once the stream ends `on_complete(full_text)` persists the
+    result and its return value is sent as the final `done` event.
+    """
+    def events():
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield f"data: {json.dumps({'text': chunk})}\n\n"
+            result = on_complete("".join(parts))
+            yield f"event: done\ndata: {json.dumps(result or {})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
 
-# --------- Helpers ----------
-def normalize_skill(word: str) -> str:
-    return word.strip().lower()
-
-def extract_skills(text):
-    text_lower = text.lower()
-    found_skills = set()
-    for word in re.findall(r'\b[\w+#.]+\b', text_lower):
-        norm = normalize_skill(word)
-        for skill in TECH_SKILLS:
-            if norm == skill.lower():
-                found_skills.add(skill)
-    multi_word_skills = ["machine learning", "data science", "data analytics", "node.js", "react.js", "c++"]
-    for skill in multi_word_skills:
-        if skill.lower() in text_lower:
-            found_skills.add(skill)
-    return sorted(found_skills)
-
-def pdf_to_text(file):
-    pdf_reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in pdf_reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text += page_text + "\n"
-    return text
-
-def extract_resume_data(text):
-    skills = extract_skills(text)
-    education = []
-    edu_matches = re.findall(r'(\d{4})\s+([A-Za-z0-9 &.-]+(?:University|School|College))', text)
-    for year, institute in edu_matches:
-        education.append(f"{year} {institute.strip()}")
-    experience = []
-    exp_matches = re.findall(r'([A-Za-z0-9 &.-]+)\s*\|?\s*(\d{1,2}\s+\w+,\s+\d{4}\s*-\s*\d{1,2}\s+\w+,\s*\d{4})', text)
-    for company, duration in exp_matches:
-        experience.append(f"{company.strip()} ({duration.strip()})")
-    projects = []
-    proj_matches = re.findall(r'(?:PROJECTS|Project Name|Key Projects)[:|-]?\s*(.*?)\s*(?:Key Skills|$)',
-                              text, flags=re.IGNORECASE | re.DOTALL)
-    for match in proj_matches:
-        for p in re.split(r'\n|\|', match):
-            p_clean = p.strip()
-            if p_clean:
-                projects.append(p_clean)
-    return {
-        "skills": skills,
-        "education": education,
-        "experience": experience,
-        "projects": projects,
-        "raw_text": text
-    }
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# -------------------- Background Jobs --------------------
+# Generation routes run inline by default; sending {"mode": "job"} enqueues the
+# work instead and returns a job id to poll on /jobs/<job_id>.
+jobs = JobQueue(collection=jobs_col)
 
-def call_gemini(prompt):
-    headers = {"Content-Type": "application/json", "X-goog-api-key": GEMINI_API_KEY}
-    body = {"contents": [{"parts": [{"text": prompt}]}]}
-    res = requests.post(GEMINI_URL, headers=headers, json=body)
-    res.raise_for_status()
-    data = res.json()
-    return data["candidates"][0]["content"]["parts"][0]["text"]
+def wants_job(data):
+    return (data or {}).get("mode") == "job"
+
+def submit_job(kind, current_user, work, data):
+    try:
+        job_id = jobs.submit(kind, current_user["_id"], work, current_user["_id"], data)
+    except QueueFull:
+        return jsonify({"error": "Too many pending jobs, try again shortly"}), 503
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+@app.route("/jobs/stats", methods=["GET"])
+@recruiter_required
+def job_stats(current_user):
+    return jsonify(jobs.stats())
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+@claims_required
+def get_job(current_user, job_id):
+    job = jobs.get(job_id)
+    if not job or job["owner_id"] != current_user["_id"]:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"].isoformat(),
+        "finished_at": job["finished_at"].isoformat() if job["finished_at"] else None
+    })
 
 # -------------------- Resume & Interview Routes --------------------
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))
+
+parsed_resumes = ParsedResumeCache(parsed_resumes_col)
+
+def unindex_resumes(user_id, version_ids):
+    # Deleted versions must not be served by search; if one was indexed, the current version takes its place
+    removed = [candidate_index.remove(str(user_id), str(version_id)) for version_id in version_ids]
+    if any(removed):
+        current = resume_store.current(user_id)
+        if current is not None:
+            candidate_index.add(current)
+
+resume_store = ResumeStore(resumes_col, resume_heads_col, on_delete=unindex_resumes)
+
+# Saves are indexed as they happen; the background thread picks up other workers' saves
+candidate_index = CandidateIndex(resumes_col)
+
+def insert_resumes(docs):
+    resumes_col.insert_many(docs)
+    for doc in docs:
+        candidate_index.add(doc)
+
+# The skill dictionary comes from SKILLS_FILE by default; SKILLS_SOURCE=mongo reads the skills collection
+if os.getenv("SKILLS_SOURCE") == "mongo":
+    skill_registry.use_collection(skills_col)
+
 @app.route("/parse-resume", methods=["POST"])
-@token_required
+@claims_required
 def parse_resume(current_user):
     file = request.files.get("resume")
     if not file:
         return jsonify({"error": "No resume file provided"}), 400
-    text = pdf_to_text(file)
-    parsed = extract_resume_data(text)
-    return jsonify(parsed)
+    data = file.read(RESUME_MAX_BYTES + 1)
+    if len(data) > RESUME_MAX_BYTES:
+        return jsonify({"error": f"Resume is larger than {RESUME_MAX_BYTES} bytes"}), 413
+    try:
+        resume_hash, parsed = parsed_resumes.parse(data)
+    except ResumeTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    return jsonify({**parsed, "resume_hash": resume_hash})
+
+@app.route("/bulk-parse-resumes", methods=["POST"])
+@recruiter_required
+def bulk_parse_resumes(current_user):
+    # Accepts any number of PDFs and/or zip archives under the "resumes" field
+    files = request.files.getlist("resumes")
+    if not files:
+        return jsonify({"error": "No resume files provided"}), 400
+    uploader = current_user["_id"]
+
+    # Werkzeug closes request files when the view returns, so keep our own copies for the stream
+    uploads = []
+    for f in files:
+        copy = tempfile.TemporaryFile()
+        shutil.copyfileobj(f.stream, copy)
+        copy.seek(0)
+        uploads.append((f.filename, copy))
+
+    def results():
+        try:
+            yield from ingest_uploads()
+        finally:
+            for _, copy in uploads:
+                copy.close()
+
+    def ingest_uploads():
+        batch = []
+        for result in ingest(iter_uploads(uploads)):
+            if result["ok"]:
+                batch.append({
+                    "uploaded_by": uploader,
+                    "filename": result["filename"],
+                    "source": "bulk",
+                    **encode_resume(result["parsed"]),
+                    "created_at": datetime.now()
+                })
+                if len(batch) >= INGEST_BATCH_SIZE:
+                    insert_resumes(batch)
+                    batch = []
+                # raw_text is stored but not echoed back, to keep the stream small
+                result["parsed"] = {k: v for k, v in result["parsed"].items() if k != "raw_text"}
+            yield json.dumps(result) + "\n"
+        if batch:
+            insert_resumes(batch)
+
+    return Response(stream_with_context(results()), mimetype="application/x-ndjson")
 
 @app.route("/save-resume", methods=["POST"])
-@token_required
+@claims_required
 def save_resume(current_user):
     data = request.json
     resume_text = data.get("resume")
+    resume_hash = data.get("resume_hash")
+
+    # Prefer the server's own parse of an uploaded PDF over client-supplied JSON
+    if resume_hash:
+        resume_text = parsed_resumes.get(resume_hash)
+        if resume_text is None:
+            return jsonify({"error": "Unknown resume_hash, upload the resume again"}), 404
 
     if not resume_text:
         return jsonify({"error": "Resume text is required"}), 400
 
-    # Insert resume into 'resumes' collection
-    resume_doc = {
-        "user_id": current_user["_id"],  # Store user ID for reference
-        "resume": resume_text
-    }
-
-    resumes_col.insert_one(resume_doc)
+    # New content becomes the user's current version; saving the current resume again writes nothing
+    resume_doc, created = resume_store.save(current_user["_id"], resume_text, resume_hash)
+    if created:
+        candidate_index.add(resume_doc)
 
-    return jsonify({"message": "Resume saved successfully"})
+    return jsonify({"message": "Resume saved successfully", "resume_id": str(resume_doc["_id"]), "created": created})
 
 @app.route("/get-resume", methods=["GET"])
-@token_required
+@claims_required
 def get_resume(current_user):
     try:
         user_id = current_user["_id"]
-        print("Current user:", current_user)
-        print("Looking for resumes with user_id:", user_id)
-
-        resume_doc = resumes_col.find_one(
-            {"user_id": user_id},
-            sort=[("_id", -1)]
-        )
+        resume_doc = resume_store.current(user_id)
 
+        log.debug("resume lookup", user_id=str(user_id), found=resume_doc is not None)
         if not resume_doc:
             return jsonify({"resume": ""}), 200
 
-        resume_json = resume_doc["resume"]
-        print("Found resume:", resume_json)
+        return jsonify({"resume": decode_resume(resume_doc)}), 200
+
+    except Exception as e:
+        log.error("get-resume failed", exc_info=True, error=str(e))
+        return jsonify({"error": "Server error", "details": str(e)}), 500
+
 
-        # Safely decode if it's a JSON string
-        if isinstance(resume_json, str):
-            resume_data = json.loads(resume_json)
-        else:
-            resume_data = resume_json
+@app.route("/resume-history", methods=["GET"])
+@claims_required
+def resume_history(current_user):
+    return jsonify({"versions": [
+        {"resume_id": str(v["_id"]), "created_at": v.get("created_at"), "hash": v["hash"]}
+        for v in resume_store.history(current_user["_id"])
+    ]})
 
-        return jsonify({"resume": resume_data}), 200
 
+# -------------------- Candidate Search --------------------
+CANDIDATE_SEARCH_MAX_K = 100
+
+@app.route("/search-candidates", methods=["POST"])
+@recruiter_required
+def search_candidates(current_user):
+    data = request.json or {}
+    query = " ".join(part for part in (data.get("role"), data.get("description")) if part)
+    if not query.strip():
+        return jsonify({"error": "Role or description is required"}), 400
+    try:
+        k = max(1, min(int(data.get("k", 20)), CANDIDATE_SEARCH_MAX_K))
+    except (TypeError, ValueError):
+        return jsonify({"error": "k must be an integer"}), 400
+
+    hits = candidate_index.search(query, k)
+    resumes = {
+        str(doc["_id"]): doc for doc in resumes_col.find(
+            {"_id": {"$in": [ObjectId(resume_id) for resume_id, _, _ in hits]}},
+            {"user_id": 1, "filename": 1, "resume.skills": 1, "resume.education": 1, "resume.experience": 1}
+        )
+    }
+    user_ids = [doc["user_id"] for doc in resumes.values() if doc.get("user_id")]
+    users = {u["_id"]: u for u in users_col.find({"_id": {"$in": user_ids}}, {"username": 1, "email": 1})}
+
+    candidates = []
+    for resume_id, _, score in hits:
+        doc = resumes.get(resume_id)
+        if doc is None:
+            continue  # deleted since it was indexed
+        resume = doc.get("resume") if isinstance(doc.get("resume"), dict) else {}
+        user = users.get(doc.get("user_id"), {})
+        candidates.append({
+            "resume_id": resume_id,
+            "user_id": str(doc["user_id"]) if doc.get("user_id") else None,
+            "username": user.get("username"),
+            "email": user.get("email"),
+            "filename": doc.get("filename"),
+            "score": round(score, 4),
+            "skills": resume.get("skills", []),
+            "education": resume.get("education", []),
+            "experience": resume.get("experience", []),
+        })
+    return jsonify({"candidates": candidates, "index": candidate_index.stats()})
+
+
+# -------------------- Progress Summaries --------------------
+def record_progress(user_id, test_type, **fields):
+    # Summaries can be rebuilt with `python stats.py --backfill`, so a failed update never fails the request
+    try:
+        record_test(progress_col, user_id, test_type, **fields)
     except Exception as e:
-        print("Error in /get-resume:", str(e))
-        return jsonify({"error": "Server error", "details": str(e)}), 500
+        log.error("progress summary update failed", user_id=str(user_id), test_type=test_type, error=str(e))
 
 
-@app.route("/generate-questions", methods=["POST"])
-@token_required
-def generate_questions(current_user):
-    data = request.json
+def interview_prompt(data):
     parsed = data.get("parsed", {})
     role = data.get("role", "")
     skills = ", ".join(parsed.get("skills", [])) or "general programming"
     experience = "\n".join(parsed.get("experience", [])[:5]) or "general experience"
     education = "\n".join(parsed.get("education", [])[:3]) or "general education"
 
-    prompt = f"""
+    return f"""
 You are an expert interviewer.
 The candidate is applying for: {role}.
 
@@ -268,41 +472,45 @@ Generate 15–20 interview questions (excluding 'Tell me about yourself').
 - Minimum 5 behavioral questions.
 Do not include any intro text.
 """
-    try:
-        output_text = call_gemini(prompt)
-        questions = [re.sub(r"^\d+[\).:-]?\s*", "", line.strip())
-                     for line in output_text.split("\n") if line.strip()]
-        while len(questions) < 15:
-            questions.append("Tell me about a project where you applied your skills. What challenges did you face?")
-        if len(questions) > 20:
-            questions = questions[:20]
-        questions = ["Tell me about yourself."] + questions
-
-        # Save generated questions to user tests
-        tests_col.insert_one({
-            "user_id": current_user["_id"],
-            "role": role,
-            "test_type": "interview",
-            "questions": questions,
-            "timestamp": datetime.now()
-        })
 
-        return jsonify({"questions": questions})
+def parse_interview_questions(output_text):
+    questions = [re.sub(r"^\d+[\).:-]?\s*", "", line.strip())
+                 for line in output_text.split("\n") if line.strip()]
+    while len(questions) < 15:
+        questions.append("Tell me about a project where you applied your skills. What challenges did you face?")
+    if len(questions) > 20:
+        questions = questions[:20]
+    return ["Tell me about yourself."] + questions
+
+# Follow-ups, answers and feedback are tied to the session id returned by /generate-questions
+interview_sessions = InterviewSessions(tests_col, interview_events_col)
+
+def unknown_session(user_id, data):
+    return bool(data.get("session_id")) and interview_sessions.find(user_id, session_id=data["session_id"]) is None
+
+def build_interview_questions(user_id, data):
+    questions = parse_interview_questions(call_gemini(interview_prompt(data), cache=False))
+    begin_writes()
+
+    # Save generated questions to user tests; the test document is the interview session
+    session = interview_sessions.create(user_id, data.get("role", ""), questions)
+    record_progress(user_id, "interview", timestamp=session["timestamp"])
+    return {"questions": questions, "session_id": str(session["_id"])}
+
+@app.route("/generate-questions", methods=["POST"])
+@claims_required
+def generate_questions(current_user):
+    data = request.json
+    if wants_job(data):
+        return submit_job("generate-questions", current_user, build_interview_questions, data)
+    try:
+        return jsonify(build_interview_questions(current_user["_id"], data))
     except Exception as e:
         return jsonify({"questions": [], "error": str(e)})
 
 # -------------------- Follow-up Route --------------------
-@app.route("/follow-up", methods=["POST"])
-@token_required
-def follow_up(current_user):
-    data = request.json or {}
-    answer = data.get("answer", "").strip()
-    role = data.get("role", "").strip()
-
-    if not answer or not role:
-        return jsonify({"error": "Both 'answer' and 'role' are required"}), 400
-
-    prompt = f"""
+def follow_up_prompt(role, answer):
+    return f"""
 You are an interviewer for the role: {role}.
 The candidate just said: "{answer}"
 
@@ -310,57 +518,76 @@ Task:
 Generate 2–3 concise, role-relevant follow-up interview questions.
 """
 
-    try:
-        output_text = call_gemini(prompt)
-        questions = [re.sub(r"^\d+[\).:-]?\s*", "", line.strip())
-                     for line in output_text.split("\n") if line.strip()]
+def save_follow_ups(user_id, role, answer, output_text, session_id=None):
+    questions = [re.sub(r"^\d+[\).:-]?\s*", "", line.strip())
+                 for line in output_text.split("\n") if line.strip()]
 
-        # Ensure at least 2 questions
-        while len(questions) < 2:
-            questions.append("Can you elaborate more on that?")
+    # Ensure at least 2 questions
+    while len(questions) < 2:
+        questions.append("Can you elaborate more on that?")
 
-        # Limit to 3 questions max
-        questions = questions[:3]
+    # Limit to 3 questions max
+    questions = questions[:3]
 
-        # Find latest interview test document for this user and role
-        interview_doc = tests_col.find_one(
-            {"user_id": current_user["_id"], "role": role, "test_type": "interview"},
-            sort=[("timestamp", -1)]
-        )
+    session = interview_sessions.find(user_id, role, session_id)
+    if not session:
+        # No interview session found, start one with these questions
+        session = interview_sessions.create(user_id, role, questions)
+        record_progress(user_id, "interview", timestamp=session["timestamp"])
+    else:
+        try:
+            interview_sessions.append(session["_id"], "follow_up", answer=answer, questions=questions)
+        except SessionFull as e:
+            log.warning("follow-up questions not stored", error=str(e))
+    return {"questions": questions, "session_id": str(session["_id"])}
+
+def build_follow_ups(user_id, data):
+    output_text = call_gemini(follow_up_prompt(data["role"], data["answer"]), cache=False)
+    begin_writes()
+    return save_follow_ups(user_id, data["role"], data["answer"], output_text, data.get("session_id"))
+
+@app.route("/follow-up", methods=["POST"])
+@claims_required
+def follow_up(current_user):
+    data = request.json or {}
+    answer = data.get("answer", "").strip()
+    role = data.get("role", "").strip()
+
+    if not answer or not role:
+        return jsonify({"error": "Both 'answer' and 'role' are required"}), 400
+    if unknown_session(current_user["_id"], data):
+        return jsonify({"error": "Interview session not found"}), 404
 
-        if not interview_doc:
-            # No interview document found, insert new one with questions
-            tests_col.insert_one({
-                "user_id": current_user["_id"],
-                "role": role,
-                "test_type": "interview",
-                "questions": questions,
-                "timestamp": datetime.now()
-            })
-        else:
-            # Append follow-up questions to existing questions
-            updated_questions = interview_doc.get("questions", []) + questions
-            tests_col.update_one(
-                {"_id": interview_doc["_id"]},
-                {"$set": {"questions": updated_questions, "timestamp": datetime.now()}}
-            )
-
-        return jsonify({"questions": questions})
+    work = {"answer": answer, "role": role, "session_id": data.get("session_id")}
+    if wants_job(data):
+        return submit_job("follow-up", current_user, build_follow_ups, work)
+    try:
+        return jsonify(build_follow_ups(current_user["_id"], work))
 
     except Exception as e:
         return jsonify({"questions": [], "error": f"Failed to generate follow-up questions: {str(e)}"}), 500
 
+@app.route("/follow-up/stream", methods=["POST"])
+@claims_required
+def follow_up_stream(current_user):
+    data = request.json or {}
+    answer = data.get("answer", "").strip()
+    role = data.get("role", "").strip()
 
-# -------------------- Aptitude --------------------
-@app.route("/generate-aptitude", methods=["POST"])
-@token_required
-def generate_aptitude(current_user):
-    data = request.json
-    level = data.get("level", "easy")
-    topic = data.get("topic", "Random")  # new topic field
+    if not answer or not role:
+        return jsonify({"error": "Both 'answer' and 'role' are required"}), 400
+    if unknown_session(current_user["_id"], data):
+        return jsonify({"error": "Interview session not found"}), 404
 
-    # Construct a more explicit prompt
-    prompt = f"""
+    return sse_response(
+        gemini.stream(follow_up_prompt(role, answer)),
+        lambda text: save_follow_ups(current_user["_id"], role, answer, text, data.get("session_id"))
+    )
+
+
+# -------------------- Aptitude --------------------
+def aptitude_prompt(level, topic):
+    return f"""
 You are an expert aptitude test generator.
 Generate exactly 25 multiple-choice questions (MCQs) of {level} difficulty.
 
@@ -378,98 +605,120 @@ Do NOT include any explanation or introduction text.
 Separate each question clearly with a line "---".
 """
 
-    try:
-        output_text = call_gemini(prompt)
-
-        # Store in database under user's progress
-        tests_col.insert_one({
-            "user_id": current_user["_id"],
-            "test_type": "aptitude",
-            "level": level,
-            "topic": topic,
-            "questions": output_text,
-            "timestamp": datetime.now()
-        })
+def build_aptitude_test(user_id, data):
+    level = data.get("level", "easy")
+    topic = data.get("topic", "Random")  # new topic field
+    items = question_bank.take("aptitude", level, topic)
+    # The answer key stays on the server; /generate-feedback grades against the stored items
+    output_text = render_mcqs(items, with_answers=False)
+    begin_writes()
+
+    # Store in database under user's progress
+    now = datetime.now()
+    test_id = tests_col.insert_one({
+        "user_id": user_id,
+        "test_type": "aptitude",
+        "level": level,
+        "topic": topic,
+        "questions": output_text,
+        "items": items,
+        "timestamp": now
+    }).inserted_id
+    record_progress(user_id, "aptitude", topic=topic, level=level, timestamp=now)
+    return {"questions": output_text, "items": public_mcqs(items), "test_id": str(test_id)}
 
-        return jsonify({"questions": output_text})
+@app.route("/generate-aptitude", methods=["POST"])
+@claims_required
+def generate_aptitude(current_user):
+    data = request.json
+    if wants_job(data):
+        return submit_job("generate-aptitude", current_user, build_aptitude_test, data)
+    try:
+        return jsonify(build_aptitude_test(current_user["_id"], data))
     except Exception as e:
         return jsonify({"questions": [], "error": str(e)})
 
 # -------------------- Coding --------------------
-@app.route("/generate-coding", methods=["POST"])
-@token_required
-def generate_coding(current_user):
-    data = request.json
-    level = data.get("level", "easy")
-    topic = data.get("topic", "Random")  # added topic support
-
-    # Construct prompt dynamically
-    prompt = f"""
+def coding_prompt(level, topic):
+    return f"""
 Generate exactly 2 coding problems of {level} difficulty
 focused on the topic: {topic}.
-Include:
-1. Problem statement
-2. Input format
-3. Output format
-4. Sample input and output
+
+Format each problem like this:
+Problem <number>: <title>
+Statement: <problem statement>
+Input Format: <input format>
+Output Format: <output format>
+Sample Input:
+<sample input>
+Sample Output:
+<sample output>
+
 Do NOT include solutions.
+Separate each problem clearly with a line "---".
 """
 
-    try:
-        output_text = call_gemini(prompt)
-
-        # Store in database for the current user
-        tests_col.insert_one({
-            "user_id": current_user["_id"],
-            "test_type": "coding-problems",
-            "level": level,
-            "topic": topic,
-            "questions": output_text,
-            "timestamp": datetime.now()
-        })
+def build_coding_test(user_id, data):
+    level = data.get("level", "easy")
+    topic = data.get("topic", "Random")  # added topic support
+    problems = question_bank.take("coding", level, topic)
+    output_text = render_coding_problems(problems)
+    begin_writes()
+
+    # Store in database for the current user
+    now = datetime.now()
+    test_id = tests_col.insert_one({
+        "user_id": user_id,
+        "test_type": "coding-problems",
+        "level": level,
+        "topic": topic,
+        "questions": output_text,
+        "items": problems,
+        "timestamp": now
+    }).inserted_id
+    record_progress(user_id, "coding-problems", topic=topic, level=level, timestamp=now)
+    # Sample I/O doubles as test cases: /submit-code takes test_id + problem_index
+    return {
+        "questions": output_text,
+        "test_id": str(test_id),
+        "problems": [
+            {"title": p["title"], "text": p["text"], "test_cases": coding_test_cases(p)} for p in problems
+        ]
+    }
 
-        return jsonify({"questions": output_text})
+@app.route("/generate-coding", methods=["POST"])
+@claims_required
+def generate_coding(current_user):
+    data = request.json
+    if wants_job(data):
+        return submit_job("generate-coding", current_user, build_coding_test, data)
+    try:
+        return jsonify(build_coding_test(current_user["_id"], data))
     except Exception as e:
         return jsonify({"questions": [], "error": str(e)})
 
-# -------------------- Feedback --------------------
-@app.route("/generate-feedback", methods=["POST"])
-@token_required
-def generate_feedback(current_user):
-    data = request.json
-    test_type = data.get("test_type", "general")
-    questions = data.get("questions", [])
-    answers = data.get("answers", [])
-    role = data.get("role", "")
-
-    # Save raw answers per user
-    # Try to find the existing interview doc to update
-    existing_test = tests_col.find_one({
-        "user_id": current_user["_id"],
-        "role": role,
-        "test_type": "interview"
-    })
+# -------------------- Question Bank --------------------
+# The bank wants new questions on every generation, so these bypass the prompt cache
+question_bank = QuestionBank(question_bank_col, {
+    "aptitude": lambda level, topic: parse_mcqs(call_gemini(aptitude_prompt(level, topic), cache=False)),
+    "coding": lambda level, topic: parse_coding_problems(call_gemini(coding_prompt(level, topic), cache=False)),
+})
 
-    if existing_test:
-        # Update the existing document with answers
-        tests_col.update_one(
-            {"_id": existing_test["_id"]},
-            {"$set": {
-                "answers": answers,
-                "timestamp": datetime.now()
-            }}
-        )
-    else:
-        # Fallback: insert if no existing interview doc found
-        tests_col.insert_one({
-            "user_id": current_user["_id"],
-            "role": role,
-            "test_type": "interview",
-            "questions": questions,
-            "answers": answers,
-            "timestamp": datetime.now()
-        })
+# -------------------- Feedback --------------------
+def save_answers(user_id, role, questions, answers, session_id=None):
+    """Append the submitted answers to the interview session; returns the session id."""
+    session = interview_sessions.find(user_id, role, session_id)
+    if not session:
+        # Fallback: start a session if the client never generated one
+        session = interview_sessions.create(user_id, role, questions)
+        record_progress(user_id, "interview", timestamp=session["timestamp"])
+    try:
+        interview_sessions.append(session["_id"], "answers", answers=answers)
+    except SessionFull as e:
+        log.warning("interview answers not stored", error=str(e))
+    return str(session["_id"])
 
+def feedback_prompt(test_type, role, questions, answers):
     # Construct the question-answer pairs for the AI
     qa_pairs = "\n".join([f"Q: {q}\nA: {a}" for q, a in zip(questions, answers)])
 
@@ -503,61 +752,236 @@ def generate_feedback(current_user):
         - If the code fails any test cases, it should be considered 'rejected'.
         Provide your answer in the format: "Result: <accepted/rejected>"
         """
-    elif test_type == "interview":
-        # New logic for interview feedback
-        prompt = f"""
-        You are an expert interviewer evaluating a candidate's interview answers.
-        The candidate has completed an interview for the role: {role}.
+    else:
+        return None
+    return prompt
 
-        Responses:
-        {qa_pairs}
+def feedback_result(test_type, output_text):
+    # For aptitude tests, extract score and feedback from the response
+    if test_type == "aptitude":
+        score_match = re.search(r"Score: (\d+)", output_text)
+        score = int(score_match.group(1)) if score_match else 0
+        return {"score": score, "total": 25, "feedback": output_text}
+
+    # For coding tests, check if the AI returned 'accepted' or 'rejected'
+    if test_type == "coding":
+        result_match = re.search(r"Result: (accepted|rejected)", output_text.lower())
+        result = result_match.group(1) if result_match else "rejected"
+        return {"result": result, "feedback": output_text}
+
+    return {"feedback": output_text}
+
+def find_test(user_id, test_type, test_id=None):
+    # The given test, or the user's latest of that type when the client did not send an id
+    query = {"user_id": user_id, "test_type": test_type}
+    if test_id:
+        try:
+            query["_id"] = ObjectId(test_id)
+        except Exception:
+            return None
+    return tests_col.find_one(query, sort=[("timestamp", -1)])
+
+def store_aptitude_grade(user_id, test, grade):
+    # Only the first grade of a test counts towards the progress summary
+    first = tests_col.update_one({"_id": test["_id"], "score": None}, {"$set": grade}).modified_count
+    if not first:
+        tests_col.update_one({"_id": test["_id"]}, {"$set": grade})
+        return
+    record_progress(user_id, "aptitude", topic=test.get("topic"), level=test.get("level"),
+                    score=grade["score"], total=grade["total"], timestamp=test.get("timestamp"), counted=False)
+
+def aptitude_review_prompt(role, items, results):
+    missed = "\n".join(
+        f"Q: {items[r['index']]['question']}\n"
+        f"Chosen: {items[r['index']]['options'][r['chosen']] if r['chosen'] is not None else 'no answer'}\n"
+        f"Correct: {items[r['index']]['options'][r['correct']]}"
+        for r in results if not r["passed"]
+    ) or "None, every answer was correct."
+    score = sum(r["passed"] for r in results)
+    return f"""
+You are an expert evaluator for an aptitude test taken for the role: {role}.
+The candidate scored {score} / {len(results)}. The questions they got wrong:
+{missed}
 
-        Task:
-        - Provide detailed, constructive feedback on the candidate's answers.
-        - Highlight strengths and areas for improvement.
-        - Suggest actionable advice to improve performance in future interviews.
-        """
+Task:
+- Provide feedback on strengths and areas for improvement.
+- Briefly explain the correct reasoning for the missed questions.
+Do not recalculate the score.
+"""
 
-    else:
-        return jsonify({"error": "Invalid test type"}), 400
+def grade_aptitude(user_id, data):
+    """
+    Grade aptitude answers locally against the stored answer key. Returns the
+    graded result and the prompt for the qualitative review, or (None, None)
+    for tests stored before answer keys were kept.
+    """
+    test = find_test(user_id, "aptitude", data.get("test_id"))
+    if not test or not test.get("items"):
+        return None, None
+    score, results = grade_mcqs(test["items"], data["answers"])
+    graded = {"score": score, "total": len(test["items"]), "results": results, "test_id": str(test["_id"])}
+    begin_writes()  # the score is stored before the review call, which must not repeat it
+    store_aptitude_grade(user_id, test, {"score": score, "total": graded["total"], "results": results})
+    return graded, aptitude_review_prompt(data["role"], test["items"], results)
+
+def aptitude_feedback(graded, review):
+    return f"Score: {graded['score']} / {graded['total']}\n\n{review}".strip()
+
+def grade_latest_aptitude(user_id, result):
+    test = find_test(user_id, "aptitude")
+    if test:
+        store_aptitude_grade(user_id, test, {"score": result["score"], "total": result["total"]})
+
+# Interviews are scored per answer in concurrent batches; the answer cache bypasses the prompt cache
+evaluator = InterviewEvaluator(
+    lambda prompt: call_gemini(prompt, cache=False),
+    collection=eval_cache_col if EVAL_CACHE_SHARED else None
+)
+
+def interview_fields(role, questions, answers):
+    """Role, questions and answers as strings, with an empty answer for every question left unanswered."""
+    questions = [str(question or "") for question in questions] if isinstance(questions, list) else []
+    answers = [str(answer or "") for answer in answers]
+    return str(role or ""), questions, answers + [""] * (len(questions) - len(answers))
+
+def feedback_work(test_type, role, questions, answers, test_id=None):
+    if test_type in ("interview", "aptitude"):
+        return {"test_type": test_type, "role": role, "questions": questions, "answers": answers, "test_id": test_id}
+    prompt = feedback_prompt(test_type, role, questions, answers)
+    return {"test_type": test_type, "prompt": prompt} if prompt else None
+
+def save_interview_feedback(user_id, role, result, session_id=None):
+    # Keep the finished feedback on the session whose answers it grades
+    session = interview_sessions.find(user_id, role, session_id)
+    if not session:
+        return
+    # Answers are scored out of 10; only the first score of a session counts towards the progress summary
+    score = result.get("overall_score")
+    if interview_sessions.set_feedback(session["_id"], result["feedback"], result["evaluations"],
+                                       score=score, total=10 if score is not None else None):
+        record_progress(user_id, "interview", score=score, total=10, timestamp=session.get("timestamp"),
+                        counted=False)
+
+def build_feedback(user_id, data):
+    if data["test_type"] == "interview":
+        result = evaluator.evaluate(data["role"], data["questions"], data["answers"])
+        begin_writes()
+        save_interview_feedback(user_id, data["role"], result, data.get("session_id"))
+        return result
+
+    if data["test_type"] == "aptitude":
+        graded, review_prompt = grade_aptitude(user_id, data)
+        if graded is not None:
+            try:
+                review = call_gemini(review_prompt, cache=False)
+            except Exception as e:
+                log.warning("aptitude review failed, returning the score only", error=str(e))
+                review = ""
+            return {**graded, "feedback": aptitude_feedback(graded, review)}
+        data = {**data, "prompt": feedback_prompt("aptitude", data["role"], data["questions"], data["answers"])}
+
+    # Call Gemini with the constructed prompt
+    output_text = call_gemini(data["prompt"], cache=False)
+    result = feedback_result(data["test_type"], output_text)
+    if data["test_type"] == "aptitude":
+        begin_writes()
+        grade_latest_aptitude(user_id, result)
+    return result
+
+@app.route("/generate-feedback", methods=["POST"])
+@claims_required
+def generate_feedback(current_user):
+    data = request.json
+    test_type = data.get("test_type", "general")
+    questions = data.get("questions", [])
+    answers = data.get("answers", [])
+    role = data.get("role", "")
 
+    if not isinstance(answers, list):
+        return jsonify({"error": "Answers must be a list"}), 400
+    if test_type == "interview":
+        role, questions, answers = interview_fields(role, questions, answers)
+    work = feedback_work(test_type, role, questions, answers, data.get("test_id"))
+    if work is None:
+        return jsonify({"error": "Invalid test type"}), 400
+    if test_type == "interview":
+        if unknown_session(current_user["_id"], data):
+            return jsonify({"error": "Interview session not found"}), 404
+        # Save raw answers on the interview session
+        work["session_id"] = save_answers(current_user["_id"], role, questions, answers, data.get("session_id"))
+
+    if wants_job(data):
+        return submit_job("generate-feedback", current_user, build_feedback, work)
     try:
-        # Call Gemini with the constructed prompt
-        output_text = call_gemini(prompt)
+        return jsonify(build_feedback(current_user["_id"], work))
 
-        # For aptitude tests, extract score and feedback from the response
-        if test_type == "aptitude":
-            score_match = re.search(r"Score: (\d+)", output_text)
-            score = int(score_match.group(1)) if score_match else 0
-            return jsonify({"score": score, "total": 25, "feedback": output_text})
+    except Exception as e:
+        return jsonify({"feedback": "", "error": str(e)})
 
-        # For coding tests, check if the AI returned 'accepted' or 'rejected'
-        if test_type == "coding":
-            result_match = re.search(r"Result: (accepted|rejected)", output_text.lower())
-            result = result_match.group(1) if result_match else "rejected"
-            return jsonify({"result": result, "feedback": output_text})
+@app.route("/generate-feedback/stream", methods=["POST"])
+@claims_required
+def generate_feedback_stream(current_user):
+    data = request.json
+    test_type = data.get("test_type", "general")
+    questions = data.get("questions", [])
+    answers = data.get("answers", [])
+    role = data.get("role", "")
 
-        # For interview, just return the feedback text
-        if test_type == "interview":
-            return jsonify({"feedback": output_text})
+    if not isinstance(answers, list):
+        return jsonify({"error": "Answers must be a list"}), 400
+    if test_type == "interview":
+        role, questions, answers = interview_fields(role, questions, answers)
+    work = feedback_work(test_type, role, questions, answers, data.get("test_id"))
+    if work is None:
+        return jsonify({"error": "Invalid test type"}), 400
+    if test_type == "interview":
+        if unknown_session(current_user["_id"], data):
+            return jsonify({"error": "Interview session not found"}), 404
+        work["session_id"] = save_answers(current_user["_id"], role, questions, answers, data.get("session_id"))
 
-    except Exception as e:
-        return jsonify({"feedback": "", "error": str(e)})
+    if test_type == "interview":
+        # Each batch of evaluations is sent as soon as it is scored
+        evaluations = []
+
+        def chunks():
+            for batch in evaluator.iter_evaluations(role, questions, answers):
+                evaluations.extend(batch)
+                yield render_feedback({"summary": "", "overall_score": None, "evaluations": batch}) + "\n"
+
+        def on_evaluated(_):
+            result = evaluator.merge(role, evaluations)
+            save_interview_feedback(current_user["_id"], role, result, work["session_id"])
+            return result
+
+        return sse_response(chunks(), on_evaluated)
+
+    if test_type == "aptitude":
+        # The score is known before the review starts streaming
+        graded, review_prompt = grade_aptitude(current_user["_id"], work)
+        if graded is not None:
+            return sse_response(gemini.stream(review_prompt),
+                                lambda review: {**graded, "feedback": aptitude_feedback(graded, review)})
+        work["prompt"] = feedback_prompt(test_type, role, questions, answers)
+
+    def on_complete(output_text):
+        result = feedback_result(test_type, output_text)
+        if test_type == "aptitude":
+            grade_latest_aptitude(current_user["_id"], result)
+        return result
+
+    return sse_response(gemini.stream(work["prompt"]), on_complete)
 
 
 # -------------------- Code Execution --------------------
 @app.route("/run-code", methods=["POST"])
-@token_required
+@claims_required
 def run_code(current_user):
     data = request.json
     language = data.get("language", "python")
     code = data.get("code", "")
     stdin = data.get("input", "")
-    payload = {"language": language, "source": code, "stdin": stdin}
     try:
-        res = requests.post(PISTON_URL, json=payload)
-        res.raise_for_status()
-        result = res.json()
+        result = code_executor.run(language, code, stdin)
         return jsonify({
             "stdout": result.get("output", ""),
             "stderr": result.get("stderr", ""),
@@ -567,26 +991,27 @@ def run_code(current_user):
         return jsonify({"error": str(e)})
 
 @app.route("/submit-code", methods=["POST"])
-@token_required
+@claims_required
 def submit_code(current_user):
     data = request.json
     language = data.get("language", "python")
     code = data.get("code", "")
-    test_cases = data.get("test_cases", [])
-    results = []
-    for case in test_cases:
-        payload = {"language": language, "source": code, "stdin": case.get("input", "")}
+    test_cases = data.get("test_cases") or []
+    problem = None
+    if not test_cases and data.get("test_id"):
+        # Run against the sample I/O stored with the generated problem
+        test = find_test(current_user["_id"], "coding-problems", data["test_id"])
         try:
-            res = requests.post(PISTON_URL, json=payload)
-            res.raise_for_status()
-            output = res.json().get("output", "").strip()
-            expected = case.get("output", "").strip()
-            passed = output == expected
-            results.append({"input": case.get("input"), "expected": expected, "output": output, "passed": passed})
-        except Exception as e:
-            results.append({"input": case.get("input"), "error": str(e), "passed": False})
+            problem_index = int(data.get("problem_index", 0))
+            test_cases = coding_test_cases(test["items"][problem_index])
+            problem = {"test_id": str(test["_id"]), "problem_index": problem_index}
+        except (TypeError, KeyError, IndexError, ValueError):
+            return jsonify({"error": "Problem not found"}), 404
+    stop_on_failure = bool(data.get("stop_on_failure", False))
+    results = run_test_cases(code_executor, language, code, test_cases, stop_on_failure=stop_on_failure)
     score = sum(r["passed"] for r in results)
     # Save per user
+    now = datetime.now()
     tests_col.insert_one({
         "user_id": current_user["_id"],
         "language": language,
@@ -595,30 +1020,118 @@ def submit_code(current_user):
         "score": score,
         "total": len(test_cases),
         "test_type": "coding",
-        "timestamp": datetime.now()
+        **(problem or {}),
+        "timestamp": now
     })
+    record_progress(current_user["_id"], "coding", score=score, total=len(test_cases), timestamp=now)
     return jsonify({"results": results, "score": score, "total": len(test_cases)})
 
 # -------------------- Chatbot --------------------
+# Older turns reach the model through a rolling summary that the job queue keeps up to date
+chat_context = ChatContext(chat_col, chat_summaries_col, lambda prompt: call_gemini(prompt, cache=False))
+
+def chat_prompt(user_id, user_message):
+    prompt, kept, stale = chat_context.build(user_id, user_message)
+    if stale and chat_context.claim(user_id):
+        try:
+            jobs.submit("chat-summary", user_id, chat_context.update_summary, user_id, kept)
+        except QueueFull:
+            chat_context.release(user_id)  # the next turn tries again
+    return prompt
+
+def save_chat_turn(user_id, user_message, reply):
+    chat_col.insert_one({
+        "user_id": user_id,
+        "user_message": user_message,
+        "bot_reply": reply,
+        "timestamp": datetime.now()
+    })
+
+def build_chat_reply(user_id, data):
+    reply = call_gemini(chat_prompt(user_id, data["message"]), cache=False)
+    begin_writes()
+    save_chat_turn(user_id, data["message"], reply)
+    return {"reply": reply}
+
 @app.route("/api/chat", methods=["POST"])
-@token_required
+@claims_required
 def chatbot(current_user):
     data = request.json
     user_message = data.get("message", "")
     if not user_message:
         return jsonify({"error": "Message is required"}), 400
+    if wants_job(data):
+        return submit_job("chat", current_user, build_chat_reply, {"message": user_message})
     try:
-        reply = call_gemini(user_message)
-        chat_col.insert_one({
-            "user_id": current_user["_id"],
-            "user_message": user_message,
-            "bot_reply": reply,
-            "timestamp": datetime.now()
-        })
-        return jsonify({"reply": reply})
+        return jsonify(build_chat_reply(current_user["_id"], {"message": user_message}))
     except Exception as e:
         return jsonify({"error": str(e)})
 
+@app.route("/api/chat/stream", methods=["POST"])
+@claims_required
+def chatbot_stream(current_user):
+    data = request.json
+    user_message = data.get("message", "")
+    if not user_message:
+        return jsonify({"error": "Message is required"}), 400
+
+    def on_complete(reply):
+        save_chat_turn(current_user["_id"], user_message, reply)
+        return {"reply": reply}
+
+    return sse_response(gemini.stream(chat_prompt(current_user["_id"], user_message)), on_complete)
+
+# -------------------- Cache Stats --------------------
+CACHES = {
+    "code_execution": code_executor.stats,
+    "gemini": gemini.stats,
+    "interview_evaluations": evaluator.stats,
+    "parsed_resumes": parsed_resumes.local.stats,
+    "principals": principal_cache.stats,
+}
+registry.collect(cache_collector(CACHES))
+
+@app.route("/api/cache-stats", methods=["GET"])
+@recruiter_required
+def cache_stats(current_user):
+    return jsonify({
+        "code_execution": code_executor.stats(),
+        "gemini": gemini.stats(),
+        "interview_evaluations": evaluator.stats(),
+        "upstreams": upstream_stats(),
+        "principals": principal_cache.stats()
+    })
+
+# -------------------- Metrics --------------------
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    # Prometheus scrape target; set METRICS_TOKEN to require a bearer token
+    if not authorized(request.headers.get("Authorization", "")):
+        return jsonify({"error": "Unauthorized access"}), 401
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+# -------------------- Background Workers --------------------
+# Started by the first request a process serves (and by asgi_app before it serves), not at import:
+# the debug reloader's watcher, ingestion pool children and tools importing this module start none.
+_workers_lock = threading.Lock()
+_workers_started = False
+
+def start_background_workers():
+    global _workers_started
+    with _workers_lock:
+        if _workers_started:
+            return
+        _workers_started = True
+    jobs.start()
+    candidate_index.start()
+    if QUESTION_BANK_REFILL:
+        question_bank.start()
+
+@app.before_request
+def ensure_background_workers():
+    if not _workers_started:
+        start_background_workers()
+
 # -------------------- Protected Example Route --------------------
 @app.route("/protected", methods=["GET"])
 @token_required
@@ -626,32 +1139,90 @@ def protected_route(current_user):
     return jsonify({"message": f"Hello {current_user['username']}! You are authorized."})
 
 # -------------------- User Progress Route --------------------
+PROGRESS_MAX_PAGE = 500
+PROGRESS_FIELDS = {"test_type": 1, "topic": 1, "level": 1, "timestamp": 1}
+
+def encode_progress_cursor(test):
+    raw = json.dumps([test["timestamp"].isoformat(), str(test["_id"])])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_progress_cursor(cursor):
+    timestamp, test_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(timestamp), ObjectId(test_id)
+
+def progress_entry(test):
+    feedback = f"Topic: {test.get('topic', 'N/A')}, Level: {test.get('level', 'N/A')}"
+    return {
+        "id": str(test["_id"]),
+        "type": test.get("test_type", "unknown"),
+        "completed": True,
+        "feedback": feedback
+    }
+
 @app.route("/api/progress/<username>", methods=["GET"])
 @token_required
 def get_user_progress(current_user, username):
+    """
+    Newest-first test history. Without `limit` the full history is streamed;
+    with `limit` one page is returned and X-Next-Cursor carries the `cursor`
+    for the next page. Optional filters: test_type, from, to (ISO dates).
+    """
     if current_user["username"] != username:
         return jsonify({"error": "Unauthorized access"}), 403
 
-    user_id = current_user["_id"]
-
-    # Fetch all tests for the user, sorted by timestamp descending
-    tests = list(tests_col.find({"user_id": user_id}).sort("timestamp", -1))
+    query = {"user_id": current_user["_id"]}
+    try:
+        if request.args.get("test_type"):
+            query["test_type"] = request.args["test_type"]
+        if request.args.get("from") or request.args.get("to"):
+            query["timestamp"] = {}
+            if request.args.get("from"):
+                query["timestamp"]["$gte"] = datetime.fromisoformat(request.args["from"])
+            if request.args.get("to"):
+                query["timestamp"]["$lt"] = datetime.fromisoformat(request.args["to"])
+        if request.args.get("cursor"):
+            after_ts, after_id = decode_progress_cursor(request.args["cursor"])
+            query["$or"] = [
+                {"timestamp": {"$lt": after_ts}},
+                {"timestamp": after_ts, "_id": {"$lt": after_id}}
+            ]
+        limit = request.args.get("limit", type=int)
+        if limit is not None and limit < 0:
+            raise ValueError("negative limit")  # pymongo would read it as a single-batch limit
+    except Exception:
+        return jsonify({"error": "Invalid progress query"}), 400
+
+    tests = tests_col.find(query, PROGRESS_FIELDS).sort([("timestamp", -1), ("_id", -1)])
+    headers = {}
+    if limit:
+        # A page is bounded, so read one extra document to know whether another page follows
+        page = list(tests.limit(min(limit, PROGRESS_MAX_PAGE) + 1))
+        if len(page) > min(limit, PROGRESS_MAX_PAGE):
+            page = page[:-1]
+            headers["X-Next-Cursor"] = encode_progress_cursor(page[-1])
+        tests = page
+    else:
+        tests = tests.batch_size(200)
 
-    progress_list = []
-    for test in tests:
-        feedback = f"Topic: {test.get('topic', 'N/A')}, Level: {test.get('level', 'N/A')}"
+    def body():
+        # Emit the JSON array one entry at a time so memory stays flat for long histories
+        yield "["
+        for i, test in enumerate(tests):
+            yield ("," if i else "") + json.dumps(progress_entry(test))
+        yield "]"
 
-        progress_list.append({
-            "id": str(test["_id"]),
-            "type": test.get("test_type", "unknown"),
-            "completed": True,
-            "feedback": feedback
-        })
+    return Response(stream_with_context(body()), mimetype="application/json", headers=headers)
 
-    return jsonify(progress_list)
+@app.route("/api/progress/<username>/summary", methods=["GET"])
+@token_required
+def get_user_progress_summary(current_user, username):
+    """Counts, average scores and streaks from the user's pre-aggregated summary document."""
+    if current_user["username"] != username:
+        return jsonify({"error": "Unauthorized access"}), 403
+    return jsonify(format_summary(progress_col.find_one({"_id": current_user["_id"]})))
 
 @app.route("/api/test-questions/<test_id>", methods=["GET"])
-@token_required
+@claims_required
 def get_test_questions(current_user, test_id):
     # Step 1: Validate ObjectId
     try:
@@ -668,8 +1239,11 @@ def get_test_questions(current_user, test_id):
     if not test_doc:
         return jsonify({"error": "Test not found"}), 404
 
-    # Step 3: Extract questions
-    questions = test_doc.get("questions", [])
+    # Step 3: Extract questions, with an interview's follow-ups from its event log
+    if test_doc.get("test_type") == "interview":
+        questions = interview_sessions.questions(test_doc)
+    else:
+        questions = test_doc.get("questions", [])
 
     # Step 4: Return response
     return jsonify({"questions": questions})
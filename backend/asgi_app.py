@@ -0,0 +1,316 @@
+"""
+Async serving mode. The routes that spend their time waiting on Gemini,
+Piston or Mongo are served natively on an event loop, so one process can hold
+thousands of them in flight; every other route is handed to the Flask app
+unchanged. Endpoints, JWT handling and response shapes match app.py.
+
+    uvicorn asgi_app:application --port 5000
+
+Needs the optional async stack: quart, httpx, motor and asgiref.
+"""
+import asyncio
+import time
+from datetime import datetime
+from functools import wraps
+
+import jwt
+from asgiref.wsgi import WsgiToAsgi
+from bson import ObjectId
+from quart import Quart, jsonify, request
+
+import app as sync_app
+from db import async_database
+from executor import AsyncExecutor, run_test_cases_async
+from jobs import QueueFull
+from llm import AsyncGeminiClient
+from logs import get_logger
+from metrics import REQUEST_SECONDS, current_route
+from test_parser import coding_test_cases
+
+app = Quart(__name__)
+flask_app = WsgiToAsgi(sync_app.app)
+
+# Only these are served here; everything else (and CORS preflight) goes to Flask
+PORTED_ROUTES = {
+    "/generate-questions", "/follow-up", "/generate-feedback", "/run-code", "/submit-code", "/api/chat",
+}
+
+gemini = AsyncGeminiClient(sync_app.gemini)
+code_executor = AsyncExecutor(sync_app.code_executor)
+mongo = None
+log = get_logger("asgi")
+
+
+@app.before_serving
+async def connect_mongo():
+    global mongo
+    mongo = async_database()
+    sync_app.start_background_workers()
+
+
+def call_gemini(prompt, cache=True):
+    return gemini.generate(prompt, cache=cache)
+
+
+def blocking(fn, *args, **kwargs):
+    # Helpers shared with the sync app that still use pymongo run off the event loop
+    return asyncio.to_thread(fn, *args, **kwargs)
+
+
+# -------------------- JWT Auth --------------------
+def _authenticated(load_principal):
+    def decorator(f):
+        @wraps(f)
+        async def decorated(*args, **kwargs):
+            token = None
+            if "Authorization" in request.headers:
+                try:
+                    token = request.headers["Authorization"].split(" ")[1]
+                except IndexError:
+                    pass
+            if not token:
+                return jsonify({"error": "Token is missing"}), 401
+            try:
+                payload = jwt.decode(token, sync_app.JWT_SECRET, algorithms=[sync_app.JWT_ALGORITHM])
+                current_user = await load_principal(payload)
+            except Exception:
+                return jsonify({"error": "Token is invalid"}), 401
+            if current_user is None:
+                return jsonify({"error": "Token is invalid"}), 401
+            return await f(current_user, *args, **kwargs)
+        return decorated
+    return decorator
+
+
+async def _claims(payload):
+    return {"_id": ObjectId(payload["user_id"])}
+
+claims_required = _authenticated(_claims)
+
+
+def submit_job(kind, current_user, work, data):
+    try:
+        job_id = sync_app.jobs.submit(kind, current_user["_id"], work, current_user["_id"], data)
+    except QueueFull:
+        return jsonify({"error": "Too many pending jobs, try again shortly"}), 503
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+
+# -------------------- Interview --------------------
+@app.route("/generate-questions", methods=["POST"])
+@claims_required
+async def generate_questions(current_user):
+    data = await request.get_json()
+    if sync_app.wants_job(data):
+        return submit_job("generate-questions", current_user, sync_app.build_interview_questions, data)
+    try:
+        questions = sync_app.parse_interview_questions(
+            await call_gemini(sync_app.interview_prompt(data), cache=False)
+        )
+        session = await blocking(
+            sync_app.interview_sessions.create, current_user["_id"], data.get("role", ""), questions
+        )
+        await blocking(sync_app.record_progress, current_user["_id"], "interview", timestamp=session["timestamp"])
+        return jsonify({"questions": questions, "session_id": str(session["_id"])})
+    except Exception as e:
+        return jsonify({"questions": [], "error": str(e)})
+
+
+@app.route("/follow-up", methods=["POST"])
+@claims_required
+async def follow_up(current_user):
+    data = await request.get_json() or {}
+    answer = data.get("answer", "").strip()
+    role = data.get("role", "").strip()
+
+    if not answer or not role:
+        return jsonify({"error": "Both 'answer' and 'role' are required"}), 400
+    if await blocking(sync_app.unknown_session, current_user["_id"], data):
+        return jsonify({"error": "Interview session not found"}), 404
+
+    if sync_app.wants_job(data):
+        work = {"answer": answer, "role": role, "session_id": data.get("session_id")}
+        return submit_job("follow-up", current_user, sync_app.build_follow_ups, work)
+    try:
+        output_text = await call_gemini(sync_app.follow_up_prompt(role, answer), cache=False)
+        return jsonify(await blocking(
+            sync_app.save_follow_ups, current_user["_id"], role, answer, output_text, data.get("session_id")
+        ))
+    except Exception as e:
+        return jsonify({"questions": [], "error": f"Failed to generate follow-up questions: {str(e)}"}), 500
+
+
+# -------------------- Feedback --------------------
+async def build_feedback(user_id, data):
+    """build_feedback from app.py with the LLM calls awaited."""
+    if data["test_type"] == "interview":
+        result = await sync_app.evaluator.evaluate_async(
+            data["role"], data["questions"], data["answers"], lambda prompt: call_gemini(prompt, cache=False)
+        )
+        await blocking(sync_app.save_interview_feedback, user_id, data["role"], result, data.get("session_id"))
+        return result
+
+    if data["test_type"] == "aptitude":
+        graded, review_prompt = await blocking(sync_app.grade_aptitude, user_id, data)
+        if graded is not None:
+            try:
+                review = await call_gemini(review_prompt, cache=False)
+            except Exception as e:
+                log.warning("aptitude review failed, returning the score only", error=str(e))
+                review = ""
+            return {**graded, "feedback": sync_app.aptitude_feedback(graded, review)}
+        data = {**data, "prompt": sync_app.feedback_prompt("aptitude", data["role"], data["questions"], data["answers"])}
+
+    output_text = await call_gemini(data["prompt"], cache=False)
+    result = sync_app.feedback_result(data["test_type"], output_text)
+    if data["test_type"] == "aptitude":
+        await blocking(sync_app.grade_latest_aptitude, user_id, result)
+    return result
+
+
+@app.route("/generate-feedback", methods=["POST"])
+@claims_required
+async def generate_feedback(current_user):
+    data = await request.get_json()
+    test_type = data.get("test_type", "general")
+    questions = data.get("questions", [])
+    answers = data.get("answers", [])
+    role = data.get("role", "")
+
+    if not isinstance(answers, list):
+        return jsonify({"error": "Answers must be a list"}), 400
+    if test_type == "interview":
+        role, questions, answers = sync_app.interview_fields(role, questions, answers)
+    work = sync_app.feedback_work(test_type, role, questions, answers, data.get("test_id"))
+    if work is None:
+        return jsonify({"error": "Invalid test type"}), 400
+    if test_type == "interview":
+        if await blocking(sync_app.unknown_session, current_user["_id"], data):
+            return jsonify({"error": "Interview session not found"}), 404
+        # Save raw answers on the interview session
+        work["session_id"] = await blocking(
+            sync_app.save_answers, current_user["_id"], role, questions, answers, data.get("session_id")
+        )
+
+    if sync_app.wants_job(data):
+        return submit_job("generate-feedback", current_user, sync_app.build_feedback, work)
+    try:
+        return jsonify(await build_feedback(current_user["_id"], work))
+    except Exception as e:
+        return jsonify({"feedback": "", "error": str(e)})
+
+
+# -------------------- Code Execution --------------------
+@app.route("/run-code", methods=["POST"])
+@claims_required
+async def run_code(current_user):
+    data = await request.get_json()
+    try:
+        result = await code_executor.run(data.get("language", "python"), data.get("code", ""), data.get("input", ""))
+        return jsonify({
+            "stdout": result.get("output", ""),
+            "stderr": result.get("stderr", ""),
+            "time": result.get("time", "")
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
+
+@app.route("/submit-code", methods=["POST"])
+@claims_required
+async def submit_code(current_user):
+    data = await request.get_json()
+    language = data.get("language", "python")
+    code = data.get("code", "")
+    test_cases = data.get("test_cases") or []
+    problem = None
+    if not test_cases and data.get("test_id"):
+        # Run against the sample I/O stored with the generated problem
+        try:
+            test = await mongo.tests.find_one(
+                {"_id": ObjectId(data["test_id"]), "user_id": current_user["_id"], "test_type": "coding-problems"}
+            )
+            problem_index = int(data.get("problem_index", 0))
+            test_cases = coding_test_cases(test["items"][problem_index])
+            problem = {"test_id": str(test["_id"]), "problem_index": problem_index}
+        except Exception:
+            return jsonify({"error": "Problem not found"}), 404
+    stop_on_failure = bool(data.get("stop_on_failure", False))
+    results = await run_test_cases_async(code_executor, language, code, test_cases, stop_on_failure=stop_on_failure)
+    score = sum(r["passed"] for r in results)
+    # Save per user
+    now = datetime.now()
+    await mongo.tests.insert_one({
+        "user_id": current_user["_id"],
+        "language": language,
+        "code": code,
+        "results": results,
+        "score": score,
+        "total": len(test_cases),
+        "test_type": "coding",
+        **(problem or {}),
+        "timestamp": now
+    })
+    await blocking(sync_app.record_progress, current_user["_id"], "coding",
+                   score=score, total=len(test_cases), timestamp=now)
+    return jsonify({"results": results, "score": score, "total": len(test_cases)})
+
+
+# -------------------- Chatbot --------------------
+@app.route("/api/chat", methods=["POST"])
+@claims_required
+async def chatbot(current_user):
+    data = await request.get_json()
+    user_message = data.get("message", "")
+    if not user_message:
+        return jsonify({"error": "Message is required"}), 400
+    if sync_app.wants_job(data):
+        return submit_job("chat", current_user, sync_app.build_chat_reply, {"message": user_message})
+    try:
+        prompt = await blocking(sync_app.chat_prompt, current_user["_id"], user_message)
+        reply = await call_gemini(prompt, cache=False)
+        await mongo.chat_history.insert_one({
+            "user_id": current_user["_id"],
+            "user_message": user_message,
+            "bot_reply": reply,
+            "timestamp": datetime.now()
+        })
+        return jsonify({"reply": reply})
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
+
+@app.before_request
+async def start_request_timer():
+    # Same series as the Flask side (metrics.instrument); each request runs in its own task context
+    request.metrics_route = request.url_rule.rule if request.url_rule else "unmatched"
+    current_route.set(request.metrics_route)
+    request.metrics_started = time.perf_counter()
+
+
+@app.after_request
+async def allow_cors(response):
+    # Same policy as CORS(app) on the Flask side
+    if "Origin" in request.headers:
+        response.headers["Access-Control-Allow-Origin"] = "*"
+    return response
+
+
+@app.after_request
+async def observe_request(response):
+    if hasattr(request, "metrics_started"):
+        REQUEST_SECONDS.observe(time.perf_counter() - request.metrics_started,
+                                request.method, request.metrics_route, str(response.status_code))
+    return response
+
+
+@app.errorhandler(500)
+async def internal_error(e):
+    return jsonify({"error": "Internal server error"}), 500
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and (scope["path"] not in PORTED_ROUTES or scope["method"] == "OPTIONS"):
+        await flask_app(scope, receive, send)
+    else:
+        await app(scope, receive, send)
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+from bson import ObjectId, json_util
+
+from cache import TTLCache
+
+# -------------------- Auth Cache Settings --------------------
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_SHARED = os.getenv("AUTH_CACHE_SHARED", "")  # "", "redis" or "local"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class LocalKV:
+    """In-process stand-in for the small part of the Redis API the caches use."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def setex(self, key, seconds, value):
+        with self._lock:
+            self._data[key] = (value.encode() if isinstance(value, str) else value, time.monotonic() + seconds)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+
+def make_shared_store(kind=AUTH_CACHE_SHARED):
+    if kind == "redis":
+        import redis  # optional dependency, only needed for the shared Redis mode
+        return redis.Redis.from_url(REDIS_URL)
+    if kind == "local":
+        return LocalKV()
+    return None
+
+
+class PrincipalCache:
+    """
+    Authenticated-user lookups for token_required. A per-process LRU/TTL cache
+    sits in front of an optional shared Redis-compatible store, which sits in
+    front of Mongo. Password hashes are never cached. Other processes only see
+    an invalidation once their local entry expires, so AUTH_CACHE_TTL bounds
+    staleness.
+    """
+
+    def __init__(self, users_col, ttl=AUTH_CACHE_TTL, maxsize=AUTH_CACHE_SIZE, shared=None):
+        self.users_col = users_col
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.shared_hits = 0
+        self.db_reads = 0
+
+    @staticmethod
+    def _key(user_id):
+        return f"principal:{user_id}"
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        user = self.local.get(user_id)
+        if user is not None:
+            return user
+        if self.shared is not None:
+            raw = self.shared.get(self._key(user_id))
+            if raw is not None:
+                self.shared_hits += 1
+                user = json_util.loads(raw)
+                self.local.set(user_id, user)
+                return user
+        self.db_reads += 1
+        user = self.users_col.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+        if user is not None:
+            self.local.set(user_id, user)
+            if self.shared is not None:
+                self.shared.setex(self._key(user_id), self.ttl, json_util.dumps(user))
+        return user
+
+    def invalidate(self, user_id):
+        """Call after any write to a user document."""
+        user_id = str(user_id)
+        self.local.delete(user_id)
+        if self.shared is not None:
+            self.shared.delete(self._key(user_id))
+
+    def stats(self):
+        return {**self.local.stats(), "shared_hits": self.shared_hits, "db_reads": self.db_reads}
@@ -0,0 +1,146 @@
+"""
+Compare the Flask app (threaded WSGI server) with the async app (uvicorn)
+under many concurrent slow LLM calls, against a fake Gemini.
+
+    python -m bench.asgi_load --requests 400 --concurrency 200 --token-delay 0.05
+    python -m bench.asgi_load --mongomock   # no MongoDB needed
+
+Each server runs in its own process; the sync one is capped at --threads
+worker threads the way a production WSGI server would be.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from bench.fakes import FakeGemini
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(mode, port, threads, mongomock):
+    if mongomock:
+        import mongomock as mongomock_lib
+        import pymongo
+        pymongo.MongoClient = mongomock_lib.MongoClient
+        os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/AI_Interviewer")
+        import db
+        import mongomock_motor
+        db.async_database = lambda: mongomock_motor.AsyncMongoMockClient()[db.db.name]
+
+    if mode == "sync":
+        from concurrent.futures import ThreadPoolExecutor
+        from socketserver import ThreadingMixIn
+        from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+        from app import app
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args):
+                pass
+
+        class PooledServer(ThreadingMixIn, BaseWSGIServer):
+            pool = ThreadPoolExecutor(max_workers=threads)
+
+            def process_request(self, request, client_address):
+                self.pool.submit(self.process_request_thread, request, client_address)
+
+        PooledServer("127.0.0.1", port, app, handler=QuietHandler).serve_forever()
+    else:
+        import uvicorn
+        uvicorn.run("asgi_app:application", host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(mode, args, env):
+    port = free_port()
+    command = [sys.executable, "-m", "bench.asgi_load", "--serve", mode, "--port", str(port),
+               "--threads", str(args.threads)] + (["--mongomock"] if args.mongomock else [])
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base_url + "/", timeout=1)
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+async def load(base_url, requests, concurrency):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        name = uuid.uuid4().hex[:8]
+        await client.post("/signup", json={"username": name, "email": f"{name}@bench", "password": "bench"})
+        res = await client.post("/login", json={"email": f"{name}@bench", "password": "bench"})
+        headers = {"Authorization": "Bearer " + res.json()["token"]}
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    res = await client.post("/api/chat", json={"message": f"question {i}"}, headers=headers)
+                    ok = res.status_code == 200 and "reply" in res.json()
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+    return {"rps": requests / elapsed, "p50": pct(0.50), "p95": pct(0.95), "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--token-delay", type=float, default=0.05, help="fake Gemini delay per word (s)")
+    parser.add_argument("--threads", type=int, default=32, help="worker threads for the sync server")
+    parser.add_argument("--pool", type=int, default=128, help="Gemini connection pool size")
+    parser.add_argument("--mongomock", action="store_true")
+    parser.add_argument("--serve", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.threads, args.mongomock)
+        return
+
+    fake = FakeGemini(token_delay=args.token_delay).start()
+    env = {**os.environ, "GEMINI_URL": fake.base_url + ":generateContent", "GEMINI_POOL_SIZE": str(args.pool)}
+    print(f"requests={args.requests} concurrency={args.concurrency} token_delay={args.token_delay}s "
+          f"sync_threads={args.threads} pool={args.pool}")
+    for mode in ("sync", "async"):
+        process, base_url = start_server(mode, args, env)
+        try:
+            r = asyncio.run(load(base_url, args.requests, args.concurrency))
+        finally:
+            process.terminate()
+            process.wait()
+        print(f"{mode:5}: {r['rps']:7.1f} req/s  p50 {r['p50'] * 1000:7.0f} ms  "
+              f"p95 {r['p95'] * 1000:7.0f} ms  errors {r['errors']}")
+    fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Candidate search at scale: indexes synthetic parsed resumes, then times
+incremental adds, a merge, loading the memory-mapped snapshot and top-k
+queries, and checks that merged and unmerged rows rank identically.
+
+    python -m bench.candidates --resumes 300000 --queries 200
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from bson import ObjectId
+
+from bench.report import percentile
+from candidate_search import CandidateIndex
+from skill_matcher import DEFAULT_SKILLS
+
+PROJECT_WORDS = (
+    "realtime chat dashboard analytics pipeline recommendation engine scraper compiler game inventory payment "
+    "gateway microservice api backend frontend mobile app search portal booking tracker classifier detection "
+    "forecasting etl warehouse streaming monitoring cli library plugin extension bot assistant visualizer"
+).split()
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Tyrell"]
+QUERIES = [
+    "Backend developer with Python, Flask and MongoDB building REST APIs",
+    "Frontend engineer, React.js and TypeScript, realtime dashboard experience",
+    "Data scientist: machine learning, PyTorch, NLP and data analytics",
+    "DevOps engineer with Docker, Kubernetes and AWS monitoring",
+    "Full stack developer Node.js Express.js PostgreSQL payment gateway",
+]
+
+
+def synthetic_resume(rng, skills):
+    weights = [1 / (rank + 1) for rank in range(len(skills))]
+    return {
+        "skills": sorted(set(rng.choices(skills, weights, k=rng.randint(3, 12)))),
+        "projects": [" ".join(rng.sample(PROJECT_WORDS, rng.randint(2, 5))) for _ in range(rng.randint(1, 4))],
+        "experience": [f"{rng.choice(COMPANIES)} ({rng.randint(1, 28)} May, 2019 - 1 June, 2021)"
+                       for _ in range(rng.randint(0, 3))],
+    }
+
+
+def synthetic_docs(count, seed, users):
+    rng = random.Random(seed)
+    skills = list(DEFAULT_SKILLS)
+    user_ids = [ObjectId() for _ in range(users)]
+    for _ in range(count):
+        yield {"_id": ObjectId(), "user_id": rng.choice(user_ids), "resume": synthetic_resume(rng, skills)}
+
+
+def query_timings(index, queries, k):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, k)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=300000)
+    parser.add_argument("--users", type=int, default=0, help="distinct candidates (default: one per resume)")
+    parser.add_argument("--updates", type=int, default=2000, help="resumes added after the merge, left unmerged")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    users = args.users or args.resumes
+    index = CandidateIndex(None, path=tempfile.mkdtemp(prefix="candidate-index-"), merge_threshold=10 ** 9)
+    started = time.perf_counter()
+    for doc in synthetic_docs(args.resumes, args.seed, users):
+        index.add(doc)
+    added = time.perf_counter() - started
+    print(f"add:       {args.resumes} resumes in {added:.1f} s ({added / args.resumes * 1e6:.0f} us each)")
+
+    started = time.perf_counter()
+    index.merge()
+    print(f"merge:     {time.perf_counter() - started:.2f} s, snapshot in {index.path}")
+
+    started = time.perf_counter()
+    reloaded = CandidateIndex(None, path=index.path)
+    reloaded.load_snapshot()
+    print(f"load:      {(time.perf_counter() - started) * 1000:.0f} ms from the memory-mapped snapshot")
+
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+    for label, target in (("merged", reloaded), ("+unmerged", None)):
+        if target is None:
+            for doc in synthetic_docs(args.updates, args.seed + 1, users):
+                reloaded.add(doc)
+            target = reloaded
+            label = f"+{args.updates} new"
+        timings = query_timings(target, queries, args.k)
+        print(f"search {label:<11} top-{args.k}: p50 {percentile(timings, 50) * 1000:6.2f} ms   "
+              f"p95 {percentile(timings, 95) * 1000:6.2f} ms   ({target.stats()['candidates']} candidates)")
+
+    before = [reloaded.search(query, args.k) for query in QUERIES]
+    reloaded.merge()
+    after = [reloaded.search(query, args.k) for query in QUERIES]
+    same = all([hit[0] for hit in a] == [hit[0] for hit in b] for a, b in zip(before, after))
+    print(f"merged and unmerged rankings identical: {same}")
+
+
+if __name__ == "__main__":
+    main()
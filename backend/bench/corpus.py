@@ -0,0 +1,101 @@
+"""
+Synthetic resume corpus for benchmarks: plain text in the layout the parser
+expects and matching single-font PDFs, built without any PDF library.
+
+    python -m bench.corpus --count 20 --out /tmp/resumes   # write the PDFs to disk
+"""
+import argparse
+import os
+import random
+
+from skill_matcher import DEFAULT_SKILLS
+
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Dana", "Elif", "Farid", "Grace", "Hiro", "Ines", "Jonas"]
+LAST_NAMES = ["Kumar", "Okafor", "Silva", "Novak", "Tanaka", "Haddad", "Larsen", "Moreau"]
+ROLES = ["Software Engineer", "Data Scientist", "Backend Developer", "Frontend Developer", "ML Engineer"]
+COMPANIES = ["Acme Corp", "Globex Systems", "Initech", "Umbrella Labs", "Hooli", "Stark Industries"]
+SCHOOLS = ["Stanford University", "Delhi Public School", "Imperial College", "MIT University"]
+MONTHS = ["January", "March", "June", "September", "November"]
+FILLER = (
+    "Owned the design, delivery and on-call rotation for services handling millions of requests a day, "
+    "working closely with product and design to ship incremental improvements."
+)
+
+
+def resume_text(rng, filler_lines=10):
+    skills = rng.sample(sorted(DEFAULT_SKILLS), min(len(DEFAULT_SKILLS), rng.randint(6, 14)))
+    lines = [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} | {rng.choice(ROLES)}",
+        "Skills: " + ", ".join(skills),
+        "EDUCATION",
+    ]
+    for _ in range(rng.randint(1, 2)):
+        lines.append(f"{rng.randint(2005, 2022)} {rng.choice(SCHOOLS)}")
+    lines.append("EXPERIENCE")
+    for _ in range(rng.randint(1, 4)):
+        start = rng.randint(2012, 2020)
+        lines.append(f"{rng.choice(COMPANIES)} | {rng.randint(1, 28)} {rng.choice(MONTHS)}, {start} - "
+                     f"{rng.randint(1, 28)} {rng.choice(MONTHS)}, {start + rng.randint(1, 4)}")
+        lines += [FILLER] * rng.randint(1, filler_lines)
+    lines.append("PROJECTS")
+    for _ in range(rng.randint(1, 3)):
+        lines.append(f"{rng.choice(['Realtime', 'Scalable', 'Offline'])} {rng.choice(['dashboard', 'chat assistant', 'recommender'])} "
+                     f"({', '.join(rng.sample(skills, 2))})")
+    lines.append("Key Skills: " + ", ".join(skills[:5]))
+    return lines
+
+
+def _escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines, lines_per_page=60):
+    """A minimal valid PDF with one Helvetica text line per entry, paginated."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        content = "BT /F1 10 Tf 50 780 Td 12 TL " + " ".join(f"({_escape(line)}) Tj T*" for line in page) + " ET"
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1", "replace")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def sample_resumes(count, seed=7, filler_lines=10):
+    """[(text, pdf_bytes)] for `count` distinct synthetic resumes."""
+    rng = random.Random(seed)
+    resumes = []
+    for _ in range(count):
+        lines = resume_text(rng, filler_lines)
+        resumes.append(("\n".join(lines) + "\n", make_pdf(lines)))
+    return resumes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for i, (_, pdf) in enumerate(sample_resumes(args.count, args.seed)):
+        with open(os.path.join(args.out, f"resume_{i:03d}.pdf"), "wb") as f:
+            f.write(pdf)
+    print(f"Wrote {args.count} resumes to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
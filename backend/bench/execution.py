@@ -0,0 +1,44 @@
+"""
+Benchmark the /submit-code fan-out without touching the network.
+
+    python -m bench.execution --cases 20 --latency 0.2 --parallel 8
+"""
+import argparse
+import time
+
+from executor import LocalExecutor, run_test_cases
+
+SOLUTION = "n = int(input())\nprint(n * n)\n"
+
+
+def serial(executor, cases):
+    # Mirrors the original one-request-per-case loop
+    return [executor.run("python", SOLUTION, case["input"]) for case in cases]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated sandbox round trip (s)")
+    parser.add_argument("--parallel", type=int, default=8)
+    args = parser.parse_args()
+
+    executor = LocalExecutor(latency=args.latency)
+    cases = [{"input": str(i), "output": str(i * i)} for i in range(args.cases)]
+
+    started = time.perf_counter()
+    serial(executor, cases)
+    serial_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = run_test_cases(executor, "python", SOLUTION, cases, max_parallel=args.parallel)
+    parallel_s = time.perf_counter() - started
+
+    passed = sum(r["passed"] for r in results)
+    print(f"cases={args.cases} latency={args.latency}s parallel={args.parallel}")
+    print(f"serial:   {serial_s:.2f}s")
+    print(f"parallel: {parallel_s:.2f}s  ({passed}/{len(cases)} passed, {serial_s / parallel_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
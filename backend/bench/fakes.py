@@ -0,0 +1,234 @@
+"""
+In-process fake upstreams for local testing and benchmarks.
+
+    python -m bench.fakes --port 8090 --token-delay 0.05 --piston-port 8091 --latency lognormal:0.3:0.5
+
+then point the backend at them:
+
+    GEMINI_URL=http://127.0.0.1:8090/v1beta/models/fake:generateContent
+    PISTON_URL=http://127.0.0.1:8091/api/v2/piston/execute
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_REPLY = (
+    "Here is some feedback on your answers. You explained your projects clearly, "
+    "but could give more concrete numbers about the impact of your work."
+)
+
+
+class Latency:
+    """
+    Per-request delay distribution, parsed from "0.2" (fixed seconds),
+    "uniform:LOW:HIGH", "normal:MEAN:STDDEV" or "lognormal:MEDIAN:SIGMA".
+    Samples are never negative.
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, kind="fixed", a=0.0, b=0.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}'")
+        self.kind, self.a, self.b = kind, a, b
+
+    @classmethod
+    def parse(cls, spec):
+        if isinstance(spec, cls):
+            return spec
+        parts = str(spec or "0").split(":")
+        if len(parts) == 1:
+            return cls("fixed", float(parts[0]))
+        return cls(parts[0], *(float(p) for p in parts[1:3]))
+
+    def sample(self, rng):
+        if self.kind == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            value = self.a * rng.lognormvariate(0, self.b) if self.a else 0.0
+        else:
+            value = self.a
+        return max(0.0, value)
+
+    def __str__(self):
+        return str(self.a) if self.kind == "fixed" else f"{self.kind}:{self.a}:{self.b}"
+
+
+class _FakeUpstream(ThreadingHTTPServer):
+    """
+    Base for the fakes: every request first waits a sample of `latency`.
+    Failures can be injected: a random `error_rate` share of requests, or the
+    next `count` requests via fail_next(), get `error_status` (with a
+    Retry-After header when `retry_after` is set).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port, handler, latency=None, error_rate=0.0, error_status=503,
+                 retry_after=None, seed=None):
+        super().__init__(("127.0.0.1", port), handler)
+        self.latency = Latency.parse(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._fail_next = 0
+        self._lock = threading.Lock()
+
+    def fail_next(self, count, status=None):
+        with self._lock:
+            self._fail_next = count
+            if status:
+                self.error_status = status
+
+    def should_fail(self):
+        with self._lock:
+            self.requests += 1
+            fail = self._fail_next > 0 or self.random.random() < self.error_rate
+            if fail:
+                self._fail_next = max(0, self._fail_next - 1)
+                self.errors += 1
+            return fail
+
+    def delay(self):
+        with self._lock:
+            seconds = self.latency.sample(self.random)
+        if seconds:
+            time.sleep(seconds)
+
+    @property
+    def root_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class FakeGemini(_FakeUpstream):
+    """
+    Answers generateContent with one JSON body and streamGenerateContent with
+    one SSE event per word, sleeping `token_delay` between words on top of
+    the per-request `latency`.
+    """
+
+    def __init__(self, port=0, reply=FAKE_REPLY, token_delay=0.0, **kwargs):
+        super().__init__(port, _GeminiHandler, **kwargs)
+        self.reply = reply
+        self.token_delay = token_delay
+
+    @property
+    def base_url(self):
+        return f"{self.root_url}/v1beta/models/fake"
+
+
+class FakePiston(_FakeUpstream):
+    """
+    Answers Piston execute requests without running anything: the output is
+    `respond(language, source, stdin)`, by default the stdin echoed back, so
+    a test case passes when its expected output equals its input.
+    """
+
+    def __init__(self, port=0, respond=None, **kwargs):
+        super().__init__(port, _PistonHandler, **kwargs)
+        self.respond = respond or (lambda language, source, stdin: stdin)
+
+    @property
+    def url(self):
+        return f"{self.root_url}/api/v2/piston/execute"
+
+
+def _candidate(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status >= 400 and self.server.retry_after is not None:
+            self.send_header("Retry-After", str(self.server.retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+    def send_error_reply(self):
+        self.send_json(self.server.error_status,
+                       {"error": {"code": self.server.error_status, "message": "injected failure"}})
+
+
+class _GeminiHandler(_FakeHandler):
+    def do_POST(self):
+        self.read_json()
+        self.server.delay()
+        if self.server.should_fail():
+            self.send_error_reply()
+            return
+        if ":streamGenerateContent" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for word in self.server.reply.split(" "):
+                time.sleep(self.server.token_delay)
+                event = f"data: {json.dumps(_candidate(word + ' '))}\r\n\r\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        time.sleep(self.server.token_delay * len(self.server.reply.split(" ")))
+        self.send_json(200, _candidate(self.server.reply))
+
+
+class _PistonHandler(_FakeHandler):
+    def do_POST(self):
+        payload = self.read_json()
+        started = time.perf_counter()
+        self.server.delay()
+        if self.server.should_fail():
+            self.send_error_reply()
+            return
+        output = self.server.respond(payload.get("language"), payload.get("source", ""), payload.get("stdin", ""))
+        self.send_json(200, {
+            "language": payload.get("language"),
+            "output": output,
+            "stderr": "",
+            "time": round(time.perf_counter() - started, 3),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--latency", default="0", help='per-request delay, e.g. "0.2" or "lognormal:0.3:0.5"')
+    parser.add_argument("--piston-port", type=int, default=0, help="also serve a fake Piston (0 = off)")
+    args = parser.parse_args()
+    behaviour = {"latency": args.latency, "error_rate": args.error_rate, "error_status": args.error_status}
+    if args.piston_port:
+        piston = FakePiston(port=args.piston_port, **behaviour).start()
+        print(f"Fake Piston listening on {piston.url}")
+    server = FakeGemini(port=args.port, token_delay=args.token_delay, **behaviour)
+    print(f"Fake Gemini listening on {server.base_url}:generateContent")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Endpoint-mix load test. Runs the Flask app in-process against fake Gemini and
+Piston servers (and mongomock, or the MONGO_URI database) and reports
+latency percentiles, throughput and error rate per endpoint.
+
+    python -m bench.load --mongomock --requests 2000 --concurrency 32 \\
+        --gemini-latency lognormal:0.8:0.4 --piston-latency 0.15 --error-rate 0.02
+
+    python -m bench.load --url http://127.0.0.1:5000   # an already running backend
+
+With --url the backend should already point at fakes (see bench.fakes).
+The load generator shares the process (and
+GIL) with an in-process app, so compare runs with each other rather than
+with production numbers.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+import uuid
+
+import requests
+
+from bench.corpus import sample_resumes
+from bench.fakes import FakeGemini, FakePiston
+from bench.report import Recorder
+
+DEFAULT_MIX = "login=5,parse-resume=10,generate-questions=10,submit-code=20,chat=35,progress=15,progress-summary=5"
+ROLES = ["Backend Developer", "Data Scientist", "Frontend Developer"]
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown endpoint '{name}', choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# -------------------- Scenarios --------------------
+# Each takes (session, base_url, user, rng, resumes) and returns the response.
+def login(session, base_url, user, rng, resumes):
+    return session.post(f"{base_url}/login", json={"email": user["email"], "password": user["password"]})
+
+
+def parse_resume(session, base_url, user, rng, resumes):
+    files = {"resume": ("resume.pdf", rng.choice(resumes), "application/pdf")}
+    return session.post(f"{base_url}/parse-resume", files=files, headers=user["headers"])
+
+
+def generate_questions(session, base_url, user, rng, resumes):
+    body = {"role": rng.choice(ROLES), "parsed": {"skills": ["python", "mongodb"], "experience": [], "education": []}}
+    return session.post(f"{base_url}/generate-questions", json=body, headers=user["headers"])
+
+
+def submit_code(session, base_url, user, rng, resumes):
+    # A limited set of variants, so some submissions hit the execution cache like real resubmissions do
+    body = {
+        "language": "python",
+        "code": f"print(input())  # attempt {rng.randint(0, 50)}",
+        "test_cases": [{"input": str(i), "output": str(i)} for i in range(3)],
+    }
+    return session.post(f"{base_url}/submit-code", json=body, headers=user["headers"])
+
+
+def chat(session, base_url, user, rng, resumes):
+    body = {"message": f"How should I prepare for a {rng.choice(ROLES)} interview? ({uuid.uuid4().hex[:6]})"}
+    return session.post(f"{base_url}/api/chat", json=body, headers=user["headers"])
+
+
+def progress(session, base_url, user, rng, resumes):
+    return session.get(f"{base_url}/api/progress/{user['username']}", params={"limit": 20}, headers=user["headers"])
+
+
+def progress_summary(session, base_url, user, rng, resumes):
+    return session.get(f"{base_url}/api/progress/{user['username']}/summary", headers=user["headers"])
+
+
+SCENARIOS = {
+    "login": login,
+    "parse-resume": parse_resume,
+    "generate-questions": generate_questions,
+    "submit-code": submit_code,
+    "chat": chat,
+    "progress": progress,
+    "progress-summary": progress_summary,
+}
+
+
+def succeeded(res):
+    # Several routes report upstream failures as 200 with an "error" field
+    if res.status_code >= 400:
+        return False
+    if res.headers.get("Content-Type", "").startswith("application/json"):
+        try:
+            body = res.json()
+        except ValueError:
+            return False
+        return not (isinstance(body, dict) and body.get("error"))
+    return True
+
+
+# -------------------- Harness --------------------
+def start_app(mongomock):
+    """Import the app against the fakes and serve it on a background thread; returns its base URL."""
+    if mongomock:
+        import mongomock as mongomock_lib
+        import pymongo
+        pymongo.MongoClient = mongomock_lib.MongoClient
+        os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/AI_Interviewer")
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def create_users(base_url, count):
+    users = []
+    for _ in range(count):
+        name = f"bench-{uuid.uuid4().hex[:8]}"
+        user = {"username": name, "email": f"{name}@bench.local", "password": "bench-password"}
+        requests.post(f"{base_url}/signup", json=user).raise_for_status()
+        res = requests.post(f"{base_url}/login", json={"email": user["email"], "password": user["password"]})
+        res.raise_for_status()
+        user["headers"] = {"Authorization": "Bearer " + res.json()["token"]}
+        users.append(user)
+    return users
+
+
+def run(base_url, users, mix, resumes, total, concurrency, duration, seed):
+    recorder = Recorder()
+    names, weights = list(mix), list(mix.values())
+    issued = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration if duration else None
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        session = requests.Session()
+        while True:
+            with lock:
+                if issued[0] >= total or (deadline and time.monotonic() >= deadline):
+                    return
+                issued[0] += 1
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = succeeded(SCENARIOS[name](session, base_url, rng.choice(users), rng, resumes))
+            except requests.RequestException:
+                ok = False
+            recorder.record(name, time.perf_counter() - started, ok)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="load an already running backend instead of an in-process app")
+    parser.add_argument("--mongomock", action="store_true", help="in-process app on mongomock instead of MONGO_URI")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds (0 = no limit)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--resumes", type=int, default=20, help="distinct PDFs uploaded to /parse-resume")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight pairs")
+    parser.add_argument("--gemini-latency", default="lognormal:0.8:0.4", help="fake Gemini delay distribution")
+    parser.add_argument("--piston-latency", default="uniform:0.05:0.3", help="fake Piston delay distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake upstream calls that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    fakes = []
+    base_url = args.url
+    if not base_url:
+        behaviour = {"error_rate": args.error_rate, "error_status": args.error_status, "seed": args.seed}
+        gemini = FakeGemini(latency=args.gemini_latency, **behaviour).start()
+        piston = FakePiston(latency=args.piston_latency, **behaviour).start()
+        fakes = [("gemini", gemini), ("piston", piston)]
+        os.environ.update({
+            "GEMINI_URL": gemini.base_url + ":generateContent",
+            "PISTON_URL": piston.url,
+            "CODE_EXECUTOR": "piston",
+        })
+        base_url = start_app(args.mongomock)
+
+    resumes = [pdf for _, pdf in sample_resumes(args.resumes, args.seed)]
+    users = create_users(base_url, args.users)
+    print(f"{base_url}: {args.requests} requests, concurrency {args.concurrency}, {args.users} users")
+    print(f"mix: {', '.join(f'{name}={weight:g}' for name, weight in mix.items())}")
+    if fakes:
+        print(f"gemini latency {args.gemini_latency}, piston latency {args.piston_latency}, "
+              f"upstream error rate {args.error_rate:.0%}")
+
+    recorder, elapsed = run(base_url, users, mix, resumes, args.requests, args.concurrency, args.duration, args.seed)
+    print()
+    recorder.print_table(elapsed)
+    for name, fake in fakes:
+        print(f"fake {name}: {fake.requests} calls, {fake.errors} injected failures")
+    for name, fake in fakes:
+        fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Regression corpus for extract_resume_data: compares the section-based parser
+with a frozen copy of the original regex version on resumes in several
+layouts, and times both on inputs that made the original backtrack.
+
+    python -m bench.parity --count 200
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from bench.corpus import resume_text
+from resume_parser import SECTION_TITLES, extract_resume_data, extract_skills
+
+
+def legacy_extract_resume_data(text):
+    # The original implementation (PARSER_VERSION 2), kept verbatim as the reference
+    skills = extract_skills(text)
+    education = []
+    edu_matches = re.findall(r'(\d{4})\s+([A-Za-z0-9 &.-]+(?:University|School|College))', text)
+    for year, institute in edu_matches:
+        education.append(f"{year} {institute.strip()}")
+    experience = []
+    exp_matches = re.findall(r'([A-Za-z0-9 &.-]+)\s*\|?\s*(\d{1,2}\s+\w+,\s+\d{4}\s*-\s*\d{1,2}\s+\w+,\s*\d{4})', text)
+    for company, duration in exp_matches:
+        experience.append(f"{company.strip()} ({duration.strip()})")
+    projects = []
+    proj_matches = re.findall(r'(?:PROJECTS|Project Name|Key Projects)[:|-]?\s*(.*?)\s*(?:Key Skills|$)',
+                              text, flags=re.IGNORECASE | re.DOTALL)
+    for match in proj_matches:
+        for p in re.split(r'\n|\|', match):
+            p_clean = p.strip()
+            if p_clean:
+                projects.append(p_clean)
+    return {
+        "skills": skills,
+        "education": education,
+        "experience": experience,
+        "projects": projects,
+        "raw_text": text
+    }
+
+
+# -------------------- Layouts --------------------
+# Each takes the corpus lines of one resume and returns text in another layout
+def as_generated(lines, rng):
+    return "\n".join(lines)
+
+
+def split_year_and_school(lines, rng):
+    # PDF extraction often puts the year and the institution on separate lines
+    return "\n".join(re.sub(r"^(\d{4}) ", r"\1\n", line) for line in lines)
+
+
+def split_company_and_dates(lines, rng):
+    return "\n".join(line.replace(" | ", "\n", 1) if re.search(r"\d{4} - ", line) else line for line in lines)
+
+
+def no_headings(lines, rng):
+    return "\n".join(line for line in lines if line.strip().lower() not in SECTION_TITLES and
+                     not line.startswith("Key Skills"))
+
+
+def title_case_headings(lines, rng):
+    names = {"EDUCATION": "Education:", "EXPERIENCE": "Work Experience", "PROJECTS": "Key Projects"}
+    return "\n".join(names.get(line, line) for line in lines)
+
+
+def inline_projects(lines, rng):
+    start = lines.index("PROJECTS")
+    items = [line for line in lines[start + 1:] if not line.startswith("Key Skills")]
+    return "\n".join(lines[:start] + ["PROJECTS: " + " | ".join(items)] + lines[start + len(items) + 1:])
+
+
+def projects_last(lines, rng):
+    return "\n".join(line for line in lines if not line.startswith("Key Skills"))
+
+
+def crlf(lines, rng):
+    return "\r\n".join(lines)
+
+
+LAYOUTS = [as_generated, split_year_and_school, split_company_and_dates, no_headings,
+           title_case_headings, inline_projects, projects_last, crlf]
+
+
+def corpus(count, seed):
+    rng = random.Random(seed)
+    for i in range(count):
+        lines = resume_text(rng, filler_lines=rng.randint(1, 20))
+        layout = LAYOUTS[i % len(LAYOUTS)]
+        yield layout.__name__, layout(lines, rng)
+
+
+# -------------------- Pathological inputs --------------------
+def backtracking_inputs(size):
+    # Long runs of name characters with digits and no separators, as garbled PDF extraction produces
+    yield "name run", ("Acme Corp 12 " * (size // 13))[:size]
+    yield "year run", ("2019 Lorem ipsum " * (size // 17))[:size]
+
+
+def timed(fn, text):
+    started = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200, help="resumes in the regression corpus")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--sizes", default="500,1000,2000", help="pathological input sizes (chars)")
+    args = parser.parse_args()
+
+    mismatches = {}
+    per_layout = {}
+    for layout, text in corpus(args.count, args.seed):
+        per_layout[layout] = per_layout.get(layout, 0) + 1
+        legacy, new = legacy_extract_resume_data(text), extract_resume_data(text)
+        for field in ("skills", "education", "experience", "projects"):
+            if legacy[field] != new[field]:
+                mismatches.setdefault(layout, []).append((field, legacy[field], new[field]))
+
+    print(f"regression corpus: {args.count} resumes in {len(per_layout)} layouts")
+    for layout, count in per_layout.items():
+        diffs = mismatches.get(layout, [])
+        print(f"  {layout:<24} {count:>4} resumes  {'OK' if not diffs else f'{len(diffs)} field mismatches'}")
+        for field, legacy, new in diffs[:3]:
+            print(f"      {field}: legacy {legacy}\n      {' ' * len(field)}  new    {new}")
+
+    print("\npathological inputs (legacy vs section parser):")
+    for size in (int(s) for s in args.sizes.split(",")):
+        for name, text in backtracking_inputs(size):
+            print(f"  {name:<10} {size:>7} chars: legacy {timed(legacy_extract_resume_data, text) * 1000:9.1f} ms   "
+                  f"new {timed(extract_resume_data, text) * 1000:7.2f} ms")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Micro-benchmarks for the resume parsing path on a synthetic corpus.
+
+    python -m bench.parsing --count 50 --repeat 5 --filler 20
+"""
+import argparse
+import io
+import time
+
+from bench.corpus import sample_resumes
+from bench.report import percentile
+from resume_parser import extract_resume_data, extract_skills, pdf_to_text
+
+
+def measure(fn, inputs, repeat):
+    timings = []
+    for _ in range(repeat):
+        for value in inputs:
+            started = time.perf_counter()
+            fn(value)
+            timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=50, help="resumes in the corpus")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filler", type=int, default=10, help="max filler lines per job, controls resume length")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = sample_resumes(args.count, args.seed, args.filler)
+    texts = [text for text, _ in corpus]
+    pdfs = [pdf for _, pdf in corpus]
+    text_kb = sum(len(t) for t in texts) / 1024
+    pdf_kb = sum(len(p) for p in pdfs) / 1024
+    print(f"corpus: {len(corpus)} resumes, {text_kb:.0f} KB text, {pdf_kb:.0f} KB PDF, repeat={args.repeat}")
+
+    cases = (
+        ("pdf_to_text", lambda pdf: pdf_to_text(io.BytesIO(pdf)), pdfs, pdf_kb),
+        ("extract_skills", extract_skills, texts, text_kb),
+        ("extract_resume_data", extract_resume_data, texts, text_kb),
+    )
+    for name, fn, inputs, kb in cases:
+        timings = measure(fn, inputs, args.repeat)
+        total = sum(timings)
+        print(f"{name:>20}: mean {total / len(timings) * 1000:8.3f} ms  "
+              f"p50 {percentile(timings, 50) * 1000:8.3f} ms  p95 {percentile(timings, 95) * 1000:8.3f} ms  "
+              f"p99 {percentile(timings, 99) * 1000:8.3f} ms  {kb * args.repeat / total:9.0f} KB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Login storm against the password hasher: bcrypt checks from many request
+threads, inline as the routes used to do and through PasswordHasher pools of
+increasing size, reporting logins per second per core, how long a cheap
+route waits meanwhile, how many logins are turned away with 503 and the
+cost of the rehash-on-login path.
+
+    python -m bench.passwords --logins 64 --threads 32 --rounds 10
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import bcrypt
+
+from bench.report import percentile
+from passwords import HasherBusy, PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def probe(stop, timings, interval=0.01):
+    # Stands in for every other route: a little pure-Python work, timed end to end
+    payload = {"questions": [f"Question {i}" for i in range(50)]}
+    while not stop.is_set():
+        started = time.perf_counter()
+        json.loads(json.dumps(payload))
+        timings.append(time.perf_counter() - started)
+        time.sleep(interval)
+
+
+def storm(login, logins, threads):
+    """Runs `logins` calls of login() from `threads` threads; returns (seconds, rejected, probe timings)."""
+    remaining = iter(range(logins))
+    lock = threading.Lock()
+    rejected = [0]
+    stop, timings = threading.Event(), []
+
+    def worker():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            try:
+                login()
+            except HasherBusy:
+                with lock:
+                    rejected[0] += 1
+
+    prober = threading.Thread(target=probe, args=(stop, timings))
+    prober.start()
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+    return elapsed, rejected[0], sorted(timings)
+
+
+def report(label, cores, logins, elapsed, rejected, timings):
+    served = logins - rejected
+    print(f"{label:<18} {served / elapsed:8.1f} logins/s {served / elapsed / cores:8.1f} per core   "
+          f"rejected {rejected:>4}   other route p50 {percentile(timings, 50) * 1000:6.2f} ms "
+          f"p95 {percentile(timings, 95) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=32, help="concurrent request threads")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor")
+    parser.add_argument("--workers", default="", help="pool sizes to try (default: 1 up to the core count)")
+    parser.add_argument("--max-pending", type=int, default=0, help="hasher backlog (default: enough for every login)")
+    parser.add_argument("--pool", default="thread", choices=("thread", "process"))
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    sizes = [int(w) for w in args.workers.split(",")] if args.workers else sorted({1, max(1, cores // 2), cores})
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(args.rounds))
+    print(f"{args.logins} logins from {args.threads} threads, cost {args.rounds}, {cores} cores")
+
+    def inline():
+        bcrypt.checkpw(PASSWORD.encode("utf-8"), hashed)
+
+    report("inline", cores, args.logins, *storm(inline, args.logins, args.threads))
+
+    for workers in sizes:
+        hasher = PasswordHasher(rounds=args.rounds, workers=workers, pool=args.pool,
+                                max_pending=args.max_pending or args.logins)
+        hasher.check(PASSWORD, hashed)  # start the pool outside the timing
+        report(f"{args.pool} pool x{workers}", min(workers, cores), args.logins,
+               *storm(lambda: hasher.check(PASSWORD, hashed), args.logins, args.threads))
+
+    # Backpressure: a backlog of one per worker turns the rest of the burst away at once
+    hasher = PasswordHasher(rounds=args.rounds, workers=cores, pool=args.pool, max_pending=cores)
+    hasher.check(PASSWORD, hashed)
+    report(f"backlog {cores}", cores, args.logins,
+           *storm(lambda: hasher.check(PASSWORD, hashed), args.logins, args.threads))
+
+    # Rehash on login: an old hash at a lower cost is replaced on the first login only
+    hasher = PasswordHasher(rounds=args.rounds, workers=1, pool=args.pool, max_pending=2)
+    hasher.check(PASSWORD, hashed)
+    old = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(max(4, args.rounds - 2)))
+    stored = old
+    for label in ("old cost", "new cost"):
+        started = time.perf_counter()
+        matches, new_hash = hasher.verify(PASSWORD, stored)
+        print(f"login, {label}:   {(time.perf_counter() - started) * 1000:7.1f} ms   matched {matches}   "
+              f"rehashed {new_hash is not None}")
+        stored = new_hash or stored
+    print(f"stats: {hasher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
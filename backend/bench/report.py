@@ -0,0 +1,49 @@
+"""Latency bookkeeping shared by the benchmarks."""
+import threading
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Recorder:
+    """Thread-safe per-endpoint latencies and error counts."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            self.errors[name] = self.errors.get(name, 0) + (not ok)
+
+    def rows(self, elapsed):
+        with self._lock:
+            for name in sorted(self.latencies):
+                timings = sorted(self.latencies[name])
+                yield {
+                    "endpoint": name,
+                    "requests": len(timings),
+                    "rps": len(timings) / elapsed if elapsed else 0.0,
+                    "error_rate": self.errors[name] / len(timings),
+                    "p50": percentile(timings, 50),
+                    "p95": percentile(timings, 95),
+                    "p99": percentile(timings, 99),
+                }
+
+    def print_table(self, elapsed):
+        print(f"{'endpoint':<22}{'requests':>9}{'req/s':>9}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        total = errors = 0
+        for row in self.rows(elapsed):
+            total += row["requests"]
+            errors += round(row["error_rate"] * row["requests"])
+            print(f"{row['endpoint']:<22}{row['requests']:>9}{row['rps']:>9.1f}{row['error_rate']:>9.1%}"
+                  f"{row['p50'] * 1000:>10.0f}{row['p95'] * 1000:>10.0f}{row['p99'] * 1000:>10.0f}")
+        if total:
+            print(f"{'all':<22}{total:>9}{total / elapsed:>9.1f}{errors / total:>9.1%}")
@@ -0,0 +1,75 @@
+"""
+Compare the token-trie skill matcher with the original nested-loop extract_skills.
+
+    python -m bench.skills --taxonomy 5000 --repeat 200
+"""
+import argparse
+import random
+import re
+import time
+
+from skill_matcher import DEFAULT_SKILLS, SkillMatcher
+
+SAMPLE_RESUME = """
+Jane Doe | Software Engineer
+Skills: Python, JavaScript, React.js, Node.js, Express.js, MongoDB, Docker, K8s, AWS, Git, GitHub
+Experienced with machine learning, data science and NLP using TensorFlow and PyTorch.
+Built REST APIs in Flask and Django backed by PostgreSQL and MySQL. Wrote C++ and C# services.
+PROJECTS: Realtime analytics dashboard (Next.js, TypeScript) | Chat assistant with data analytics
+"""
+
+
+def legacy_extract_skills(text, skills):
+    # The original implementation: every token against every skill, then substring scans
+    text_lower = text.lower()
+    found_skills = set()
+    for word in re.findall(r'\b[\w+#.]+\b', text_lower):
+        norm = word.strip().lower()
+        for skill in skills:
+            if norm == skill.lower():
+                found_skills.add(skill)
+    multi_word_skills = ["machine learning", "data science", "data analytics", "node.js", "react.js", "c++"]
+    for skill in multi_word_skills:
+        if skill.lower() in text_lower:
+            found_skills.add(skill)
+    return sorted(found_skills)
+
+
+def synthetic_taxonomy(size):
+    skills = dict(DEFAULT_SKILLS)
+    rng = random.Random(7)
+    while len(skills) < size:
+        name = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10)))
+        skills[name if rng.random() < 0.8 else f"{name} framework"] = [f"{name}js"]
+    return skills
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--taxonomy", type=int, default=5000, help="number of skills in the large dictionary")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=10, help="resume copies concatenated per document")
+    args = parser.parse_args()
+
+    text = SAMPLE_RESUME * args.scale
+    for label, skills in (("default", DEFAULT_SKILLS), (f"{args.taxonomy} skills", synthetic_taxonomy(args.taxonomy))):
+        matcher = SkillMatcher(skills)
+        legacy_ms = timed(lambda: legacy_extract_skills(text, skills), max(1, args.repeat // 20))
+        trie_ms = timed(lambda: matcher.find(text), args.repeat)
+        print(f"{label:>14}: legacy {legacy_ms:8.3f} ms   trie {trie_ms:7.3f} ms   ({legacy_ms / trie_ms:.0f}x)")
+
+    legacy = set(legacy_extract_skills(SAMPLE_RESUME, DEFAULT_SKILLS))
+    new = set(SkillMatcher(DEFAULT_SKILLS).find(SAMPLE_RESUME))
+    print("only legacy:", sorted(legacy - new) or "-")
+    print("only trie:  ", sorted(new - legacy) or "-")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Exercise the outbound HTTP client against a flaky fake Gemini: retries,
+Retry-After, the circuit breaker and the token bucket.
+
+    python -m bench.upstream --calls 200 --error-rate 0.2 --rate 50
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fakes import FakeGemini
+from http_client import UpstreamClient, UpstreamError
+
+
+def run(client, url, calls, concurrency):
+    def one(_):
+        try:
+            res = client.post(url, json={"contents": []}, timeout=5)
+            return "ok" if res.ok else f"http {res.status_code}"
+        except UpstreamError as e:
+            return type(e).__name__
+        except Exception as e:
+            return type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(calls)))
+    return {outcome: outcomes.count(outcome) for outcome in sorted(set(outcomes))}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=0.0, help="client-side requests/second, 0 = unlimited")
+    args = parser.parse_args()
+
+    # Flaky upstream: retries should hide most failures
+    fake = FakeGemini(error_rate=args.error_rate, seed=1).start()
+    url = fake.base_url + ":generateContent"
+    client = UpstreamClient("bench-flaky", backoff=0.01, max_delay=0.05, rate=args.rate, burst=10)
+    started = time.perf_counter()
+    outcomes = run(client, url, args.calls, args.concurrency)
+    print(f"flaky upstream ({args.error_rate:.0%} errors): {outcomes} in {time.perf_counter() - started:.2f}s")
+    print(f"  upstream saw {fake.requests} requests; client {client.stats()}")
+
+    # Outage: the breaker should open and fail the rest fast instead of retrying each call
+    fake.error_rate, fake.retry_after = 1.0, 0
+    fake.requests = 0
+    client = UpstreamClient("bench-outage", backoff=0.01, max_delay=0.05, breaker_failures=5, breaker_reset=60)
+    started = time.perf_counter()
+    outcomes = run(client, url, args.calls, args.concurrency)
+    print(f"upstream down: {outcomes} in {time.perf_counter() - started:.2f}s")
+    print(f"  upstream saw {fake.requests} requests; client {client.stats()}")
+    fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+import json
+import os
+import shutil
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+from bson import ObjectId
+
+from logs import get_logger
+from skill_matcher import skill_registry, tokenize
+
+# -------------------- Candidate Search Settings --------------------
+CANDIDATE_INDEX_DIR = os.getenv(
+    "CANDIDATE_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "candidate_index")
+)
+CANDIDATE_REFRESH_INTERVAL = int(os.getenv("CANDIDATE_REFRESH_INTERVAL", "30"))  # seconds between polls for new resumes
+CANDIDATE_POLL_LOOKBACK = int(os.getenv("CANDIDATE_POLL_LOOKBACK", "60"))  # seconds re-read per poll, for clock skew
+CANDIDATE_MERGE_THRESHOLD = int(os.getenv("CANDIDATE_MERGE_THRESHOLD", "5000"))  # unmerged resumes before a merge
+CANDIDATE_SKILL_WEIGHT = int(os.getenv("CANDIDATE_SKILL_WEIGHT", "3"))  # term frequency of each listed skill
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNAPSHOT_VERSION = 1
+# Only what gets indexed is read back from Mongo
+RESUME_FIELDS = {"user_id": 1, "resume.skills": 1, "resume.projects": 1, "resume.experience": 1}
+
+log = get_logger("candidate_search")
+
+
+def candidate_key(doc):
+    # Saved resumes are one candidate per user, the latest resume winning; bulk uploads are one per file
+    return str(doc["user_id"]) if doc.get("user_id") else str(doc["_id"])
+
+
+def _items(value):
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value or []]
+
+
+def resume_terms(resume):
+    """Term -> frequency: the words of a resume's skills, projects and experience, plus skill:<name> per skill."""
+    if isinstance(resume, str):
+        try:
+            resume = json.loads(resume)
+        except ValueError:
+            return Counter(tokenize(resume))
+    if not isinstance(resume, dict):
+        return Counter()
+    terms = Counter(tokenize(" ".join(
+        item for field in ("skills", "projects", "experience") for item in _items(resume.get(field))
+    )))
+    for skill in _items(resume.get("skills")):
+        terms["skill:" + skill.strip().lower()] = CANDIDATE_SKILL_WEIGHT
+    return terms
+
+
+def query_terms(text):
+    return set(tokenize(text)) | {"skill:" + skill for skill in skill_registry.matcher().find(text)}
+
+
+def bm25(tf, doc_len, idf, avgdl):
+    return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avgdl))
+
+
+class Segment:
+    """
+    Term-major postings of merged resumes: the rows containing term t are
+    indices[indptr[t]:indptr[t + 1]], with their frequencies in tfs. Never
+    modified once built, so a snapshot is served straight from a memory map.
+    """
+
+    ARRAYS = ("indptr", "indices", "tfs", "doc_len")
+
+    def __init__(self, keys, resume_ids, indptr, indices, tfs, doc_len):
+        self.keys = keys
+        self.resume_ids = resume_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.tfs = tfs
+        self.doc_len = doc_len
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], np.zeros(1, np.int64), np.zeros(0, np.int32), np.zeros(0, np.float32),
+                   np.zeros(0, np.float32))
+
+    @property
+    def size(self):
+        return len(self.keys)
+
+    @property
+    def term_count(self):
+        return len(self.indptr) - 1
+
+    def postings(self, term_id):
+        if term_id >= self.term_count:
+            return self.indices[:0], self.tfs[:0]
+        lo, hi = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.indices[lo:hi], self.tfs[lo:hi]
+
+    def save(self, path, terms, meta):
+        os.makedirs(path)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "terms": terms, "keys": self.keys,
+                       "resume_ids": self.resume_ids, **meta}, f)
+
+    @classmethod
+    def load(cls, path):
+        """(segment, terms, meta) with the arrays memory-mapped read-only."""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"snapshot version {meta.get('version')}, expected {SNAPSHOT_VERSION}")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in cls.ARRAYS}
+        return cls(meta.pop("keys"), meta.pop("resume_ids"), **arrays), meta.pop("terms"), meta
+
+
+class CandidateIndex:
+    """
+    BM25 ranking of stored resumes against a role description. Merged resumes
+    live in a term-major Segment; newer ones are appended to a small row-major
+    delta that is scored alongside it and folded in once it reaches
+    CANDIDATE_MERGE_THRESHOLD rows. Every merge is written out as a snapshot
+    and re-opened memory-mapped, so a restart (or another worker) loads it
+    instead of re-reading every resume.
+
+    Each candidate has one live row: a newer resume for the same user retires
+    the previous one until the next merge drops it. A background thread polls
+    the resumes collection for resumes saved by other workers.
+    """
+
+    def __init__(self, collection, path=CANDIDATE_INDEX_DIR, merge_threshold=CANDIDATE_MERGE_THRESHOLD,
+                 interval=CANDIDATE_REFRESH_INTERVAL):
+        self.collection = collection
+        self.path = path
+        self.merge_threshold = merge_threshold
+        self.interval = interval
+        self.polled_until = None  # highest resume _id seen by refresh()
+        self.ready = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._terms = []
+        self._vocab = {}
+        self._current = {}  # key -> (resume_id, in_base, row)
+        self._reset(Segment.empty())
+
+    def _reset(self, segment):
+        self._base = segment
+        self._base_live = np.ones(segment.size, bool)
+        self._delta_keys, self._delta_ids = [], []
+        self._delta_offsets = array("q", [0])
+        self._delta_terms = array("i")
+        self._delta_tfs = array("f")
+        self._delta_len = array("f")
+        self._delta_live = bytearray()
+        self._live_count = segment.size
+        self._live_len = float(np.sum(segment.doc_len, dtype=np.float64))
+
+    def _term_id(self, term):
+        term_id = self._vocab.get(term)
+        if term_id is None:
+            term_id = self._vocab[term] = len(self._terms)
+            self._terms.append(term)
+        return term_id
+
+    # -------------------- Updates --------------------
+    def add(self, doc):
+        """Index a stored resume document. Returns False if it (or a newer resume of its candidate) is indexed."""
+        key, resume_id = candidate_key(doc), str(doc["_id"])
+        terms = resume_terms(doc.get("resume"))
+        length = sum(terms.values())
+        with self._lock:
+            current = self._current.get(key)
+            if current is not None:
+                # ObjectId hex strings sort in creation order
+                if current[0] >= resume_id:
+                    return False
+                self._retire(*current[1:])
+            self._delta_terms.extend(self._term_id(term) for term in terms)
+            self._delta_tfs.extend(terms.values())
+            self._delta_offsets.append(len(self._delta_terms))
+            self._delta_len.append(length)
+            self._delta_keys.append(key)
+            self._delta_ids.append(resume_id)
+            self._delta_live.append(1)
+            self._current[key] = (resume_id, False, len(self._delta_keys) - 1)
+            self._live_count += 1
+            self._live_len += length
+            if len(self._delta_keys) >= self.merge_threshold:
+                self._wake.set()
+        return True
+
+    def remove(self, key, resume_id):
+        """Unindex a deleted resume. Returns True if it was its candidate's indexed resume."""
+        with self._lock:
+            current = self._current.get(key)
+            if current is None or current[0] != resume_id:
+                return False
+            self._retire(*current[1:])
+            del self._current[key]
+        return True
+
+    def _retire(self, in_base, row):
+        if in_base:
+            self._base_live[row] = False
+            self._live_len -= float(self._base.doc_len[row])
+        else:
+            self._delta_live[row] = 0
+            self._live_len -= self._delta_len[row]
+        self._live_count -= 1
+
+    def refresh(self):
+        """Index resumes saved since the last poll, including other workers' saves."""
+        query = {}
+        if self.polled_until:
+            since = ObjectId(self.polled_until).generation_time - timedelta(seconds=CANDIDATE_POLL_LOOKBACK)
+            query = {"_id": {"$gt": ObjectId.from_datetime(since)}}
+        added = 0
+        for doc in self.collection.find(query, RESUME_FIELDS).sort("_id", 1).batch_size(1000):
+            added += self.add(doc)
+            self.polled_until = max(self.polled_until or "", str(doc["_id"]))
+        return added
+
+    def merge(self):
+        """Fold the delta into a new Segment, dropping retired rows, and snapshot it."""
+        with self._lock:
+            base, base_live = self._base, self._base_live.copy()
+            merged = len(self._delta_keys)
+            offsets = np.frombuffer(self._delta_offsets, np.int64)[:merged + 1].copy()
+            delta_terms = np.frombuffer(self._delta_terms, np.int32)[:offsets[-1]].copy()
+            delta_tfs = np.frombuffer(self._delta_tfs, np.float32)[:offsets[-1]].copy()
+            delta_len = np.frombuffer(self._delta_len, np.float32)[:merged].copy()
+            delta_live = np.frombuffer(self._delta_live, np.uint8)[:merged].astype(bool)
+            delta_keys, delta_ids = self._delta_keys[:merged], self._delta_ids[:merged]
+            terms = list(self._terms)
+            polled_until = self.polled_until
+
+        # Both parts as (term, new row, tf) triples of their live rows, then sorted term-major
+        base_rows = np.cumsum(base_live) - 1
+        base_terms = np.repeat(np.arange(base.term_count, dtype=np.int32), np.diff(base.indptr))
+        keep = base_live[base.indices]
+        delta_rows = np.repeat(np.arange(merged), np.diff(offsets))
+        keep_delta = delta_live[delta_rows]
+        new_delta_rows = int(base_live.sum()) + np.cumsum(delta_live) - 1
+        all_terms = np.concatenate([base_terms[keep], delta_terms[keep_delta]])
+        all_rows = np.concatenate([base_rows[base.indices[keep]], new_delta_rows[delta_rows[keep_delta]]])
+        all_tfs = np.concatenate([base.tfs[keep], delta_tfs[keep_delta]])
+        order = np.lexsort((all_rows, all_terms))
+        indptr = np.zeros(len(terms) + 1, np.int64)
+        np.cumsum(np.bincount(all_terms, minlength=len(terms)), out=indptr[1:])
+        segment = Segment(
+            [k for k, live in zip(base.keys, base_live) if live] + [k for k, live in zip(delta_keys, delta_live) if live],
+            [r for r, live in zip(base.resume_ids, base_live) if live] +
+            [r for r, live in zip(delta_ids, delta_live) if live],
+            indptr, all_rows[order].astype(np.int32), all_tfs[order].astype(np.float32),
+            np.concatenate([np.asarray(base.doc_len)[base_live], delta_len[delta_live]]),
+        )
+        self._swap(segment, merged)
+        if segment.size:
+            try:
+                segment = self.save_snapshot(segment, terms, polled_until)
+                with self._lock:
+                    self._base = segment  # same rows, now served from the memory map
+            except OSError as e:
+                log.error("failed to write candidate index snapshot", path=self.path, error=str(e))
+
+    def _swap(self, segment, merged):
+        with self._lock:
+            pending = (self._delta_keys[merged:], self._delta_ids[merged:],
+                       np.frombuffer(self._delta_offsets, np.int64)[merged:] - self._delta_offsets[merged],
+                       self._delta_terms[self._delta_offsets[merged]:], self._delta_tfs[self._delta_offsets[merged]:],
+                       self._delta_len[merged:], self._delta_live[merged:])
+            self._reset(segment)
+            # Rows retired while the merge ran are still in the segment; the next merge drops them
+            for row, (key, resume_id) in enumerate(zip(segment.keys, segment.resume_ids)):
+                if self._current.get(key, (None,))[0] == resume_id:
+                    self._current[key] = (resume_id, True, row)
+                else:
+                    self._base_live[row] = False
+                    self._live_count -= 1
+                    self._live_len -= float(segment.doc_len[row])
+            keys, ids, offsets, terms, tfs, lengths, live = pending
+            self._delta_keys, self._delta_ids = keys, ids
+            self._delta_offsets = array("q", offsets.tolist())
+            self._delta_terms, self._delta_tfs, self._delta_len, self._delta_live = terms, tfs, lengths, live
+            for row, (key, resume_id) in enumerate(zip(keys, ids)):
+                if live[row]:
+                    self._current[key] = (resume_id, False, row)
+                    self._live_count += 1
+                    self._live_len += lengths[row]
+
+    # -------------------- Snapshots --------------------
+    def save_snapshot(self, segment, terms, polled_until):
+        """Write a snapshot directory and point CURRENT at it; returns the segment re-opened from disk."""
+        name = f"snapshot-{time.time_ns()}-{os.getpid()}"
+        segment.save(os.path.join(self.path, name), terms, {"polled_until": polled_until})
+        pointer = os.path.join(self.path, f"CURRENT.{os.getpid()}")
+        with open(pointer, "w") as f:
+            f.write(name)
+        os.replace(pointer, os.path.join(self.path, "CURRENT"))
+        # Older snapshots can go: readers that still map them keep their pages until they let go
+        for entry in os.listdir(self.path):
+            if entry.startswith("snapshot-") and entry < name:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+        return Segment.load(os.path.join(self.path, name))[0]
+
+    def load_snapshot(self):
+        """Start from the latest snapshot, if there is one. Returns whether one was loaded."""
+        try:
+            with open(os.path.join(self.path, "CURRENT")) as f:
+                name = f.read().strip()
+            segment, terms, meta = Segment.load(os.path.join(self.path, name))
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            log.error("failed to load candidate index snapshot, rebuilding from Mongo", path=self.path, error=str(e))
+            return False
+        with self._lock:
+            self._terms = terms
+            self._vocab = {term: i for i, term in enumerate(terms)}
+            self._current = {key: (resume_id, True, row)
+                             for row, (key, resume_id) in enumerate(zip(segment.keys, segment.resume_ids))}
+            self._reset(segment)
+            self.polled_until = meta.get("polled_until")
+        return True
+
+    # -------------------- Search --------------------
+    def search(self, text, k=20):
+        """[(resume_id, candidate key, score)] for the k best-matching candidates, best first."""
+        with self._lock:
+            term_ids = sorted({self._vocab[term] for term in query_terms(text) if term in self._vocab})
+            base, base_live = self._base, self._base_live
+            offsets = np.frombuffer(self._delta_offsets, np.int64).copy()
+            delta_terms = np.frombuffer(self._delta_terms, np.int32).copy()
+            delta_tfs = np.frombuffer(self._delta_tfs, np.float32).copy()
+            delta_len = np.frombuffer(self._delta_len, np.float32).copy()
+            delta_live = np.frombuffer(self._delta_live, np.uint8).astype(bool)
+            delta_keys, delta_ids = list(self._delta_keys), list(self._delta_ids)
+            live_rows = self._live_count
+            avgdl = self._live_len / max(live_rows, 1) or 1.0
+        if not term_ids:
+            return []
+
+        # Delta hits for every query term at once
+        hit = np.flatnonzero(np.isin(delta_terms, term_ids))
+        hit_rows = np.searchsorted(offsets, hit, side="right") - 1
+        hit_terms = delta_terms[hit]
+
+        base_scores = np.zeros(base.size, np.float32)
+        delta_scores = np.zeros(len(delta_keys), np.float32)
+        for term_id in term_ids:
+            docs, tfs = base.postings(term_id)
+            in_delta = hit_terms == term_id
+            delta_rows = hit_rows[in_delta]
+            # Document frequency over live rows only, so retired resumes do not skew idf before a merge
+            df = int(np.count_nonzero(base_live[docs])) + int(np.count_nonzero(delta_live[delta_rows]))
+            idf = np.log1p((live_rows - df + 0.5) / (df + 0.5))
+            if len(docs):
+                base_scores[docs] += bm25(tfs, base.doc_len[docs], idf, avgdl)
+            if len(delta_rows):
+                delta_scores[delta_rows] += bm25(delta_tfs[hit[in_delta]], delta_len[delta_rows], idf, avgdl)
+
+        scores = np.concatenate([base_scores * base_live, delta_scores * delta_live])
+        best = np.flatnonzero(scores > 0)
+        if len(best) > k:
+            best = best[np.argpartition(-scores[best], k - 1)[:k]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            (base.resume_ids[row], base.keys[row], float(scores[row])) if row < base.size else
+            (delta_ids[row - base.size], delta_keys[row - base.size], float(scores[row]))
+            for row in best.tolist()
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "candidates": self._live_count,
+                "merged_rows": self._base.size,
+                "unmerged_rows": len(self._delta_keys),
+                "terms": len(self._terms),
+            }
+
+    # -------------------- Background Refresh --------------------
+    def _run(self):
+        self.load_snapshot()
+        while True:
+            try:
+                self.refresh()
+                pending = len(self._delta_keys)
+                if pending >= self.merge_threshold or (pending and not self._base.size):
+                    self.merge()
+            except Exception as e:
+                log.error("candidate index refresh failed", error=str(e))
+            self.ready = True
+            self._wake.wait(timeout=self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="candidate-index", daemon=True)
+            self._thread.start()
+        return self
@@ -0,0 +1,182 @@
+import os
+import threading
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError
+
+from cache import TTLCache
+
+# -------------------- Chat Context Settings --------------------
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "2000"))  # whole prompt, message included
+CHAT_WINDOW_TURNS = int(os.getenv("CHAT_WINDOW_TURNS", "12"))  # most recent turns carried verbatim
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+CHAT_SUMMARY_MIN_TURNS = int(os.getenv("CHAT_SUMMARY_MIN_TURNS", "4"))  # fold older turns in batches of at least this
+CHAT_SUMMARY_MAX_TURNS = int(os.getenv("CHAT_SUMMARY_MAX_TURNS", "40"))  # and at most this per update
+CHAT_SUMMARY_CACHE_TTL = int(os.getenv("CHAT_SUMMARY_CACHE_TTL", "60"))
+CHAT_EXCERPT_TOKENS = 16  # least kept of an unsummarised turn that does not fit verbatim
+
+_TURN_FIELDS = {"user_message": 1, "bot_reply": 1, "timestamp": 1}
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English; close enough for budgeting
+    return len(text or "") // 4 + 1
+
+
+def render_turn(turn):
+    return f"User: {turn.get('user_message', '')}\nAssistant: {turn.get('bot_reply', '')}"
+
+
+def clip(text, tokens):
+    chars = tokens * 4
+    return text if len(text) <= chars else text[:chars - 1].rstrip() + "…"
+
+
+def summary_prompt(summary, turns, max_tokens):
+    transcript = "\n\n".join(render_turn(turn) for turn in turns)
+    return f"""
+You maintain a running summary of a conversation between a user and an interview-preparation assistant.
+
+Current summary:
+{summary or "(none yet)"}
+
+New turns to fold in:
+{transcript}
+
+Task:
+Rewrite the summary so it also covers the new turns. Keep facts about the user (target role,
+skills, experience, goals, weak areas) and any open questions. Stay under {int(max_tokens * 0.75)} words.
+Return only the summary text.
+"""
+
+
+class ChatContext:
+    """
+    Builds chat prompts from a rolling summary of older turns plus as many of
+    the most recent turns as fit in the token budget. Each request reads one
+    summary document (cached) and at most `window + max_turns` turns through
+    the chat_history (user_id, timestamp) index, so its cost does not grow
+    with the conversation. Turns the summary does not cover yet are never
+    dropped: those past the window or the budget are carried as short
+    excerpts until `update_summary`, which is meant to run in the
+    background, folds them into the summary.
+
+    `summarize` is fn(prompt) -> text.
+    """
+
+    def __init__(self, history_col, summaries_col, summarize, budget=CHAT_CONTEXT_TOKENS,
+                 window=CHAT_WINDOW_TURNS, summary_tokens=CHAT_SUMMARY_TOKENS,
+                 min_turns=CHAT_SUMMARY_MIN_TURNS, max_turns=CHAT_SUMMARY_MAX_TURNS):
+        self.history_col = history_col
+        self.summaries_col = summaries_col
+        self.summarize = summarize
+        self.budget = budget
+        self.window = window
+        self.summary_tokens = summary_tokens
+        self.min_turns = min_turns
+        self.max_turns = max_turns
+        self.cache = TTLCache(maxsize=4096, ttl=CHAT_SUMMARY_CACHE_TTL)
+        self._updating = set()
+        self._lock = threading.Lock()
+
+    def _summary(self, user_id):
+        doc = self.cache.get(user_id)
+        if doc is None:
+            doc = self.summaries_col.find_one({"_id": user_id}) or {"_id": user_id, "summary": "", "through": None}
+            self.cache.set(user_id, doc)
+        return doc
+
+    def build(self, user_id, message):
+        """
+        Return (prompt, kept, stale): the prompt to send, how many recent turns
+        it carries verbatim, and whether enough older turns are waiting to be
+        folded into the summary for an update to run.
+        """
+        summary = self._summary(user_id)
+        through = summary.get("through")
+        query = {"user_id": user_id}
+        if through:
+            query["timestamp"] = {"$gt": through}
+        recent = list(
+            self.history_col.find(query, _TURN_FIELDS).sort([("timestamp", -1)]).limit(self.window + self.max_turns)
+        )
+        if not recent and not summary.get("summary"):
+            return message, 0, False
+
+        remaining = self.budget - estimate_tokens(message) - estimate_tokens(summary.get("summary"))
+        kept = []
+        for turn in recent[:self.window]:
+            cost = estimate_tokens(render_turn(turn))
+            if cost > remaining:
+                break
+            kept.append(turn)
+            remaining -= cost
+        older = recent[len(kept):]
+
+        # update_summary(keep=kept) folds exactly the excerpted turns, and refuses fewer than min_turns
+        stale = len(older) >= self.min_turns
+
+        parts = []
+        if summary.get("summary"):
+            parts.append(f"Summary of the earlier conversation:\n{summary['summary']}")
+        if older:
+            share = max(remaining // len(older), CHAT_EXCERPT_TOKENS)
+            parts.append("Earlier conversation, shortened:\n" +
+                         "\n\n".join(clip(render_turn(turn), share) for turn in reversed(older)))
+        if kept:
+            parts.append("Recent conversation:\n" + "\n\n".join(render_turn(turn) for turn in reversed(kept)))
+        parts.append(f"User: {message}\nAssistant:")
+        return "\n\n".join(parts), len(kept), stale
+
+    def claim(self, user_id):
+        """True if no summary update is already running for this user in this process."""
+        with self._lock:
+            if user_id in self._updating:
+                return False
+            self._updating.add(user_id)
+            return True
+
+    def release(self, user_id):
+        with self._lock:
+            self._updating.discard(user_id)
+
+    def update_summary(self, user_id, keep=0):
+        """
+        Fold the oldest unsummarised turns, except the `keep` most recent ones
+        the prompt still carries verbatim, into the stored summary.
+        """
+        try:
+            doc = self.summaries_col.find_one({"_id": user_id}) or {"summary": "", "through": None, "turns": 0}
+            query = {"user_id": user_id}
+            if doc.get("through"):
+                query["timestamp"] = {"$gt": doc["through"]}
+            if keep:
+                newest = list(self.history_col.find({"user_id": user_id}, {"timestamp": 1})
+                              .sort([("timestamp", -1)]).skip(keep - 1).limit(1))
+                if not newest:
+                    return None
+                query.setdefault("timestamp", {})["$lt"] = newest[0]["timestamp"]
+            turns = list(self.history_col.find(query, _TURN_FIELDS).sort([("timestamp", 1)]).limit(self.max_turns))
+            if len(turns) < self.min_turns:
+                return None
+
+            text = self.summarize(summary_prompt(doc.get("summary"), turns, self.summary_tokens)).strip()
+            text = text[:self.summary_tokens * 4]
+            fields = {"summary": text, "through": turns[-1]["timestamp"], "updated_at": datetime.utcnow()}
+            # Only move forward from the summary this update was based on
+            if "_id" in doc:
+                result = self.summaries_col.update_one(
+                    {"_id": user_id, "through": doc.get("through")},
+                    {"$set": fields, "$inc": {"turns": len(turns)}}
+                )
+                if not result.matched_count:
+                    return None
+            else:
+                try:
+                    self.summaries_col.insert_one({"_id": user_id, **fields, "turns": len(turns)})
+                except DuplicateKeyError:
+                    return None
+            self.cache.set(user_id, {"_id": user_id, **fields})
+            return {"summarized": len(turns)}
+        finally:
+            self.release(user_id)
@@ -0,0 +1,94 @@
+import os
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+
+from evaluation import EVAL_CACHE_TTL
+from executor import EXEC_CACHE_TTL
+from jobs import JOB_RESULT_TTL
+from metrics import MongoSpanListener
+
+# -------------------- MongoDB Setup --------------------
+MONGO_URI = os.getenv("MONGO_URI")  # e.g., mongodb://localhost:27017/AI_Interviewer
+MONGO_DEFAULT_DB = "AI_Interviewer"  # when MONGO_URI is unset or names no database
+client = MongoClient(MONGO_URI, event_listeners=[MongoSpanListener()])
+db = client.get_default_database(MONGO_DEFAULT_DB)
+users_col = db["users"]
+tests_col = db["tests"]
+resumes_col = db["resumes"]
+resume_heads_col = db["resume_heads"]
+progress_col = db["progress"]
+chat_col = db["chat_history"]
+chat_summaries_col = db["chat_summaries"]
+exec_cache_col = db["exec_cache"]
+eval_cache_col = db["eval_cache"]
+question_bank_col = db["question_bank"]
+jobs_col = db["jobs"]
+skills_col = db["skills"]
+parsed_resumes_col = db["parsed_resumes"]
+interview_events_col = db["interview_events"]
+
+
+def async_database():
+    """Motor handle on the same database for the async app (motor is only needed there)."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(MONGO_URI, event_listeners=[MongoSpanListener()]).get_default_database(
+        MONGO_DEFAULT_DB
+    )
+
+
+# -------------------- Indexes --------------------
+# Every query the routes run should be served by one of these; `python indexes.py --audit` checks that.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+    "resumes": [
+        IndexModel([("user_id", ASCENDING), ("_id", DESCENDING)], name="user_latest"),
+    ],
+    "tests": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)], name="user_history"),
+        IndexModel(
+            [("user_id", ASCENDING), ("role", ASCENDING), ("test_type", ASCENDING), ("timestamp", DESCENDING)],
+            name="user_role_type_latest"
+        ),
+    ],
+    "chat_history": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_history"),
+    ],
+    "exec_cache": [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=EXEC_CACHE_TTL, name="ttl"),
+    ],
+    "eval_cache": [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=EVAL_CACHE_TTL, name="ttl"),
+    ],
+    "question_bank": [
+        IndexModel(
+            [("kind", ASCENDING), ("level", ASCENDING), ("topic", ASCENDING), ("hash", ASCENDING)],
+            unique=True, name="bucket_item_unique"
+        ),
+        IndexModel(
+            [("kind", ASCENDING), ("level", ASCENDING), ("topic", ASCENDING), ("created_at", ASCENDING)],
+            name="bucket_fresh"
+        ),
+    ],
+    "jobs": [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=JOB_RESULT_TTL, name="ttl"),
+    ],
+    "parsed_resumes": [
+        IndexModel([("hash", ASCENDING), ("parser_version", ASCENDING)], unique=True, name="hash_version_unique"),
+    ],
+    "interview_events": [
+        IndexModel([("session_id", ASCENDING), ("bucket", ASCENDING)], unique=True, name="session_bucket_unique"),
+    ],
+}
+
+
+def ensure_indexes(database=db):
+    """Create any missing declared index. Returns {collection: error} for the ones that failed."""
+    failures = {}
+    for name, models in INDEXES.items():
+        try:
+            database[name].create_indexes(models)
+        except Exception as e:
+            failures[name] = str(e)
+    return failures
@@ -0,0 +1,305 @@
+import asyncio
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from cache import TTLCache, content_hash
+from logs import get_logger
+
+# -------------------- Evaluation Settings --------------------
+EVAL_BATCH_CHARS = int(os.getenv("EVAL_BATCH_CHARS", "6000"))  # Q/A text per LLM call
+EVAL_BATCH_MAX_PAIRS = int(os.getenv("EVAL_BATCH_MAX_PAIRS", "5"))
+EVAL_POOL_SIZE = int(os.getenv("EVAL_POOL_SIZE", "16"))
+EVAL_MAX_PARALLEL = int(os.getenv("EVAL_MAX_PARALLEL", "4"))  # batches in flight per request
+EVAL_TOTAL_TIMEOUT = float(os.getenv("EVAL_TOTAL_TIMEOUT", "90"))
+EVAL_CACHE_SIZE = int(os.getenv("EVAL_CACHE_SIZE", "4096"))
+EVAL_CACHE_TTL = int(os.getenv("EVAL_CACHE_TTL", "604800"))  # 7 days
+EVAL_VERSION = 1  # bump when the prompt or result shape changes so cached evaluations are not reused
+
+_pool = ThreadPoolExecutor(max_workers=EVAL_POOL_SIZE, thread_name_prefix="eval")
+log = get_logger("evaluation")
+_JSON_ARRAY = re.compile(r"\[.*\]", re.S)
+
+
+def batch_prompt(role, pairs):
+    responses = "\n\n".join(
+        f"[{pair['index']}] Q: {pair['question']}\nA: {pair['answer']}" for pair in pairs
+    )
+    return f"""
+You are an expert interviewer evaluating a candidate's interview answers.
+The candidate is interviewing for the role: {role}.
+
+Responses:
+{responses}
+
+Task:
+Score every answer from 0 to 10 and give short, actionable feedback.
+Reply with only a JSON array, one object per answer, in this format:
+[{{"index": <number in brackets>, "score": <0-10>, "strengths": "<text>", "improvements": "<text>"}}]
+"""
+
+
+def summary_prompt(role, evaluations):
+    notes = "\n".join(
+        f"- Q{e['index'] + 1} ({e['score']}/10): strengths: {e['strengths']}; improve: {e['improvements']}"
+        for e in evaluations if e.get("score") is not None
+    )
+    return f"""
+You are an expert interviewer. A candidate for the role {role} was scored per answer:
+{notes}
+
+Task:
+Write a short overall assessment: main strengths, main areas for improvement and
+actionable advice for future interviews. Do not repeat the per-question notes.
+"""
+
+
+def parse_batch(output_text, pairs):
+    """Map the model's JSON reply back onto `pairs`; raises ValueError if any answer is missing."""
+    match = _JSON_ARRAY.search(output_text)
+    if not match:
+        raise ValueError("Evaluation reply had no JSON array")
+    by_index = {}
+    for item in json.loads(match.group(0)):
+        try:
+            by_index[int(item["index"])] = {
+                "score": max(0, min(10, int(round(float(item["score"]))))),
+                "strengths": str(item.get("strengths", "")).strip(),
+                "improvements": str(item.get("improvements", "")).strip(),
+            }
+        except (KeyError, TypeError, ValueError):
+            continue
+    missing = [pair["index"] for pair in pairs if pair["index"] not in by_index]
+    if missing:
+        raise ValueError(f"Evaluation reply skipped answers {missing}")
+    return [by_index[pair["index"]] for pair in pairs]
+
+
+def make_batches(pairs, max_chars=EVAL_BATCH_CHARS, max_pairs=EVAL_BATCH_MAX_PAIRS):
+    batches, current, size = [], [], 0
+    for pair in pairs:
+        cost = len(pair["question"]) + len(pair["answer"])
+        if current and (size + cost > max_chars or len(current) >= max_pairs):
+            batches.append(current)
+            current, size = [], 0
+        current.append(pair)
+        size += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def render_feedback(result):
+    lines = []
+    if result.get("summary"):
+        lines += [result["summary"].strip(), ""]
+    if result["overall_score"] is not None:
+        lines.append(f"Overall score: {result['overall_score']} / 10")
+    for e in result["evaluations"]:
+        if e.get("score") is None:
+            lines.append(f"Q{e['index'] + 1}: not evaluated ({e['error']})")
+        else:
+            lines.append(f"Q{e['index'] + 1}: {e['score']}/10. Strengths: {e['strengths']} "
+                         f"Improvements: {e['improvements']}")
+    return "\n".join(lines)
+
+
+class InterviewEvaluator:
+    """
+    Scores interview answers in size-bounded batches run concurrently, instead
+    of one prompt holding the whole interview. Each (role, question, answer)
+    evaluation is cached by content hash, locally and optionally in a shared
+    Mongo collection, so a resubmission only re-evaluates changed answers.
+    Failed batches leave their answers unscored rather than failing the
+    whole evaluation.
+
+    `generate` is fn(prompt) -> text.
+    """
+
+    def __init__(self, generate, collection=None, maxsize=EVAL_CACHE_SIZE, ttl=EVAL_CACHE_TTL,
+                 max_parallel=EVAL_MAX_PARALLEL, total_timeout=EVAL_TOTAL_TIMEOUT):
+        self.generate = generate
+        self.collection = collection
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.max_parallel = max_parallel
+        self.total_timeout = total_timeout
+        self.shared_hits = 0
+        self.batches_failed = 0
+
+    @staticmethod
+    def key(role, question, answer):
+        return content_hash(f"{EVAL_VERSION}\n{role.strip().lower()}\n{question.strip()}\n{answer.strip()}")
+
+    def _cached(self, key):
+        evaluation = self.local.get(key)
+        if evaluation is None and self.collection is not None:
+            doc = self.collection.find_one({"_id": key}, {"evaluation": 1, "created_at": 1})
+            if doc and doc["created_at"] > datetime.utcnow() - timedelta(seconds=self.ttl):
+                self.shared_hits += 1
+                evaluation = doc["evaluation"]
+                self.local.set(key, evaluation)
+        return evaluation
+
+    def _store(self, key, evaluation):
+        self.local.set(key, evaluation)
+        if self.collection is not None:
+            self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "evaluation": evaluation, "created_at": datetime.utcnow()},
+                upsert=True
+            )
+
+    def _evaluate_batch(self, role, batch):
+        evaluations = parse_batch(self.generate(batch_prompt(role, batch)), batch)
+        for pair, evaluation in zip(batch, evaluations):
+            self._store(pair["key"], evaluation)
+        return evaluations
+
+    def _split(self, role, questions, answers):
+        # (evaluations answered without the LLM, pairs that still need it)
+        pending_pairs, ready = [], []
+        for index, question in enumerate(questions):
+            # A question without an answer is scored as unanswered, not dropped
+            answer = answers[index] if index < len(answers) else ""
+            question, answer = str(question or ""), str(answer or "")
+            base = {"index": index, "question": question}
+            if not answer.strip():
+                ready.append({**base, "score": 0, "strengths": "", "improvements": "No answer was given."})
+                continue
+            key = self.key(role, question, answer)
+            cached = self._cached(key)
+            if cached is not None:
+                ready.append({**base, **cached, "cached": True})
+            else:
+                pending_pairs.append({"index": index, "question": question, "answer": answer, "key": key})
+        return ready, pending_pairs
+
+    @staticmethod
+    def _evaluated(batch, evaluations):
+        return [
+            {"index": pair["index"], "question": pair["question"], **evaluation, "cached": False}
+            for pair, evaluation in zip(batch, evaluations)
+        ]
+
+    @staticmethod
+    def _unevaluated(pairs, error):
+        return [{"index": pair["index"], "question": pair["question"], "score": None, "error": error}
+                for pair in pairs]
+
+    def iter_evaluations(self, role, questions, answers):
+        """Yield lists of per-answer evaluations as they become available, cache hits first."""
+        ready, pending_pairs = self._split(role, questions, answers)
+        if ready:
+            yield ready
+
+        deadline = time.monotonic() + self.total_timeout
+        batches = iter(make_batches(pending_pairs))
+        in_flight = {}
+
+        def submit_next():
+            for batch in batches:
+                in_flight[_pool.submit(self._evaluate_batch, role, batch)] = batch
+                return True
+            return False
+
+        while len(in_flight) < max(1, self.max_parallel) and submit_next():
+            pass
+        while in_flight:
+            time_left = deadline - time.monotonic()
+            if time_left <= 0:
+                break
+            done, _ = wait(in_flight, timeout=time_left, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                try:
+                    yield self._evaluated(batch, future.result())
+                except Exception as e:
+                    self.batches_failed += 1
+                    yield self._unevaluated(batch, f"Evaluation failed: {e}")
+            while len(in_flight) < max(1, self.max_parallel) and submit_next():
+                pass
+
+        unfinished = [pair for batch in in_flight.values() for pair in batch]
+        unfinished += [pair for batch in batches for pair in batch]
+        for future in in_flight:
+            future.cancel()
+        if unfinished:
+            yield self._unevaluated(unfinished, "Timed out")
+
+    @staticmethod
+    def _combine(evaluations):
+        evaluations = sorted(evaluations, key=lambda e: e["index"])
+        scored = [e for e in evaluations if e.get("score") is not None]
+        result = {
+            "evaluations": evaluations,
+            "overall_score": round(sum(e["score"] for e in scored) / len(scored), 1) if scored else None,
+            "evaluated": len(scored),
+            "failed": len(evaluations) - len(scored),
+            "partial": len(scored) < len(evaluations),
+            "summary": "",
+        }
+        return result, scored
+
+    def merge(self, role, evaluations):
+        """Order per-answer evaluations and add the overall score and written summary."""
+        result, scored = self._combine(evaluations)
+        if scored:
+            try:
+                result["summary"] = self.generate(summary_prompt(role, scored)).strip()
+            except Exception as e:
+                log.warning("interview summary failed, returning per-question feedback only", error=str(e))
+        result["feedback"] = render_feedback(result)
+        return result
+
+    def evaluate(self, role, questions, answers):
+        return self.merge(role, [e for chunk in self.iter_evaluations(role, questions, answers) for e in chunk])
+
+    async def evaluate_async(self, role, questions, answers, generate):
+        """
+        evaluate() on the event loop, with `generate` an async fn(prompt) -> text.
+        Batches share the same cache, batch limits and deadline.
+        """
+        async def blocking(fn, *args):
+            # Only the shared Mongo cache does I/O; the local cache is answered inline
+            return await asyncio.to_thread(fn, *args) if self.collection is not None else fn(*args)
+
+        ready, pending_pairs = await blocking(self._split, role, questions, answers)
+        semaphore = asyncio.Semaphore(max(1, self.max_parallel))
+
+        async def run_batch(batch):
+            async with semaphore:
+                try:
+                    evaluations = parse_batch(await generate(batch_prompt(role, batch)), batch)
+                except Exception as e:
+                    self.batches_failed += 1
+                    return self._unevaluated(batch, f"Evaluation failed: {e}")
+            for pair, evaluation in zip(batch, evaluations):
+                await blocking(self._store, pair["key"], evaluation)
+            return self._evaluated(batch, evaluations)
+
+        tasks = {asyncio.ensure_future(run_batch(batch)): batch for batch in make_batches(pending_pairs)}
+        evaluations = list(ready)
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=self.total_timeout)
+            for task in done:
+                evaluations += task.result()
+            for task in pending:
+                task.cancel()
+                evaluations += self._unevaluated(tasks[task], "Timed out")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        result, scored = self._combine(evaluations)
+        if scored:
+            try:
+                result["summary"] = (await generate(summary_prompt(role, scored))).strip()
+            except Exception as e:
+                log.warning("interview summary failed, returning per-question feedback only", error=str(e))
+        result["feedback"] = render_feedback(result)
+        return result
+
+    def stats(self):
+        return {**self.local.stats(), "shared_hits": self.shared_hits, "batches_failed": self.batches_failed}
@@ -0,0 +1,285 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from cache import TTLCache, content_hash
+from http_client import AsyncUpstreamClient, UpstreamClient
+
+# -------------------- Execution Settings --------------------
+PISTON_URL = os.getenv("PISTON_URL", "https://emkc.org/api/v2/piston/execute")
+CODE_EXECUTOR = os.getenv("CODE_EXECUTOR", "piston")  # "piston" or "local"
+EXEC_POOL_SIZE = int(os.getenv("EXEC_POOL_SIZE", "32"))        # shared across all requests
+EXEC_MAX_PARALLEL = int(os.getenv("EXEC_MAX_PARALLEL", "8"))   # per submission
+EXEC_CASE_TIMEOUT = float(os.getenv("EXEC_CASE_TIMEOUT", "15"))
+EXEC_TOTAL_TIMEOUT = float(os.getenv("EXEC_TOTAL_TIMEOUT", "60"))
+EXEC_CACHE_SIZE = int(os.getenv("EXEC_CACHE_SIZE", "4096"))
+EXEC_CACHE_TTL = int(os.getenv("EXEC_CACHE_TTL", "3600"))
+
+
+# Piston run statuses for runs that say nothing about the code: timed out, killed by a signal, sandbox error
+PISTON_TRANSIENT_STATUSES = {"TO", "SG", "XX"}
+
+
+class ExecutionError(Exception):
+    pass
+
+
+# -------------------- Executors --------------------
+class PistonExecutor:
+    """Runs code on the Piston sandbox through the shared outbound HTTP client."""
+
+    def __init__(self, url=PISTON_URL, pool_size=EXEC_POOL_SIZE):
+        self.url = url
+        # Executing the same source and stdin again is harmless, so failed runs are retried
+        self.http = UpstreamClient("piston", pool_size=pool_size, read_timeout=EXEC_CASE_TIMEOUT)
+
+    @staticmethod
+    def payload(language, code, stdin):
+        return {"language": language, "source": code, "stdin": stdin}
+
+    @staticmethod
+    def result(res):
+        res.raise_for_status()
+        result = res.json()
+        run = result.get("run") or {}
+        return {
+            "output": result.get("output", ""),
+            "stderr": result.get("stderr", ""),
+            "time": result.get("time", ""),
+            "killed": bool(result.get("signal") or run.get("signal"))
+            or (result.get("status") or run.get("status")) in PISTON_TRANSIENT_STATUSES
+        }
+
+    def run(self, language, code, stdin="", timeout=EXEC_CASE_TIMEOUT):
+        return self.result(self.http.post(self.url, json=self.payload(language, code, stdin), timeout=timeout))
+
+
+class LocalExecutor:
+    """
+    Stand-in executor that runs Python in a local subprocess.
+    Not sandboxed: meant for development and benchmarks only.
+    `latency` adds a fixed delay per run to mimic the sandbox round trip.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def run(self, language, code, stdin="", timeout=EXEC_CASE_TIMEOUT):
+        if language not in ("python", "python3"):
+            raise ExecutionError(f"Local executor does not support '{language}'")
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as src:
+            src.write(code)
+        try:
+            proc = subprocess.run(
+                [sys.executable, src.name],
+                input=stdin,
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise ExecutionError("Timed out")
+        finally:
+            os.unlink(src.name)
+        return {
+            "output": proc.stdout + proc.stderr,
+            "stderr": proc.stderr,
+            "time": round(time.perf_counter() - started, 3)
+        }
+
+
+class CachedExecutor:
+    """
+    Content-addressed result cache in front of another executor, keyed on
+    (language, sha256(source), sha256(stdin)). A local LRU/TTL cache answers
+    repeat runs in-process; an optional Mongo collection shares results
+    across workers. Runs that raised, timed out or were killed by the sandbox
+    are never cached: running them again may well succeed.
+    """
+
+    def __init__(self, executor, maxsize=EXEC_CACHE_SIZE, ttl=EXEC_CACHE_TTL, collection=None):
+        self.executor = executor
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.collection = collection
+        self.shared_hits = 0
+
+    @staticmethod
+    def key(language, code, stdin):
+        return f"{language}:{content_hash(code)}:{content_hash(stdin)}"
+
+    def run(self, language, code, stdin="", timeout=EXEC_CASE_TIMEOUT):
+        key = self.key(language, code, stdin)
+        result = self.local.get(key)
+        if result is not None:
+            return result
+        return self.run_uncached(key, language, code, stdin, timeout)
+
+    def run_uncached(self, key, language, code, stdin, timeout):
+        """run() after a local cache miss: the shared cache, then the executor."""
+        if self.collection is not None:
+            doc = self.collection.find_one({"_id": key}, {"result": 1, "created_at": 1})
+            if doc and doc["created_at"] > datetime.utcnow() - timedelta(seconds=self.ttl):
+                self.shared_hits += 1
+                self.local.set(key, doc["result"])
+                return doc["result"]
+
+        return self.remember(key, self.executor.run(language, code, stdin, timeout=timeout))
+
+    def remember(self, key, result):
+        if result.get("killed"):
+            return result
+        self.local.set(key, result)
+        if self.collection is not None:
+            self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "result": result, "created_at": datetime.utcnow()},
+                upsert=True
+            )
+        return result
+
+    def stats(self):
+        return {**self.local.stats(), "shared_hits": self.shared_hits}
+
+
+def make_executor(kind=CODE_EXECUTOR):
+    if kind == "local":
+        return LocalExecutor()
+    return PistonExecutor()
+
+
+# -------------------- Test-case Fan-out --------------------
+_pool = ThreadPoolExecutor(max_workers=EXEC_POOL_SIZE, thread_name_prefix="exec")
+
+
+def _case_result(case, result):
+    output = result.get("output", "").strip()
+    expected = case.get("output", "").strip()
+    return {"input": case.get("input"), "expected": expected, "output": output, "passed": output == expected}
+
+
+def _run_case(executor, language, code, case, timeout):
+    try:
+        return _case_result(case, executor.run(language, code, case.get("input", ""), timeout=timeout))
+    except Exception as e:
+        return {"input": case.get("input"), "error": str(e), "passed": False}
+
+
+def run_test_cases(executor, language, code, test_cases, stop_on_failure=False,
+                   max_parallel=EXEC_MAX_PARALLEL, case_timeout=EXEC_CASE_TIMEOUT,
+                   total_timeout=EXEC_TOTAL_TIMEOUT):
+    """
+    Run `code` against every test case with at most `max_parallel` cases in
+    flight. Results keep the order of `test_cases`. Cases still pending when
+    the overall deadline passes, or after the first failure when
+    `stop_on_failure` is set, are reported as not passed.
+    """
+    deadline = time.monotonic() + total_timeout
+    results = [None] * len(test_cases)
+    remaining_cases = iter(enumerate(test_cases))
+    pending = {}
+    stopped = False
+
+    def submit_next():
+        for idx, case in remaining_cases:
+            future = _pool.submit(_run_case, executor, language, code, case, case_timeout)
+            pending[future] = idx
+            return True
+        return False
+
+    while len(pending) < max(1, max_parallel) and submit_next():
+        pass
+
+    while pending and not stopped:
+        time_left = deadline - time.monotonic()
+        if time_left <= 0:
+            break
+        done, _ = wait(pending, timeout=time_left, return_when=FIRST_COMPLETED)
+        for future in done:
+            idx = pending.pop(future)
+            results[idx] = future.result()
+            if stop_on_failure and not results[idx]["passed"]:
+                stopped = True
+        while not stopped and len(pending) < max(1, max_parallel) and submit_next():
+            pass
+
+    reason = "Skipped after earlier failure" if stopped else "Timed out"
+    for future in pending:
+        future.cancel()
+    for idx, case in enumerate(test_cases):
+        if results[idx] is None:
+            results[idx] = {"input": case.get("input"), "error": reason, "passed": False, "skipped": True}
+    return results
+
+
+# -------------------- Async Execution --------------------
+class AsyncExecutor:
+    """
+    Non-blocking front for a CachedExecutor, for the async app. It shares the
+    local result cache; Piston runs go over the async HTTP client, while the
+    local stand-in and the optional shared Mongo cache run in a thread.
+    """
+
+    def __init__(self, cached):
+        self.cached = cached
+        inner = cached.executor
+        self.http = AsyncUpstreamClient("piston", read_timeout=EXEC_CASE_TIMEOUT) \
+            if isinstance(inner, PistonExecutor) else None
+
+    async def run(self, language, code, stdin="", timeout=EXEC_CASE_TIMEOUT):
+        key = self.cached.key(language, code, stdin)
+        result = self.cached.local.get(key)
+        if result is not None:
+            return result
+        if self.http is None or self.cached.collection is not None:
+            return await asyncio.to_thread(self.cached.run_uncached, key, language, code, stdin, timeout)
+        inner = self.cached.executor
+        res = await self.http.post(inner.url, json=inner.payload(language, code, stdin), timeout=timeout)
+        return self.cached.remember(key, inner.result(res))
+
+
+async def run_test_cases_async(executor, language, code, test_cases, stop_on_failure=False,
+                               max_parallel=EXEC_MAX_PARALLEL, case_timeout=EXEC_CASE_TIMEOUT,
+                               total_timeout=EXEC_TOTAL_TIMEOUT):
+    """run_test_cases for an AsyncExecutor, with the same result shape."""
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def run_case(case):
+        async with semaphore:
+            try:
+                result = await executor.run(language, code, case.get("input", ""), timeout=case_timeout)
+                return _case_result(case, result)
+            except Exception as e:
+                return {"input": case.get("input"), "error": str(e), "passed": False}
+
+    tasks = {asyncio.ensure_future(run_case(case)): idx for idx, case in enumerate(test_cases)}
+    results = [None] * len(test_cases)
+    deadline = time.monotonic() + total_timeout
+    pending, stopped = set(tasks), False
+    while pending and not stopped:
+        time_left = deadline - time.monotonic()
+        if time_left <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=time_left, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            results[tasks[task]] = task.result()
+            if stop_on_failure and not results[tasks[task]]["passed"]:
+                stopped = True
+
+    reason = "Skipped after earlier failure" if stopped else "Timed out"
+    for task in pending:
+        task.cancel()
+    # Let the cancelled runs unwind (and release any upstream trial they hold) before answering
+    await asyncio.gather(*pending, return_exceptions=True)
+    for idx, case in enumerate(test_cases):
+        if results[idx] is None:
+            results[idx] = {"input": case.get("input"), "error": reason, "passed": False, "skipped": True}
+    return results
@@ -0,0 +1,388 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import UPSTREAM_ERRORS, span
+
+# -------------------- Outbound HTTP Settings --------------------
+# Defaults for every upstream; any of them can be overridden per upstream with
+# its name as prefix, e.g. GEMINI_MAX_RETRIES=4 or PISTON_RATE_LIMIT=5.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))  # seconds, doubled per attempt
+HTTP_RETRY_MAX_DELAY = float(os.getenv("HTTP_RETRY_MAX_DELAY", "8"))  # also caps Retry-After
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))  # consecutive failures that open it
+HTTP_BREAKER_RESET = float(os.getenv("HTTP_BREAKER_RESET", "30"))  # seconds before a trial request
+HTTP_RATE_LIMIT = float(os.getenv("HTTP_RATE_LIMIT", "0"))  # requests per second, 0 = unlimited
+HTTP_RATE_BURST = int(os.getenv("HTTP_RATE_BURST", "10"))
+HTTP_RATE_MAX_WAIT = float(os.getenv("HTTP_RATE_MAX_WAIT", "10"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _setting(name, key, default, cast=float):
+    return cast(os.getenv(f"{name.upper()}_{key}", default))
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class CircuitOpen(UpstreamError):
+    pass
+
+
+class RateLimited(UpstreamError):
+    pass
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        # Take a token and return 0, or return how long until one is available
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, max_wait):
+        if not self.rate:
+            return True
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, max_wait):
+        if not self.rate:
+            return True
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failures and rejects calls until
+    `reset_timeout` has passed; then lets a single trial call through, which
+    closes it again on success or re-opens it on failure.
+    """
+
+    def __init__(self, failures, reset_timeout):
+        self.threshold = failures
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == "half_open" or (self.state == "closed" and self._failures >= self.threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self.opened += 1
+
+    def release(self):
+        """End a call that was admitted but produced no outcome (it was cancelled), so another can try."""
+        with self._lock:
+            self._trial_running = False
+
+
+class UpstreamClient:
+    """
+    Pooled keep-alive session for one upstream, with (connect, read) timeouts,
+    jittered exponential retry of connection errors, timeouts, 429 and 5xx
+    (honouring Retry-After), a circuit breaker that fails fast while the
+    upstream is unhealthy, and a token bucket for its request quota.
+
+    Retries are only attempted for idempotent calls; a call that may have had
+    side effects is only retried when the connection was never established.
+    Clients for the same upstream name share one breaker and one bucket.
+    """
+
+    registry_suffix = ""
+
+    def __init__(self, name, pool_size=None, connect_timeout=None, read_timeout=None, max_retries=None,
+                 backoff=None, max_delay=None, breaker_failures=None, breaker_reset=None,
+                 rate=None, burst=None, rate_max_wait=None):
+        self.name = name
+
+        def setting(value, key, default, cast=float):
+            return value if value is not None else _setting(name, key, default, cast)
+
+        self.connect_timeout = setting(connect_timeout, "CONNECT_TIMEOUT", HTTP_CONNECT_TIMEOUT)
+        self.read_timeout = setting(read_timeout, "READ_TIMEOUT", HTTP_READ_TIMEOUT)
+        self.max_retries = setting(max_retries, "MAX_RETRIES", HTTP_MAX_RETRIES, int)
+        self.backoff = setting(backoff, "RETRY_BACKOFF", HTTP_RETRY_BACKOFF)
+        self.max_delay = setting(max_delay, "RETRY_MAX_DELAY", HTTP_RETRY_MAX_DELAY)
+        self.rate_max_wait = setting(rate_max_wait, "RATE_MAX_WAIT", HTTP_RATE_MAX_WAIT)
+        if name not in _GUARDS:
+            _GUARDS[name] = (
+                CircuitBreaker(
+                    setting(breaker_failures, "BREAKER_FAILURES", HTTP_BREAKER_FAILURES, int),
+                    setting(breaker_reset, "BREAKER_RESET", HTTP_BREAKER_RESET)
+                ),
+                TokenBucket(
+                    setting(rate, "RATE_LIMIT", HTTP_RATE_LIMIT),
+                    setting(burst, "RATE_BURST", HTTP_RATE_BURST, int)
+                ),
+            )
+        self.breaker, self.limiter = _GUARDS[name]
+        self._open_session(setting(pool_size, "POOL_SIZE", HTTP_POOL_SIZE, int))
+
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0, "succeeded": 0, "failed": 0, "retries": 0,
+            "circuit_rejected": 0, "rate_limited": 0, "throttled_by_upstream": 0,
+        }
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        UPSTREAMS[name + self.registry_suffix] = self
+
+    def _open_session(self, pool_size):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self._count("circuit_rejected")
+            UPSTREAM_ERRORS.inc(self.name, "circuit_open")
+            raise CircuitOpen(f"{self.name} is unavailable (circuit open)")
+
+    def _rate_limited(self):
+        self._count("rate_limited")
+        UPSTREAM_ERRORS.inc(self.name, "rate_limited")
+        return RateLimited(f"{self.name} request quota exhausted")
+
+    def record_stream_error(self):
+        """A response passed _settle but failed while its body was read; count it against the upstream."""
+        self.breaker.record_failure()
+        self._count("failed")
+        UPSTREAM_ERRORS.inc(self.name, "stream")
+
+    def iter_lines(self, response, **kwargs):
+        """response.iter_lines() of a streamed response, recording a read error as a failure."""
+        try:
+            yield from response.iter_lines(**kwargs)
+        except requests.RequestException:
+            self.record_stream_error()
+            raise
+
+    def _settle(self, attempt, elapsed, status, headers, retryable):
+        """
+        Record one attempt. Returns None when its outcome should go back to the
+        caller, otherwise the delay before the next attempt.
+        """
+        with self._lock:
+            self.counters["requests"] += 1
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+        if status is not None and status not in RETRY_STATUSES:
+            self.breaker.record_success()
+            self._count("succeeded")
+            return None
+
+        self.breaker.record_failure()
+        self._count("failed")
+        UPSTREAM_ERRORS.inc(self.name, str(status) if status is not None else "connection")
+        if status == 429:
+            self._count("throttled_by_upstream")
+        if not retryable or attempt >= self.max_retries or self.breaker.state == "open":
+            return None
+        self._count("retries")
+        retry_after = headers.get("Retry-After") if headers is not None else None
+        if retry_after:
+            try:
+                return min(self.max_delay, max(0.0, float(retry_after)))
+            except ValueError:
+                pass  # HTTP-date form; fall back to our own backoff
+        return min(self.max_delay, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+    def post(self, url, timeout=None, idempotent=True, **kwargs):
+        """
+        POST with retries. Returns the final response (the caller decides what
+        a non-2xx status means) or raises the last connection error,
+        CircuitOpen or RateLimited.
+        """
+        with span(self.name):
+            return self._post(url, (self.connect_timeout, timeout or self.read_timeout), idempotent, **kwargs)
+
+    def _post(self, url, timeout, idempotent, **kwargs):
+        attempt = 0
+        while True:
+            # Quota first: the breaker's half-open trial must only start once the call will really be sent
+            if not self.limiter.acquire(self.rate_max_wait):
+                raise self._rate_limited()
+            self._admit()
+
+            started = time.perf_counter()
+            response, error, retryable = None, None, idempotent
+            settled = False
+            try:
+                try:
+                    response = self.session.post(url, timeout=timeout, **kwargs)
+                except requests.ConnectionError as e:
+                    # A connect timeout never reached the upstream, so it is safe to repeat either way
+                    error, retryable = e, idempotent or isinstance(e, requests.ConnectTimeout)
+                except requests.Timeout as e:
+                    error = e
+                except requests.RequestException as e:
+                    error, retryable = e, False
+                delay = self._settle(
+                    attempt, time.perf_counter() - started,
+                    response.status_code if response is not None else None,
+                    response.headers if response is not None else None,
+                    retryable
+                )
+                settled = True
+            finally:
+                if not settled:
+                    self.breaker.release()
+            if delay is None:
+                if response is None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            calls = self.counters["requests"]
+            return {
+                **self.counters,
+                "circuit": self.breaker.state,
+                "circuit_opened": self.breaker.opened,
+                "avg_latency_seconds": round(self._latency_total / calls, 4) if calls else 0.0,
+                "max_latency_seconds": round(self._latency_max, 4),
+            }
+
+
+class AsyncUpstreamClient(UpstreamClient):
+    """
+    asyncio twin of UpstreamClient for the async app, over httpx (an optional
+    dependency only the async app needs). `post(..., stream=True)` returns
+    before the body is read; close it with `await response.aclose()`.
+    """
+
+    registry_suffix = "-async"
+
+    def _open_session(self, pool_size):
+        import httpx
+        self.session = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+    async def post(self, url, timeout=None, idempotent=True, stream=False, **kwargs):
+        import httpx
+        with span(self.name):
+            return await self._post(
+                url, httpx.Timeout(timeout or self.read_timeout, connect=self.connect_timeout), idempotent, stream, **kwargs
+            )
+
+    async def _post(self, url, timeout, idempotent, stream, **kwargs):
+        import httpx
+        attempt = 0
+        while True:
+            if not await self.limiter.acquire_async(self.rate_max_wait):
+                raise self._rate_limited()
+            self._admit()
+
+            started = time.perf_counter()
+            response, error, retryable = None, None, idempotent
+            settled = False
+            try:
+                try:
+                    request = self.session.build_request("POST", url, timeout=timeout, **kwargs)
+                    response = await self.session.send(request, stream=stream)
+                except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                    # The connection was never established, so it is safe to repeat either way
+                    error, retryable = e, True
+                except httpx.TransportError as e:
+                    error = e
+                except httpx.HTTPError as e:
+                    error, retryable = e, False
+                delay = self._settle(
+                    attempt, time.perf_counter() - started,
+                    response.status_code if response is not None else None,
+                    response.headers if response is not None else None,
+                    retryable
+                )
+                settled = True
+            finally:
+                # Cancelled (timeouts, client disconnects): free the trial and let the cancellation propagate
+                if not settled:
+                    self.breaker.release()
+            if delay is None:
+                if response is None:
+                    raise error
+                return response
+            if response is not None:
+                await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+UPSTREAMS = {}
+_GUARDS = {}  # upstream name -> (breaker, token bucket)
+
+
+def upstream_stats():
+    return {name: client.stats() for name, client in UPSTREAMS.items()}
@@ -0,0 +1,120 @@
+"""
+Query-plan audit: explain() every query shape the routes run and flag
+collection scans.
+
+    python indexes.py --audit             # against MONGO_URI
+    python indexes.py --ensure --audit    # create missing indexes first
+    python indexes.py --mongomock         # in-memory dry run of the declarations (plans unverified)
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+
+from db import INDEXES, ensure_indexes
+from resume_parser import PARSER_VERSION
+
+_ID = ObjectId()
+_NOW = datetime.utcnow()
+
+# (name, collection, filter, sort) for every query the routes issue
+QUERY_SHAPES = [
+    ("signup/login by email", "users", {"email": "a@b.c"}, None),
+    ("token_required principal", "users", {"_id": _ID}, None),
+    ("get-resume head", "resume_heads", {"_id": _ID}, None),
+    ("get-resume current version", "resumes", {"_id": _ID}, None),
+    ("get-resume latest (unmigrated)", "resumes", {"user_id": _ID}, [("_id", -1)]),
+    ("candidate index poll", "resumes", {"_id": {"$gt": _ID}}, [("_id", 1)]),
+    ("search-candidates resumes", "resumes", {"_id": {"$in": [_ID]}}, None),
+    ("search-candidates users", "users", {"_id": {"$in": [_ID]}}, None),
+    ("progress history", "tests", {"user_id": _ID}, [("timestamp", -1), ("_id", -1)]),
+    ("progress by type and date", "tests",
+     {"user_id": _ID, "test_type": "coding", "timestamp": {"$gte": _NOW}}, [("timestamp", -1), ("_id", -1)]),
+    ("latest interview for role", "tests",
+     {"user_id": _ID, "role": "dev", "test_type": "interview"}, [("timestamp", -1)]),
+    ("interview session", "tests", {"_id": _ID, "user_id": _ID, "test_type": "interview"}, None),
+    ("interview event bucket", "interview_events", {"session_id": _ID, "bucket": 0}, None),
+    ("interview event log", "interview_events", {"session_id": _ID}, [("bucket", 1)]),
+    ("test questions", "tests", {"_id": _ID, "user_id": _ID}, None),
+    ("latest aptitude test", "tests", {"user_id": _ID, "test_type": "aptitude"}, [("timestamp", -1)]),
+    ("progress summary", "progress", {"_id": _ID}, None),
+    ("chat history", "chat_history", {"user_id": _ID}, [("timestamp", -1)]),
+    ("chat turns to summarize", "chat_history",
+     {"user_id": _ID, "timestamp": {"$gt": _NOW, "$lt": _NOW}}, [("timestamp", 1)]),
+    ("chat summary", "chat_summaries", {"_id": _ID}, None),
+    ("shared execution cache", "exec_cache", {"_id": "python:abc:def"}, None),
+    ("shared evaluation cache", "eval_cache", {"_id": "abc"}, None),
+    ("question bank bucket", "question_bank",
+     {"kind": "aptitude", "level": "easy", "topic": "random", "created_at": {"$gte": _NOW}, "served": {"$lt": 50}},
+     None),
+    ("job status", "jobs", {"_id": "job"}, None),
+    ("parsed resume cache", "parsed_resumes", {"hash": "abc", "parser_version": PARSER_VERSION}, None),
+]
+
+
+def _stages(plan):
+    stages = [plan.get("stage")]
+    for child in plan.get("inputStages", []) + [plan.get("inputStage")] * ("inputStage" in plan):
+        stages += _stages(child)
+    return [stage for stage in stages if stage]
+
+
+def audit(database, shapes=QUERY_SHAPES):
+    report = []
+    for name, collection, query, sort in shapes:
+        cursor = database[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            plan = cursor.explain()
+            stages = _stages(plan["queryPlanner"]["winningPlan"])
+        except (AttributeError, NotImplementedError):
+            # No query planner (mongomock): nothing can be said about this shape
+            stages = None
+        report.append({
+            "name": name,
+            "collection": collection,
+            "stages": stages or [],
+            "unverified": stages is None,
+            "collscan": stages is not None and "COLLSCAN" in stages,
+            "in_memory_sort": stages is not None and "SORT" in stages,
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ensure", action="store_true", help="create missing indexes before auditing")
+    parser.add_argument("--audit", action="store_true", help="explain every route query shape")
+    parser.add_argument("--mongomock", action="store_true", help="run against an in-memory mongomock database")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock  # test-only dependency
+        database = mongomock.MongoClient().db
+        args.ensure = args.audit = True
+    else:
+        from db import db as database
+
+    if args.ensure:
+        failures = ensure_indexes(database)
+        for collection, error in failures.items():
+            print(f"❌ {collection}: {error}")
+        print(f"Ensured indexes on {len(INDEXES) - len(failures)}/{len(INDEXES)} collections")
+
+    if args.audit:
+        report = audit(database)
+        for row in report:
+            flag = "unverified" if row["unverified"] else \
+                "COLLSCAN" if row["collscan"] else ("SORT" if row["in_memory_sort"] else "ok")
+            print(f"{flag:>10}  {row['collection']:<15} {row['name']:<28} {' > '.join(row['stages'])}")
+        unverified = sum(row["unverified"] for row in report)
+        if unverified:
+            print(f"{unverified} query shapes unverified: this backend has no explain(); audit against MongoDB")
+        if any(row["collscan"] for row in report):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
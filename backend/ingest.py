@@ -0,0 +1,124 @@
+"""
+Bulk resume ingestion: parse many PDFs across a process pool.
+
+    python ingest.py resumes.zip more/*.pdf --out parsed.jsonl
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from resume_parser import RESUME_MAX_BYTES, extract_resume_data, pdf_to_text
+
+INGEST_PROCESSES = int(os.getenv("INGEST_PROCESSES", str(os.cpu_count() or 2)))
+INGEST_MAX_FILES = int(os.getenv("INGEST_MAX_FILES", "1000"))
+
+_pool = None
+
+
+def get_pool():
+    # spawn, not fork: forking a threaded Flask worker can deadlock the child
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=INGEST_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def parse_one(filename, data):
+    """Runs in a pool process. Never raises: failures come back as results."""
+    try:
+        if len(data) > RESUME_MAX_BYTES:
+            raise ValueError(f"File is larger than {RESUME_MAX_BYTES} bytes")
+        parsed = extract_resume_data(pdf_to_text(io.BytesIO(data)))
+        return {"filename": filename, "ok": True, "parsed": parsed}
+    except Exception as e:
+        return {"filename": filename, "ok": False, "error": str(e)}
+
+
+def iter_uploads(files):
+    """
+    Expand (filename, fileobj) pairs into (filename, bytes), unpacking zip
+    archives member by member. Oversized files are passed through with None
+    instead of their bytes, so they are reported instead of read.
+    """
+    count = 0
+    for filename, fileobj in files:
+        if filename.lower().endswith(".zip"):
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+                        continue
+                    count += 1
+                    if count > INGEST_MAX_FILES:
+                        return
+                    if info.file_size > RESUME_MAX_BYTES:
+                        yield info.filename, None
+                    else:
+                        yield info.filename, archive.read(info)
+        else:
+            count += 1
+            if count > INGEST_MAX_FILES:
+                return
+            data = fileobj.read(RESUME_MAX_BYTES + 1)
+            yield filename, None if len(data) > RESUME_MAX_BYTES else data
+
+
+def ingest(uploads, pool=None, window=None):
+    """
+    Parse (filename, bytes) pairs in the process pool and yield results as
+    they finish. At most `window` files are in flight, which bounds memory
+    regardless of how many files are uploaded.
+    """
+    pool = pool or get_pool()
+    window = window or INGEST_PROCESSES * 2
+    uploads = iter(uploads)
+    pending = set()
+
+    def fill():
+        while len(pending) < window:
+            item = next(uploads, None)
+            if item is None:
+                return
+            filename, data = item
+            if data is None:
+                yield {"filename": filename, "ok": False, "error": f"File is larger than {RESUME_MAX_BYTES} bytes"}
+                continue
+            pending.add(pool.submit(parse_one, filename, data))
+
+    yield from fill()
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            yield future.result()
+        yield from fill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse resumes in bulk")
+    parser.add_argument("paths", nargs="+", help="PDF files or zip archives")
+    parser.add_argument("--out", help="write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    handles = [open(path, "rb") for path in args.paths]
+    ok = failed = 0
+    try:
+        for result in ingest(iter_uploads(zip([os.path.basename(p) for p in args.paths], handles))):
+            ok += result["ok"]
+            failed += not result["ok"]
+            out.write(json.dumps(result) + "\n")
+    finally:
+        for handle in handles:
+            handle.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"Parsed {ok} resumes, {failed} failed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# -------------------- Interview Session Settings --------------------
+SESSION_BUCKET_SIZE = int(os.getenv("SESSION_BUCKET_SIZE", "50"))  # events per interview_events document
+SESSION_MAX_EVENTS = int(os.getenv("SESSION_MAX_EVENTS", "1000"))  # appends past this are refused
+
+
+class SessionFull(Exception):
+    pass
+
+
+class InterviewSessions:
+    """
+    An interview session is its tests document (test_type "interview"), whose
+    _id is the session id, plus an append-only event log. Each event takes the
+    next sequence number with an atomic $inc on the session document and is
+    $push-ed into the interview_events bucket for that number, so a turn
+    writes two small documents however long the interview is, and concurrent
+    turns never overwrite each other.
+    """
+
+    def __init__(self, tests_col, events_col, bucket_size=SESSION_BUCKET_SIZE, max_events=SESSION_MAX_EVENTS):
+        self.tests_col = tests_col
+        self.events_col = events_col
+        self.bucket_size = bucket_size
+        self.max_events = max_events
+
+    def create(self, user_id, role, questions, timestamp=None):
+        session = {
+            "user_id": user_id,
+            "role": role,
+            "test_type": "interview",
+            "questions": questions,
+            "events": 0,
+            "timestamp": timestamp or datetime.now()
+        }
+        self.tests_col.insert_one(session)
+        return session
+
+    def find(self, user_id, role=None, session_id=None):
+        # The given session, or the user's latest for the role when the client did not send an id
+        query = {"user_id": user_id, "test_type": "interview"}
+        if session_id:
+            try:
+                query["_id"] = ObjectId(session_id)
+            except Exception:
+                return None
+        else:
+            query["role"] = role
+        return self.tests_col.find_one(query, sort=[("timestamp", -1)])
+
+    def append(self, session_id, kind, **fields):
+        """Append one event; returns its sequence number. Raises SessionFull past max_events."""
+        now = datetime.now()
+        # Sessions stored before the event log have no counter; $not also matches those
+        session = self.tests_col.find_one_and_update(
+            {"_id": session_id, "events": {"$not": {"$gte": self.max_events}}},
+            {"$inc": {"events": 1}, "$set": {"timestamp": now}},
+            projection={"events": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if session is None:
+            raise SessionFull(f"Interview session {session_id} is full or does not exist")
+        seq = session["events"] - 1
+        bucket = {"session_id": session_id, "bucket": seq // self.bucket_size}
+        update = {"$push": {"events": {"seq": seq, "kind": kind, "at": now, **fields}}, "$inc": {"count": 1}}
+        try:
+            self.events_col.update_one(bucket, update, upsert=True)
+        except DuplicateKeyError:
+            # Another turn created this bucket between our match and insert; it exists now
+            self.events_col.update_one(bucket, update)
+        return seq
+
+    def events(self, session_id, kind=None):
+        """The session's events in sequence order, optionally only those of one kind."""
+        for bucket in self.events_col.find({"session_id": session_id}).sort("bucket", 1):
+            for event in sorted(bucket["events"], key=lambda e: e["seq"]):
+                if kind is None or event["kind"] == kind:
+                    yield event
+
+    def questions(self, session):
+        """Generated questions followed by every follow-up, in the order they were asked."""
+        return session.get("questions", []) + [
+            question for event in self.events(session["_id"], "follow_up") for question in event["questions"]
+        ]
+
+    def set_feedback(self, session_id, feedback, evaluations, score=None, total=None):
+        """Store the feedback, and the score if there is one. Returns True when it is the session's first score."""
+        update = {"feedback": feedback, "evaluations": evaluations}
+        if score is None:
+            self.tests_col.update_one({"_id": session_id}, {"$set": update})
+            return False
+        update.update(score=score, total=total)
+        if self.tests_col.update_one({"_id": session_id, "score": None}, {"$set": update}).modified_count:
+            return True
+        self.tests_col.update_one({"_id": session_id}, {"$set": update})
+        return False
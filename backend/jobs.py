@@ -0,0 +1,207 @@
+import contextvars
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from logs import get_logger
+
+# -------------------- Job Settings --------------------
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "200"))
+JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "2"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "1.0"))  # seconds, doubled per attempt
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+
+log = get_logger("jobs")
+
+
+class QueueFull(Exception):
+    pass
+
+
+_current = contextvars.ContextVar("job_attempt", default=None)
+
+
+def begin_writes():
+    """
+    Called by a job handler before its first write. A failure before this
+    point (the LLM call) is retried; after it the job fails instead, since
+    running the handler again would repeat the writes. No-op outside a job.
+    """
+    state = _current.get()
+    if state is not None:
+        state["writes_started"] = True
+
+
+class JobQueue:
+    """
+    Bounded queue of background jobs run by a fixed pool of worker threads.
+    LLM generation is I/O bound, so threads give the same concurrency as
+    processes without pickling the work. Jobs that fail before their first
+    write (see begin_writes) are retried with jittered exponential backoff.
+    When a Mongo collection is given, job state
+    is mirrored there so any worker process can answer /jobs/<id>.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_queue=JOB_MAX_QUEUE, max_retries=JOB_MAX_RETRIES,
+                 backoff=JOB_RETRY_BACKOFF, result_ttl=JOB_RESULT_TTL, collection=None):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.result_ttl = result_ttl
+        self.collection = collection
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self.counters = {"submitted": 0, "succeeded": 0, "failed": 0, "retried": 0, "rejected": 0}
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    def start(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, kind, owner_id, fn, *args):
+        self._expire()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "owner_id": owner_id,
+            "status": "queued",
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        # Registered and stored before a worker can pick it up, so it never runs unknown to get()
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+        self._persist(job)
+        try:
+            self._queue.put_nowait((job, fn, args, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job["job_id"]]
+                self.counters["rejected"] += 1
+            self._forget(job)
+            raise QueueFull("Job queue is full")
+        with self._lock:
+            self.counters["submitted"] += 1
+        return job["job_id"]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        if self.collection is not None:
+            doc = self.collection.find_one({"_id": job_id})
+            if doc:
+                doc["job_id"] = doc.pop("_id")
+                return doc
+        return None
+
+    def _persist(self, job):
+        if self.collection is None:
+            return
+        try:
+            doc = {k: v for k, v in job.items() if k != "job_id"}
+            self.collection.replace_one({"_id": job["job_id"]}, doc, upsert=True)
+        except Exception as e:
+            log.error("failed to persist job state", job_id=job["job_id"], error=str(e))
+
+    def _forget(self, job):
+        if self.collection is None:
+            return
+        try:
+            self.collection.delete_one({"_id": job["job_id"]})
+        except Exception as e:
+            log.error("failed to remove rejected job", job_id=job["job_id"], error=str(e))
+
+    def _expire(self):
+        now = datetime.utcnow()
+        with self._lock:
+            for job_id in [
+                job_id for job_id, job in self._jobs.items()
+                if job["finished_at"] and (now - job["finished_at"]).total_seconds() > self.result_ttl
+            ]:
+                del self._jobs[job_id]
+
+    def _retry_later(self, item, delay):
+        def requeue():
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._finish(item[0], error="Job queue is full")
+        timer = threading.Timer(delay, requeue)
+        timer.daemon = True  # like the workers, a pending retry must not hold up shutdown
+        timer.start()
+
+    def _finish(self, job, result=None, error=None):
+        with self._lock:
+            job["status"] = "failed" if error else "succeeded"
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = datetime.utcnow()
+            self.counters["failed" if error else "succeeded"] += 1
+        self._persist(job)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            job, fn, args, enqueued_at = item
+            started = time.monotonic()
+            with self._lock:
+                self._wait_total += started - enqueued_at
+                job["status"] = "running"
+                job["attempts"] += 1
+                job["started_at"] = job["started_at"] or datetime.utcnow()
+            self._persist(job)
+            state = {"writes_started": False}
+            token = _current.set(state)
+            try:
+                result = fn(*args)
+            except Exception as e:
+                if job["attempts"] <= self.max_retries and not state["writes_started"]:
+                    with self._lock:
+                        job["status"] = "retrying"
+                        job["error"] = str(e)
+                        self.counters["retried"] += 1
+                    delay = self.backoff * (2 ** (job["attempts"] - 1)) * random.uniform(0.5, 1.5)
+                    self._retry_later((job, fn, args, time.monotonic() + delay), delay)
+                else:
+                    self._finish(job, error=str(e))
+            else:
+                self._finish(job, result=result)
+            finally:
+                _current.reset(token)
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    self._run_total += elapsed
+                    self._run_max = max(self._run_max, elapsed)
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job["status"] == "running")
+            attempts = self.counters["succeeded"] + self.counters["failed"] + self.counters["retried"]
+            return {
+                **self.counters,
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "running": running,
+                "avg_wait_seconds": round(self._wait_total / attempts, 4) if attempts else 0.0,
+                "avg_run_seconds": round(self._run_total / attempts, 4) if attempts else 0.0,
+                "max_run_seconds": round(self._run_max, 4),
+            }
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import re
+
+from cache import SingleFlight, TTLCache, content_hash
+from http_client import AsyncUpstreamClient, UpstreamClient
+
+# -------------------- Gemini Settings --------------------
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_URL = os.getenv(
+    "GEMINI_URL",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+)
+GEMINI_STREAM_URL = os.getenv(
+    "GEMINI_STREAM_URL",
+    GEMINI_URL.replace(":generateContent", ":streamGenerateContent") + "?alt=sse"
+)
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "32"))
+PROMPT_CACHE_SIZE = int(os.getenv("PROMPT_CACHE_SIZE", "512"))
+PROMPT_CACHE_TTL = int(os.getenv("PROMPT_CACHE_TTL", "900"))
+
+
+def normalize_prompt(prompt):
+    # Prompts are built from indented f-strings; layout differences must not split the cache
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+class GeminiClient:
+    """
+    Gemini generateContent client over the shared outbound HTTP client
+    (pooling, retries, circuit breaker, quota), with a prompt/response
+    LRU+TTL cache and single-flight coalescing of identical in-flight prompts.
+    """
+
+    def __init__(self, url=GEMINI_URL, stream_url=GEMINI_STREAM_URL, api_key=GEMINI_API_KEY,
+                 timeout=GEMINI_TIMEOUT, cache_size=PROMPT_CACHE_SIZE, cache_ttl=PROMPT_CACHE_TTL):
+        self.url = url
+        self.stream_url = stream_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.http = UpstreamClient("gemini", pool_size=GEMINI_POOL_SIZE, read_timeout=timeout)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.inflight = SingleFlight()
+        self.upstream_calls = 0
+
+    def _generate(self, prompt):
+        self.upstream_calls += 1
+        headers = {"Content-Type": "application/json", "X-goog-api-key": self.api_key}
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        res = self.http.post(self.url, headers=headers, json=body, timeout=self.timeout)
+        res.raise_for_status()
+        data = res.json()
+        return data["candidates"][0]["content"]["parts"][0]["text"]
+
+    def generate(self, prompt, cache=True):
+        # Personalized prompts (chat, feedback, follow-ups) opt out with cache=False
+        if not cache:
+            return self._generate(prompt)
+        key = content_hash(normalize_prompt(prompt))
+        text = self.cache.get(key)
+        if text is not None:
+            return text
+
+        def fill():
+            text = self._generate(prompt)
+            self.cache.set(key, text)
+            return text
+
+        return self.inflight.do(key, fill)
+
+    def stream(self, prompt):
+        """Yield text chunks from streamGenerateContent as they arrive (never cached)."""
+        self.upstream_calls += 1
+        headers = {"Content-Type": "application/json", "X-goog-api-key": self.api_key}
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        with self.http.post(self.stream_url, headers=headers, json=body,
+                            timeout=self.timeout, stream=True) as res:
+            res.raise_for_status()
+            for line in self.http.iter_lines(res, chunk_size=None, decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = json.loads(line[len("data:"):])
+                for candidate in data.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+
+    def stats(self):
+        return {**self.cache.stats(), "coalesced": self.inflight.coalesced, "upstream_calls": self.upstream_calls}
+
+
+class AsyncGeminiClient:
+    """
+    Non-blocking generateContent for the async app. Shares the prompt cache
+    and settings of the sync `client`; identical prompts in flight on the
+    event loop are coalesced onto one upstream call.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.http = AsyncUpstreamClient("gemini", pool_size=GEMINI_POOL_SIZE, read_timeout=client.timeout)
+        self._inflight = {}
+        self.coalesced = 0
+
+    async def _generate(self, prompt):
+        self.client.upstream_calls += 1
+        headers = {"Content-Type": "application/json", "X-goog-api-key": self.client.api_key}
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        res = await self.http.post(self.client.url, headers=headers, json=body, timeout=self.client.timeout)
+        res.raise_for_status()
+        return res.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+    async def generate(self, prompt, cache=True):
+        if not cache:
+            return await self._generate(prompt)
+        key = content_hash(normalize_prompt(prompt))
+        text = self.client.cache.get(key)
+        if text is not None:
+            return text
+        if key in self._inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self._inflight[key])
+
+        task = asyncio.ensure_future(self._generate(prompt))
+        self._inflight[key] = task
+        try:
+            text = await asyncio.shield(task)
+            self.client.cache.set(key, text)
+            return text
+        finally:
+            self._inflight.pop(key, None)
@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+
+from metrics import current_route
+
+# -------------------- Logging Settings --------------------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # share of debug/info lines kept; warnings and errors always are
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, route and the call's fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "route": current_route.get(),
+            **getattr(record, "fields", {}),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class StructuredLogger:
+    """
+    Thin wrapper over a stdlib logger taking keyword fields instead of format
+    arguments. Debug and info lines are kept with probability `sample`
+    (LOG_SAMPLE_RATE by default), so they can stay on in hot paths.
+    """
+
+    def __init__(self, logger, sample_rate=LOG_SAMPLE_RATE):
+        self.logger = logger
+        self.sample_rate = sample_rate
+
+    def _log(self, level, msg, sample, fields, exc_info=False):
+        if not self.logger.isEnabledFor(level):
+            return
+        rate = self.sample_rate if sample is None else sample
+        if level < logging.WARNING and rate < 1 and random.random() >= rate:
+            return
+        self.logger.log(level, msg, extra={"fields": fields}, exc_info=exc_info)
+
+    def debug(self, msg, sample=None, **fields):
+        self._log(logging.DEBUG, msg, sample, fields)
+
+    def info(self, msg, sample=None, **fields):
+        self._log(logging.INFO, msg, sample, fields)
+
+    def warning(self, msg, **fields):
+        self._log(logging.WARNING, msg, 1, fields)
+
+    def error(self, msg, exc_info=False, **fields):
+        self._log(logging.ERROR, msg, 1, fields, exc_info)
+
+
+_root = logging.getLogger("interviewer")
+if not _root.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(JsonFormatter())
+    _root.addHandler(_handler)
+    _root.setLevel(LOG_LEVEL)
+    _root.propagate = False
+
+
+def get_logger(name):
+    return StructuredLogger(_root.getChild(name))
@@ -0,0 +1,198 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+# -------------------- Metrics Settings --------------------
+METRICS_BUCKETS = tuple(sorted(float(b) for b in os.getenv(
+    "METRICS_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60"
+).split(",")))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # when set, /metrics requires "Authorization: Bearer <token>"
+
+# Route template of the request being served; spans and log lines are attributed to it
+current_route = contextvars.ContextVar("current_route", default="background")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                yield f"{self.name}{_labels(self.labels, values)} {total}"
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed upper bounds, one series per label combination."""
+
+    def __init__(self, name, help, labels=(), buckets=METRICS_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    @contextmanager
+    def time(self, *label_values):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = sorted((values, list(counts)) for values, counts in self._series.items())
+        for values, counts in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_labels(self.labels, values, [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, values)} {round(counts[-1], 6)}"
+            yield f"{self.name}_count{_labels(self.labels, values)} {cumulative}"
+
+
+class Registry:
+    """
+    Metrics of this process in the Prometheus text format. Collectors are
+    fn() -> [(name, type, help, [(labels dict, value)])] and are read at
+    scrape time, for numbers other modules already keep (cache stats).
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help, labels=()):
+        self.metrics.append(Counter(name, help, labels))
+        return self.metrics[-1]
+
+    def histogram(self, name, help, labels=(), buckets=METRICS_BUCKETS):
+        self.metrics.append(Histogram(name, help, labels, buckets))
+        return self.metrics[-1]
+
+    def collect(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = [line for metric in self.metrics for line in metric.render()]
+        for collector in self.collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                from logs import get_logger  # logs imports this module
+                get_logger("metrics").error("metrics collector failed", error=str(e))
+                continue
+            for name, kind, help, samples in families:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_labels(labels, labels.values())} {value}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route template.", ("method", "route", "status")
+)
+SPAN_SECONDS = registry.histogram(
+    "span_duration_seconds", "Time spent in Gemini, Piston, Mongo and PDF parsing, by the route it ran for.",
+    ("span", "route")
+)
+UPSTREAM_ERRORS = registry.counter(
+    "upstream_errors_total", "Failed outbound attempts, by upstream and reason.", ("upstream", "reason")
+)
+MONGO_ERRORS = registry.counter("mongo_command_errors_total", "Failed MongoDB commands.", ("command",))
+
+
+@contextmanager
+def span(name):
+    with SPAN_SECONDS.time(name, current_route.get()):
+        yield
+
+
+class MongoSpanListener(monitoring.CommandListener):
+    """Feeds every MongoDB command's server round trip into the "mongo" span."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        SPAN_SECONDS.observe(event.duration_micros / 1e6, "mongo", current_route.get())
+
+    def failed(self, event):
+        SPAN_SECONDS.observe(event.duration_micros / 1e6, "mongo", current_route.get())
+        MONGO_ERRORS.inc(event.command_name)
+
+
+def instrument(app):
+    """Time every Flask request by its route template and attribute spans to it."""
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_route = request.url_rule.rule if request.url_rule else "unmatched"
+        current_route.set(g.metrics_route)
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        # Streamed responses are timed to their first byte; the body is produced after this
+        if "metrics_started" in g:
+            REQUEST_SECONDS.observe(time.perf_counter() - g.metrics_started,
+                                    request.method, g.metrics_route, str(response.status_code))
+        return response
+
+    @app.teardown_request
+    def reset_route(error=None):
+        # Server threads are reused; work they do outside a request is "background"
+        current_route.set("background")
+
+
+def cache_collector(caches):
+    """Collector exporting {name: fn() -> TTLCache-style stats} as hit/miss/eviction counters."""
+    def collect():
+        stats = {name: fn() for name, fn in caches.items()}
+        return [
+            (f"cache_{key}_total", "counter", f"Cache {key}, by cache.",
+             [({"cache": name}, s.get(key, 0)) for name, s in stats.items()])
+            for key in ("hits", "misses", "evictions")
+        ] + [("cache_entries", "gauge", "Entries currently cached, by cache.",
+              [({"cache": name}, s.get("size", 0)) for name, s in stats.items()])]
+    return collect
+
+
+def authorized(header):
+    return not METRICS_TOKEN or header == f"Bearer {METRICS_TOKEN}"
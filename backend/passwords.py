@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+
+# -------------------- Password Hashing Settings --------------------
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # cost factor; raising it rehashes users as they log in
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", "0")) or PASSWORD_WORKERS * 4  # hashes queued or running
+PASSWORD_POOL = os.getenv("PASSWORD_POOL", "thread")  # "thread" or "process"
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def hash_rounds(hashed):
+    """Cost factor of a bcrypt hash ($2b$12$...), or None when it is not one."""
+    try:
+        return int(hashed[4:6])
+    except (TypeError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the request path in a fixed pool of `workers`, so a burst
+    of logins uses at most that many cores and every other route keeps its
+    share. bcrypt releases the GIL while hashing, so threads run in parallel;
+    "process" is there for builds that do not. At most `max_pending` hashes
+    are queued or running; past that, callers get HasherBusy at once instead
+    of waiting behind the backlog.
+    """
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=PASSWORD_WORKERS, max_pending=PASSWORD_MAX_PENDING,
+                 pool=PASSWORD_POOL):
+        self.rounds = rounds
+        self.workers = workers
+        self.pool_kind = pool
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.counters = {"hashed": 0, "checked": 0, "rehashed": 0, "rejected": 0}
+        self.pending = 0
+        self._run_total = 0.0
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                if self.pool_kind == "process":
+                    # spawn, not fork, for the same reason as the ingestion pool
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._pool
+
+    def _run(self, counter, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.counters["rejected"] += 1
+            raise HasherBusy("Too many password hashes in progress")
+        started = time.perf_counter()
+        with self._lock:
+            self.pending += 1
+        try:
+            return self._get_pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.pending -= 1
+                self.counters[counter] += 1
+                self._run_total += time.perf_counter() - started
+
+    def hash(self, password):
+        return self._run("hashed", _hash, password.encode("utf-8"), self.rounds)
+
+    def check(self, password, hashed):
+        return self._run("checked", _check, password.encode("utf-8"), hashed)
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def verify(self, password, hashed):
+        """
+        (matches, new hash). The new hash is set when the password matched but
+        was hashed with another cost factor; the caller stores it. Rehashing
+        is best effort: under backpressure the login still succeeds and the
+        rehash waits for the next one.
+        """
+        if not self.check(password, hashed):
+            return False, None
+        if not self.needs_rehash(hashed):
+            return True, None
+        try:
+            new_hash = self.hash(password)
+        except HasherBusy:
+            return True, None
+        with self._lock:
+            self.counters["rehashed"] += 1
+        return True, new_hash
+
+    def stats(self):
+        with self._lock:
+            done = self.counters["hashed"] + self.counters["checked"]
+            return {
+                **self.counters,
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "pending": self.pending,
+                "avg_seconds": round(self._run_total / done, 4) if done else 0.0,
+            }
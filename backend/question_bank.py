@@ -0,0 +1,158 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError
+
+from cache import SingleFlight
+from logs import get_logger
+from test_parser import coding_key, mcq_key
+
+# -------------------- Question Bank Settings --------------------
+QUESTION_BANK_REFILL = os.getenv("QUESTION_BANK_REFILL", "1") == "1"
+QUESTION_BANK_LOW_WATER_TESTS = int(os.getenv("QUESTION_BANK_LOW_WATER_TESTS", "3"))  # tests' worth kept ready
+QUESTION_BANK_MAX_AGE_DAYS = int(os.getenv("QUESTION_BANK_MAX_AGE_DAYS", "30"))
+QUESTION_BANK_MAX_SERVES = int(os.getenv("QUESTION_BANK_MAX_SERVES", "50"))  # 0 = serve forever
+QUESTION_BANK_REFILL_INTERVAL = int(os.getenv("QUESTION_BANK_REFILL_INTERVAL", "300"))
+QUESTION_BANK_REFILL_BATCHES = int(os.getenv("QUESTION_BANK_REFILL_BATCHES", "4"))  # LLM calls per bucket per pass
+
+KINDS = {
+    "aptitude": {"per_test": 25, "key": mcq_key},
+    "coding": {"per_test": 2, "key": coding_key},
+}
+
+log = get_logger("question_bank")
+
+
+def bucket_of(kind, level, topic):
+    return kind, (level or "easy").strip().lower(), (topic or "Random").strip().lower()
+
+
+class QuestionBank:
+    """
+    Parsed aptitude MCQs and coding problems indexed by (kind, level, topic).
+    Tests are assembled with a random sample of fresh items; the LLM is only
+    called inline when a bucket cannot fill a test. A background thread keeps
+    every bucket it has seen above its low-water mark.
+
+    `generators` maps each kind to fn(level, topic) -> list of parsed items.
+    """
+
+    def __init__(self, collection, generators):
+        self.collection = collection
+        self.generators = generators
+        self.inflight = SingleFlight()
+        self._buckets = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.cold_misses = 0
+
+    def _fresh_filter(self, bucket):
+        kind, level, topic = bucket
+        query = {
+            "kind": kind, "level": level, "topic": topic,
+            "created_at": {"$gte": datetime.utcnow() - timedelta(days=QUESTION_BANK_MAX_AGE_DAYS)}
+        }
+        if QUESTION_BANK_MAX_SERVES:
+            query["served"] = {"$lt": QUESTION_BANK_MAX_SERVES}
+        return query
+
+    def _low_water(self, kind):
+        return KINDS[kind]["per_test"] * QUESTION_BANK_LOW_WATER_TESTS
+
+    def add(self, kind, level, topic, items):
+        """Insert parsed items, silently skipping ones already in the bucket."""
+        kind, level, topic = bucket_of(kind, level, topic)
+        key_fn = KINDS[kind]["key"]
+        now = datetime.utcnow()
+        docs, seen = [], set()
+        for item in items:
+            item_hash = key_fn(item)
+            if item_hash in seen:
+                continue
+            seen.add(item_hash)
+            docs.append({
+                "kind": kind, "level": level, "topic": topic, "hash": item_hash,
+                "item": item, "served": 0, "created_at": now
+            })
+        if not docs:
+            return 0
+        try:
+            return len(self.collection.insert_many(docs, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            return e.details.get("nInserted", 0)
+
+    def count(self, kind, level, topic):
+        return self.collection.count_documents(self._fresh_filter(bucket_of(kind, level, topic)))
+
+    def _fill(self, bucket):
+        kind, level, topic = bucket
+        return self.inflight.do(bucket, lambda: self.add(kind, level, topic, self.generators[kind](level, topic)))
+
+    def _sample(self, bucket, size):
+        return list(self.collection.aggregate([
+            {"$match": self._fresh_filter(bucket)},
+            {"$sample": {"size": size}},
+            {"$project": {"item": 1}}
+        ]))
+
+    def take(self, kind, level, topic, count=None):
+        """Return `count` items for a test, generating synchronously only on a cold miss."""
+        bucket = bucket_of(kind, level, topic)
+        count = count or KINDS[kind]["per_test"]
+        docs = self._sample(bucket, count)
+        if len(docs) < count:
+            self.cold_misses += 1
+            self._fill(bucket)
+            docs = self._sample(bucket, count)
+        if docs:
+            self.collection.update_many({"_id": {"$in": [d["_id"] for d in docs]}}, {"$inc": {"served": 1}})
+        with self._lock:
+            self._buckets.add(bucket)
+        self._wake.set()
+        return [d["item"] for d in docs]
+
+    # -------------------- Background Refill --------------------
+    def prune(self):
+        """Drop items that fell outside the freshness policy."""
+        stale = [{"created_at": {"$lt": datetime.utcnow() - timedelta(days=QUESTION_BANK_MAX_AGE_DAYS)}}]
+        if QUESTION_BANK_MAX_SERVES:
+            stale.append({"served": {"$gte": QUESTION_BANK_MAX_SERVES}})
+        return self.collection.delete_many({"$or": stale}).deleted_count
+
+    def refill(self, bucket):
+        kind = bucket[0]
+        for _ in range(QUESTION_BANK_REFILL_BATCHES):
+            if self.collection.count_documents(self._fresh_filter(bucket)) >= self._low_water(kind):
+                return
+            if not self._fill(bucket):
+                return  # the generator only produced duplicates; try again next pass
+
+    def refill_all(self):
+        self.prune()
+        with self._lock:
+            buckets = list(self._buckets)
+        for bucket in buckets:
+            try:
+                self.refill(bucket)
+            except Exception as e:
+                log.error("question bank refill failed", bucket="/".join(bucket), error=str(e))
+
+    def _run(self):
+        # Pick up buckets that were in use before a restart
+        try:
+            for key in self.collection.aggregate([{"$group": {"_id": {"k": "$kind", "l": "$level", "t": "$topic"}}}]):
+                if key["_id"]["k"] in KINDS:
+                    self._buckets.add((key["_id"]["k"], key["_id"]["l"], key["_id"]["t"]))
+        except Exception as e:
+            log.error("question bank could not load existing buckets", error=str(e))
+        while True:
+            self._wake.wait(timeout=QUESTION_BANK_REFILL_INTERVAL)
+            self._wake.clear()
+            self.refill_all()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="question-bank-refill", daemon=True)
+            self._thread.start()
@@ -0,0 +1,247 @@
+import hashlib
+import io
+import os
+import re
+import time
+from datetime import datetime
+
+import PyPDF2
+
+from cache import TTLCache
+from logs import get_logger
+from metrics import span
+from skill_matcher import skill_registry
+
+# Bump whenever extraction output changes so cached parses are re-computed
+PARSER_VERSION = 3
+
+# -------------------- Parsing Limits --------------------
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(5 * 1024 * 1024)))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+RESUME_PARSE_BUDGET = float(os.getenv("RESUME_PARSE_BUDGET", "1.0"))  # seconds per document
+
+log = get_logger("resume_parser")
+
+
+class ResumeTooLarge(Exception):
+    pass
+
+
+# --------- Helpers ----------
+def extract_skills(text):
+    return skill_registry.matcher().find(text)
+
+def iter_pdf_pages(file, max_pages=RESUME_MAX_PAGES):
+    # Pages are extracted one at a time so a huge PDF never sits in memory as text all at once
+    pdf_reader = PyPDF2.PdfReader(file)
+    if len(pdf_reader.pages) > max_pages:
+        raise ResumeTooLarge(f"Resume has {len(pdf_reader.pages)} pages (limit {max_pages})")
+    for page in pdf_reader.pages:
+        page_text = page.extract_text()
+        if page_text:
+            yield page_text
+
+def pdf_to_text(file, max_pages=RESUME_MAX_PAGES):
+    return "".join(page_text + "\n" for page_text in iter_pdf_pages(file, max_pages))
+
+# -------------------- Section Segmenter --------------------
+# Heading text (lowercased, without a trailing separator) -> section kind
+SECTION_TITLES = {
+    **dict.fromkeys(["education", "academics", "academic background", "education and training",
+                     "education & training", "qualifications"], "education"),
+    **dict.fromkeys(["experience", "work experience", "professional experience", "employment",
+                     "employment history", "work history", "internships", "internship"], "experience"),
+    **dict.fromkeys(["projects", "key projects", "personal projects", "academic projects",
+                     "side projects", "notable projects", "project name"], "projects"),
+    **dict.fromkeys(["skills", "key skills", "technical skills", "core skills", "skills summary"], "skills"),
+    **dict.fromkeys(["summary", "profile", "objective", "certifications", "certificates", "awards",
+                     "achievements", "publications", "languages", "interests", "hobbies", "references"], "other"),
+}
+# Sections each extractor skips: entries of one kind are not looked for in another kind's section
+SKIPPED_SECTIONS = {
+    "education": {"experience", "projects"},
+    "experience": {"education", "projects"},
+}
+
+# Bounded quantifiers and no nested optional groups, so every pattern runs in linear time
+_INLINE_HEADING = re.compile(r"([A-Za-z][A-Za-z &]{0,39}?)\s*[:|-]\s*")
+_EDU_START = re.compile(r"(\d{4})\s+([A-Za-z0-9 &.-]+)")
+_EDU_KEYWORD = re.compile(r"University|School|College")
+_TRAILING_YEAR = re.compile(r"\d{4} *$")
+_DATE_RANGE = re.compile(r"\d{1,2}\s+\w+,\s+\d{4}\s*-\s*\d{1,2}\s+\w+,\s*\d{4}")
+_NAME_CHARS = re.compile(r"[A-Za-z0-9 &.-]+")
+_COMPANY_MAX_CHARS = 200  # how far before a date range the company name is looked for
+
+
+class ParseBudgetExceeded(Exception):
+    pass
+
+
+class _Deadline:
+    def __init__(self, seconds):
+        self.at = time.monotonic() + seconds
+
+    def check(self):
+        if time.monotonic() > self.at:
+            raise ParseBudgetExceeded()
+
+
+def _heading(line):
+    """(kind, inline content) if the line is a section heading, else None."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 200:
+        return None
+    kind = SECTION_TITLES.get(stripped.rstrip(":|-").strip().lower())
+    if kind:
+        return kind, ""
+    match = _INLINE_HEADING.match(stripped)
+    if match:
+        kind = SECTION_TITLES.get(match.group(1).strip().lower())
+        if kind:
+            return kind, stripped[match.end():]
+    return None
+
+
+def segment_sections(text, deadline):
+    """
+    Split the text into [(kind, body)] in one pass over its lines. Text before
+    the first heading, and under headings of other kinds, is kind "other".
+    Heading lines are not part of a body; content after "Heading:" is.
+    """
+    sections, kind, lines = [], "other", []
+    for number, line in enumerate(text.split("\n")):
+        if number % 256 == 0:
+            deadline.check()
+        heading = _heading(line)
+        if heading is None:
+            lines.append(line)
+            continue
+        if lines:
+            sections.append((kind, "\n".join(lines)))
+        kind, inline = heading
+        lines = [inline] if inline else []
+    if lines:
+        sections.append((kind, "\n".join(lines)))
+    return sections
+
+
+def _bodies(sections, field):
+    return [body for kind, body in sections if kind not in SKIPPED_SECTIONS[field]]
+
+
+def extract_education(body, deadline):
+    # "<year> <institution ending in University/School/College>", the longest such name on the line
+    education, pos = [], 0
+    while True:
+        match = _EDU_START.search(body, pos)
+        if not match:
+            return education
+        deadline.check()
+        name = match.group(2)
+        keyword = None
+        for keyword in _EDU_KEYWORD.finditer(name):
+            pass
+        if keyword:
+            education.append(f"{match.group(1)} {name[:keyword.end()].strip()}")
+            pos = match.start(2) + keyword.end()
+        else:
+            # Only a year ending this run can still start an entry, with the name on the next line
+            tail = _TRAILING_YEAR.search(name)
+            pos = match.start(2) + tail.start() if tail else match.end()
+
+
+def extract_experience(body, deadline):
+    # "<company> [|] <d Month, yyyy - d Month, yyyy>"; the company is the name run just before the dates
+    experience, previous_end = [], 0
+    for match in _DATE_RANGE.finditer(body):
+        deadline.check()
+        # Each stretch of text is looked at once, and only its end, so a run of unnamed dates stays linear
+        head = body[max(previous_end, match.start() - _COMPANY_MAX_CHARS):match.start()].rstrip()
+        previous_end = match.end()
+        if head.endswith("|"):
+            head = head[:-1].rstrip()
+        run = _NAME_CHARS.match(head[::-1])
+        company = run.group(0)[::-1].strip() if run else ""
+        if company:
+            experience.append(f"{company} ({match.group(0).strip()})")
+    return experience
+
+
+def extract_projects(body):
+    projects = []
+    for line in body.split("\n"):
+        end = line.lower().find("key skills")
+        for item in (line if end < 0 else line[:end]).split("|"):
+            if item.strip():
+                projects.append(item.strip())
+        if end >= 0:
+            break
+    return projects
+
+
+def extract_resume_data(text, budget=RESUME_PARSE_BUDGET):
+    """
+    Skills from the whole text; education, experience and projects from the
+    sections they belong in. Runs in time linear in the text; if `budget`
+    seconds pass anyway, what was found so far is returned with
+    "parse_truncated": True.
+    """
+    deadline = _Deadline(budget)
+    data = {"skills": extract_skills(text), "education": [], "experience": [], "projects": [], "raw_text": text}
+    try:
+        sections = segment_sections(text, deadline)
+        for body in _bodies(sections, "education"):
+            data["education"] += extract_education(body, deadline)
+        for body in _bodies(sections, "experience"):
+            data["experience"] += extract_experience(body, deadline)
+        for kind, body in sections:
+            if kind == "projects":
+                data["projects"] += extract_projects(body)
+    except ParseBudgetExceeded:
+        log.warning("resume parse ran out of time, returning partial output", budget=budget, chars=len(text))
+        data["parse_truncated"] = True
+    return data
+
+
+# -------------------- Parsed-resume Cache --------------------
+class ParsedResumeCache:
+    """
+    Parsed output keyed by sha256 of the uploaded PDF bytes and PARSER_VERSION.
+    Entries from older parser versions are simply never matched again.
+    """
+
+    def __init__(self, collection, maxsize=256, ttl=3600):
+        self.collection = collection
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def hash_bytes(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, resume_hash):
+        parsed = self.local.get(resume_hash)
+        if parsed is not None:
+            return parsed
+        doc = self.collection.find_one(
+            {"hash": resume_hash, "parser_version": PARSER_VERSION},
+            {"_id": 0, "parsed": 1}
+        )
+        if doc:
+            self.local.set(resume_hash, doc["parsed"])
+            return doc["parsed"]
+        return None
+
+    def parse(self, data):
+        """Return (hash, parsed) for PDF bytes, parsing only on a cache miss."""
+        resume_hash = self.hash_bytes(data)
+        parsed = self.get(resume_hash)
+        if parsed is None:
+            with span("pdf_parse"):
+                parsed = extract_resume_data(pdf_to_text(io.BytesIO(data)))
+            self.collection.update_one(
+                {"hash": resume_hash, "parser_version": PARSER_VERSION},
+                {"$setOnInsert": {"parsed": parsed, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+            self.local.set(resume_hash, parsed)
+        return resume_hash, parsed
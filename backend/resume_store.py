@@ -0,0 +1,236 @@
+"""
+Saved resumes: one version document per distinct resume a user saved, with
+the parsed fields as native BSON and raw_text compressed, plus one head
+document per user pointing at the current version and the bounded history.
+
+    python resume_store.py --migrate    # convert documents saved as JSON blobs and build the heads
+"""
+import argparse
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+
+from bson import Binary
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# -------------------- Resume Storage Settings --------------------
+RESUME_HISTORY_LIMIT = int(os.getenv("RESUME_HISTORY_LIMIT", "10"))  # versions kept per user, current included
+RESUME_CODEC = os.getenv("RESUME_CODEC", "zlib")  # "zlib" or "zstd" (needs the zstandard package)
+RESUME_FORMAT = 2  # documents without "format" hold the resume as saved by the client, raw_text included
+
+
+def _compress(text, codec=RESUME_CODEC):
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        import zstandard  # optional dependency, only needed when RESUME_CODEC=zstd
+        compressed = zstandard.ZstdCompressor().compress(data)
+    else:
+        codec, compressed = "zlib", zlib.compress(data, 6)
+    return {"codec": codec, "size": len(data), "data": Binary(compressed)}
+
+
+def _decompress(stored):
+    if stored["codec"] == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(stored["data"]).decode("utf-8")
+    return zlib.decompress(stored["data"]).decode("utf-8")
+
+
+def normalize_resume(resume):
+    """The parsed-resume dict for whatever a client saved: a dict, a JSON string or plain text."""
+    if isinstance(resume, str):
+        try:
+            parsed = json.loads(resume)
+        except ValueError:
+            return {"raw_text": resume}
+        return parsed if isinstance(parsed, dict) else {"raw_text": resume}
+    return resume if isinstance(resume, dict) else {}
+
+
+def content_hash(resume):
+    return hashlib.sha256(json.dumps(resume, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def encode_resume(resume):
+    """Stored fields for a resume: native parsed fields, compressed raw_text and the content hash."""
+    resume = normalize_resume(resume)
+    fields = {
+        "resume": {k: v for k, v in resume.items() if k != "raw_text"},
+        "hash": content_hash(resume),
+        "format": RESUME_FORMAT,
+    }
+    if resume.get("raw_text"):
+        fields["raw_text"] = _compress(resume["raw_text"])
+    return fields
+
+
+def decode_resume(doc):
+    """The resume dict of a stored document in either format, raw_text included."""
+    if doc.get("format") != RESUME_FORMAT:
+        return normalize_resume(doc.get("resume"))
+    resume = dict(doc.get("resume") or {})
+    if doc.get("raw_text"):
+        resume["raw_text"] = _decompress(doc["raw_text"])
+    return resume
+
+
+class ResumeStore:
+    """
+    Versions live in the resumes collection; resume_heads holds, per user
+    (_id = user id), the current version id, its content hash and the ids of
+    the last `history_limit` versions. Saving the current content again
+    writes nothing, reading the current resume is two _id lookups, and
+    versions that fall off the history are deleted. on_delete(user_id,
+    version ids) is called after versions are deleted, so copies kept
+    elsewhere (the candidate index) can drop them.
+    """
+
+    def __init__(self, versions_col, heads_col, history_limit=RESUME_HISTORY_LIMIT, on_delete=None):
+        self.versions_col = versions_col
+        self.heads_col = heads_col
+        self.history_limit = history_limit
+        self.on_delete = on_delete
+
+    def _deleted(self, user_id, version_ids):
+        if self.on_delete:
+            self.on_delete(user_id, version_ids)
+
+    def save(self, user_id, resume, resume_hash=None):
+        """Returns (version document, created); created is False when it matched the current version."""
+        fields = encode_resume(resume)
+        head = self.heads_col.find_one({"_id": user_id})
+        if head and head.get("hash") == fields["hash"]:
+            return {"_id": head["current"], "user_id": user_id, **fields}, False
+        doc = {"user_id": user_id, **fields, "created_at": datetime.now()}
+        if resume_hash:
+            doc["resume_hash"] = resume_hash
+        self.versions_col.insert_one(doc)
+        try:
+            self._advance(user_id, head, doc["_id"], fields["hash"])
+        except Exception:
+            # No head points at the version; left behind it would outlive the history limit
+            self.versions_col.delete_one({"_id": doc["_id"]})
+            self._deleted(user_id, [doc["_id"]])
+            raise
+        return doc, True
+
+    def _advance(self, user_id, head, version_id, version_hash):
+        # Optimistic update on the head's revision; a concurrent save makes us re-read and retry
+        for _ in range(5):
+            history = [v for v in (head or {}).get("history", []) if v != version_id] + [version_id]
+            evicted, history = history[:-self.history_limit], history[-self.history_limit:]
+            update = {
+                "$set": {"current": version_id, "hash": version_hash, "history": history,
+                         "updated_at": datetime.now()},
+                "$inc": {"rev": 1},
+            }
+            try:
+                if head:
+                    updated = self.heads_col.update_one({"_id": user_id, "rev": head.get("rev")}, update).matched_count
+                else:
+                    self.heads_col.insert_one({"_id": user_id, **update["$set"], "rev": 1})
+                    updated = True
+            except DuplicateKeyError:
+                updated = False
+            if updated:
+                if evicted:
+                    self.versions_col.delete_many({"_id": {"$in": evicted}, "user_id": user_id})
+                    self._deleted(user_id, evicted)
+                return
+            head = self.heads_col.find_one({"_id": user_id})
+        raise RuntimeError(f"Could not update the resume head of user {user_id}")
+
+    def current(self, user_id):
+        """The user's current version document, or None."""
+        head = self.heads_col.find_one({"_id": user_id}, {"current": 1})
+        if head:
+            return self.versions_col.find_one({"_id": head["current"]})
+        # Users whose resumes predate the heads (before --migrate ran)
+        return self.versions_col.find_one({"user_id": user_id}, sort=[("_id", -1)])
+
+    def history(self, user_id):
+        """The user's kept versions, newest first, without their content."""
+        head = self.heads_col.find_one({"_id": user_id}, {"history": 1}) or {}
+        versions = {
+            doc["_id"]: doc for doc in self.versions_col.find(
+                {"_id": {"$in": head.get("history", [])}}, {"hash": 1, "created_at": 1, "resume_hash": 1}
+            )
+        }
+        return [versions[v] for v in reversed(head.get("history", [])) if v in versions]
+
+
+# -------------------- Migration --------------------
+def migrate(versions_col, heads_col, history_limit=RESUME_HISTORY_LIMIT, batch_size=500):
+    """
+    Re-encode documents saved before RESUME_FORMAT in place, then rebuild every
+    user's head: runs of identical consecutive saves keep only their newest
+    document and only the newest `history_limit` versions are kept. Safe to
+    run again. Returns (documents converted, users, documents deleted).
+    """
+    converted, writes = 0, []
+    for doc in versions_col.find({"format": {"$ne": RESUME_FORMAT}}).batch_size(batch_size):
+        writes.append(UpdateOne({"_id": doc["_id"]}, {"$set": encode_resume(doc.get("resume"))}))
+        converted += 1
+        if len(writes) >= batch_size:
+            versions_col.bulk_write(writes, ordered=False)
+            writes = []
+    if writes:
+        versions_col.bulk_write(writes, ordered=False)
+
+    # Walk the user_latest index backwards: users grouped, oldest save first
+    saves = versions_col.find({"user_id": {"$exists": True}}, {"user_id": 1, "hash": 1}).sort(
+        [("user_id", -1), ("_id", 1)]
+    ).hint("user_latest").batch_size(batch_size)
+    users, deleted, heads, doomed = 0, 0, [], []
+    current_user, kept = None, []
+
+    def flush_user():
+        if current_user is None or not kept:
+            return
+        doomed.extend(v for v, _ in kept[:-history_limit])
+        history = kept[-history_limit:]
+        heads.append(UpdateOne({"_id": current_user}, {
+            "$set": {"current": history[-1][0], "hash": history[-1][1], "history": [v for v, _ in history],
+                     "updated_at": datetime.now()},
+            "$inc": {"rev": 1},
+        }, upsert=True))
+
+    for save in saves:
+        if save["user_id"] != current_user:
+            flush_user()
+            users += 1
+            current_user, kept = save["user_id"], []
+            if len(heads) >= batch_size:
+                heads_col.bulk_write(heads, ordered=False)
+                heads = []
+        if kept and kept[-1][1] == save.get("hash"):
+            doomed.append(kept.pop()[0])
+        kept.append((save["_id"], save.get("hash")))
+        if len(doomed) >= batch_size:
+            deleted += versions_col.delete_many({"_id": {"$in": doomed}}).deleted_count
+            doomed = []
+    flush_user()
+    if heads:
+        heads_col.bulk_write(heads, ordered=False)
+    if doomed:
+        deleted += versions_col.delete_many({"_id": {"$in": doomed}}).deleted_count
+    return converted, users, deleted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--migrate", action="store_true", help="convert stored resumes and build the per-user heads")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    if args.migrate:
+        from db import resume_heads_col, resumes_col
+        converted, users, deleted = migrate(resumes_col, resume_heads_col, batch_size=args.batch_size)
+        print(f"Converted {converted} resumes, built heads for {users} users, removed {deleted} duplicate or "
+              f"expired versions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import json
+import os
+import re
+import threading
+import time
+
+from logs import get_logger
+
+# -------------------- Skill Dictionary --------------------
+# canonical name -> aliases that should be reported as that skill
+DEFAULT_SKILLS = {
+    "python": ["python3"],
+    "javascript": ["js", "ecmascript"],
+    "java": [],
+    "c": [],
+    "c++": ["cpp"],
+    "c#": ["csharp"],
+    "html": ["html5"],
+    "css": ["css3"],
+    "react.js": ["react", "reactjs", "react js"],
+    "node.js": ["nodejs", "node js"],
+    "express": [],
+    "express.js": ["expressjs"],
+    "sql": [],
+    "mysql": [],
+    "postgresql": ["postgres"],
+    "mongodb": ["mongo"],
+    "aws": ["amazon web services"],
+    "docker": [],
+    "kubernetes": ["k8s"],
+    "flask": [],
+    "django": [],
+    "typescript": [],
+    "next.js": ["nextjs"],
+    "git": [],
+    "github": [],
+    "api": ["apis", "rest api", "rest apis"],
+    "machine learning": ["ml"],
+    "data science": [],
+    "analytics": [],
+    "tensorflow": [],
+    "pytorch": [],
+    "nlp": ["natural language processing"],
+    "data analytics": [],
+}
+
+SKILLS_FILE = os.getenv("SKILLS_FILE")  # JSON object of canonical -> [aliases]
+SKILLS_RELOAD_INTERVAL = int(os.getenv("SKILLS_RELOAD_INTERVAL", "60"))
+
+log = get_logger("skill_matcher")
+
+# A token is a run of word characters that may carry +/# suffixes and
+# dotted parts, so "c++", "c#" and "node.js" survive as single tokens while a
+# trailing full stop does not. Unlike the regex scan this replaced, "c++" and
+# "c#" therefore no longer also report "c".
+_TOKEN = re.compile(r"\w[\w+#]*(?:\.\w[\w+#]*)*")
+_END = ""  # never a token, so it can mark the end of a phrase in the trie
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+class SkillMatcher:
+    """
+    Token trie over every skill name and alias. Matching walks the resume's
+    tokens once; at each position it only descends while the following tokens
+    continue a known phrase, so the cost does not grow with the dictionary.
+    """
+
+    def __init__(self, skills):
+        self.size = 0
+        self._trie = {}
+        for canonical, aliases in skills.items():
+            for phrase in [canonical, *aliases]:
+                tokens = tokenize(phrase)
+                if not tokens:
+                    continue
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node[_END] = canonical
+                self.size += 1
+
+    def find(self, text):
+        tokens = tokenize(text)
+        found = set()
+        trie = self._trie
+        for i in range(len(tokens)):
+            node = trie.get(tokens[i])
+            j = i + 1
+            while node is not None:
+                skill = node.get(_END)
+                if skill is not None:
+                    found.add(skill)
+                if j == len(tokens):
+                    break
+                node = node.get(tokens[j])
+                j += 1
+        return sorted(found)
+
+
+def load_skills_file(path):
+    with open(path) as f:
+        data = json.load(f)
+    return {name.strip().lower(): [a.strip().lower() for a in aliases] for name, aliases in data.items()}
+
+
+def load_skills_collection(collection):
+    # documents look like {"name": "kubernetes", "aliases": ["k8s"]}
+    return {
+        doc["name"].strip().lower(): [a.strip().lower() for a in doc.get("aliases", [])]
+        for doc in collection.find({}, {"name": 1, "aliases": 1})
+    }
+
+
+class SkillRegistry:
+    """
+    Holds the live SkillMatcher and swaps in a rebuilt one when its source
+    changes: a JSON file (checked by mtime) or a Mongo collection (re-read
+    every SKILLS_RELOAD_INTERVAL seconds). The check runs on a background
+    thread started by the first reader after the interval, so readers never
+    wait on the file or the database.
+    """
+
+    def __init__(self, path=SKILLS_FILE, collection=None, interval=SKILLS_RELOAD_INTERVAL):
+        self.path = path
+        self.collection = collection
+        self.interval = interval
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._matcher = SkillMatcher(DEFAULT_SKILLS)
+        self.reload()
+
+    def use_collection(self, collection):
+        self.collection = collection
+        self.reload()
+
+    def reload(self):
+        try:
+            skills = None
+            if self.collection is not None:
+                skills = load_skills_collection(self.collection) or None
+            elif self.path:
+                self._mtime = os.path.getmtime(self.path)
+                skills = load_skills_file(self.path)
+            if skills:
+                self._matcher = SkillMatcher(skills)
+        except Exception as e:
+            log.error("failed to reload skill dictionary, keeping the current one", error=str(e))
+        self._checked_at = time.monotonic()
+
+    def _stale(self):
+        if self.collection is not None:
+            return True
+        return bool(self.path) and os.path.getmtime(self.path) != self._mtime
+
+    def _refresh(self):
+        try:
+            if self._stale():
+                self.reload()
+        except OSError:
+            pass
+        finally:
+            self._checked_at = time.monotonic()
+            self._lock.release()
+
+    def matcher(self):
+        if time.monotonic() - self._checked_at >= self.interval and self._lock.acquire(blocking=False):
+            try:
+                threading.Thread(target=self._refresh, name="skill-reload", daemon=True).start()
+            except RuntimeError:
+                self._lock.release()  # no thread to spare; the next reader tries again
+        return self._matcher
+
+
+skill_registry = SkillRegistry()
@@ -0,0 +1,220 @@
+"""
+Per-user progress summaries kept in the progress collection, one document per
+user (_id = user id), updated incrementally as tests are written.
+
+    python stats.py --backfill    # rebuild every summary from the tests collection
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+FIELDS = {"user_id": 1, "test_type": 1, "topic": 1, "level": 1, "score": 1, "total": 1, "timestamp": 1}
+
+
+def _field(value):
+    # Topic/level strings become field names, so strip the characters Mongo reserves
+    return str(value or "unknown").strip().lower().replace(".", "_").replace("$", "_") or "unknown"
+
+
+def _day(timestamp):
+    return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+
+def summary_increments(test_type, topic=None, level=None, score=None, total=None, counted=True):
+    """
+    $inc document for one test: counts everywhere, score sums only when the
+    test was graded. `counted=False` adds a grade to a test counted earlier.
+    """
+    inc = {"total_tests": 1} if counted else {}
+    groups = [("by_type", test_type)]
+    if topic:
+        groups.append(("by_topic", topic))
+    if level:
+        groups.append(("by_level", level))
+    percent = round(100.0 * score / total, 2) if score is not None and total else None
+    for group, value in groups:
+        prefix = f"{group}.{_field(value)}"
+        if counted:
+            inc[f"{prefix}.count"] = 1
+        if percent is not None:
+            inc[f"{prefix}.scored"] = 1
+            inc[f"{prefix}.score_sum"] = percent
+    return inc
+
+
+def record_test(progress_col, user_id, test_type, topic=None, level=None, score=None, total=None,
+                timestamp=None, counted=True):
+    """
+    Fold one test (or a late grade for it) into the user's summary with a few
+    atomic updates. A late grade only adds its score: the test's day already
+    counted towards last_test_at and the streak when it was taken.
+    """
+    timestamp = timestamp or datetime.now()
+    day = _day(timestamp)
+    inc = summary_increments(test_type, topic, level, score, total, counted)
+    if not inc:
+        return
+    # updated_at tells a running backfill that this summary moved on since it read the user's tests
+    latest = {"last_test_at": timestamp, "updated_at": datetime.now()} if counted else {"updated_at": datetime.now()}
+    progress_col.update_one({"_id": user_id}, {"$inc": inc, "$max": latest}, upsert=True)
+    if not counted:
+        return
+
+    # Streaks count consecutive days with at least one test
+    summary = progress_col.find_one_and_update(
+        {"_id": user_id, "last_active_day": day - timedelta(days=1)},
+        {"$set": {"last_active_day": day}, "$inc": {"current_streak": 1}},
+        return_document=ReturnDocument.AFTER
+    ) or progress_col.find_one_and_update(
+        {"_id": user_id, "$or": [{"last_active_day": {"$lt": day - timedelta(days=1)}},
+                                 {"last_active_day": {"$exists": False}}]},
+        {"$set": {"last_active_day": day, "current_streak": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if summary:
+        progress_col.update_one({"_id": user_id}, {"$max": {"best_streak": summary["current_streak"]}})
+
+
+def _apply(summary, inc):
+    for path, amount in inc.items():
+        node = summary
+        *parents, leaf = path.split(".")
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = round(node.get(leaf, 0) + amount, 2)
+
+
+def _advance_streak(summary, day):
+    last = summary.get("last_active_day")
+    if last == day:
+        return
+    summary["current_streak"] = summary.get("current_streak", 0) + 1 if last == day - timedelta(days=1) else 1
+    summary["last_active_day"] = day
+    summary["best_streak"] = max(summary.get("best_streak", 0), summary["current_streak"])
+
+
+def format_summary(summary, today=None):
+    """Shape a stored summary for the API, turning sums into averages."""
+    today = _day(today or datetime.now())
+
+    def groups(name):
+        return {
+            key: {
+                "count": value.get("count", 0),
+                "average_score": round(value["score_sum"] / value["scored"], 2) if value.get("scored") else None
+            }
+            for key, value in (summary or {}).get(name, {}).items()
+        }
+
+    summary = summary or {}
+    last_day = summary.get("last_active_day")
+    streak_alive = last_day is not None and last_day >= today - timedelta(days=1)
+    return {
+        "total_tests": summary.get("total_tests", 0),
+        "by_type": groups("by_type"),
+        "by_topic": groups("by_topic"),
+        "by_level": groups("by_level"),
+        "current_streak": summary.get("current_streak", 0) if streak_alive else 0,
+        "best_streak": summary.get("best_streak", 0),
+        "last_test_at": summary["last_test_at"].isoformat() if summary.get("last_test_at") else None,
+    }
+
+
+def _summarise(summary, test):
+    graded = test.get("score") is not None and bool(test.get("total"))
+    _apply(summary, summary_increments(
+        test.get("test_type", "unknown"), test.get("topic"), test.get("level"),
+        test.get("score") if graded else None, test.get("total") if graded else None
+    ))
+    summary["last_test_at"] = max(summary.get("last_test_at", test["timestamp"]), test["timestamp"])
+    _advance_streak(summary, _day(test["timestamp"]))
+
+
+def _unchanged_since(user_id, started):
+    # Summaries a live update touched after `started` do not match; the upsert then fails on _id instead
+    return {"_id": user_id, "$or": [{"updated_at": {"$lt": started}}, {"updated_at": {"$exists": False}}]}
+
+
+def _replace(progress_col, writes):
+    """Bulk-write (user id, replace) pairs; returns the users whose summaries changed under them."""
+    try:
+        progress_col.bulk_write([write for _, write in writes], ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+        return [writes[error["index"]][0] for error in e.details["writeErrors"]]
+    return []
+
+
+def rebuild_user(tests_col, progress_col, user_id, attempts=5):
+    """Rebuild one summary, starting over while live updates keep moving it. Returns whether it was written."""
+    for _ in range(attempts):
+        started, summary = datetime.now(), {}
+        for test in tests_col.find({"user_id": user_id}, FIELDS).sort([("timestamp", 1), ("_id", 1)]):
+            if test.get("timestamp"):
+                _summarise(summary, test)
+        try:
+            progress_col.replace_one(_unchanged_since(user_id, started), {**summary, "updated_at": started},
+                                     upsert=True)
+            return True
+        except DuplicateKeyError:
+            continue
+    return False
+
+
+def backfill(tests_col, progress_col, batch_size=500):
+    """
+    Rebuild every summary from tests. Each user's summary is computed in
+    memory once and written with bulk replaces of `batch_size` users at a time.
+    A replace only applies if no test was recorded for the user since the
+    backfill started; those users are rebuilt again one at a time.
+    Returns (users rebuilt, users left as they were).
+    """
+    started = datetime.now()
+    # Reverse walk of the tests user_history index: users grouped, oldest test first
+    tests = tests_col.find({}, FIELDS).sort(
+        [("user_id", -1), ("timestamp", 1), ("_id", 1)]
+    ).hint("user_history").batch_size(batch_size)
+
+    writes, users, conflicts = [], 0, []
+    current_user, summary = None, None
+
+    def flush_user():
+        if current_user is not None:
+            writes.append((current_user, ReplaceOne(_unchanged_since(current_user, started),
+                                                    {**summary, "updated_at": started}, upsert=True)))
+
+    for test in tests:
+        if not test.get("user_id") or not test.get("timestamp"):
+            continue
+        if test["user_id"] != current_user:
+            flush_user()
+            users += 1
+            current_user, summary = test["user_id"], {}
+            if len(writes) >= batch_size:
+                conflicts += _replace(progress_col, writes)
+                writes = []
+        _summarise(summary, test)
+    flush_user()
+    if writes:
+        conflicts += _replace(progress_col, writes)
+    skipped = sum(not rebuild_user(tests_col, progress_col, user_id) for user_id in conflicts)
+    return users - skipped, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backfill", action="store_true", help="rebuild all summaries from tests")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    if args.backfill:
+        from db import progress_col, tests_col
+        rebuilt, skipped = backfill(tests_col, progress_col, args.batch_size)
+        print(f"Rebuilt summaries for {rebuilt} users" + (f", {skipped} kept changing and were left as they were"
+                                                           if skipped else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import re
+
+from cache import content_hash
+
+# -------------------- Aptitude MCQs --------------------
+_MCQ_QUESTION = re.compile(r"^\s*(?:\*\*)?\s*Q(?:uestion)?\s*\d*\s*[:.)]\s*(?:\*\*)?\s*(.*)$", re.I)
+_MCQ_OPTION = re.compile(r"^\s*\(?([A-Da-d])[\).:]\s*(.+)$")
+_MCQ_ANSWER = re.compile(r"^\s*(?:\*\*)?\s*(?:Correct\s+)?Answer\s*(?:\*\*)?\s*[:\-]\s*(?:\*\*)?\s*(.+?)\s*(?:\*\*)?\s*$", re.I)
+_SEPARATOR = re.compile(r"^\s*-{3,}\s*$")
+LETTERS = "ABCD"
+
+
+def _answer_letter(raw, options):
+    raw = raw.strip()
+    m = re.match(r"^\(?([A-Da-d])\b", raw)
+    if m:
+        return m.group(1).upper()
+    for letter, option in zip(LETTERS, options):
+        if raw.lower() == option.lower():
+            return letter
+    return None
+
+
+def parse_mcqs(text):
+    """
+    Parse the "Q: / A) .. D) / Answer:" format the aptitude prompt asks for
+    into [{"question", "options", "answer"}]. Questions without four options
+    or a recognisable answer are dropped.
+    """
+    items = []
+    current = None
+
+    def flush():
+        if current and current["question"] and len(current["options"]) == 4 and current["answer"]:
+            items.append(current)
+
+    for line in text.splitlines():
+        if not line.strip() or _SEPARATOR.match(line):
+            continue
+        q = _MCQ_QUESTION.match(line)
+        if q:
+            flush()
+            current = {"question": q.group(1).strip(), "options": [], "answer": None}
+            continue
+        if current is None:
+            continue
+        a = _MCQ_ANSWER.match(line)
+        if a:
+            current["answer"] = _answer_letter(a.group(1), current["options"])
+            continue
+        o = _MCQ_OPTION.match(line)
+        if o and len(current["options"]) < 4:
+            current["options"].append(o.group(2).strip())
+        elif not current["options"]:
+            current["question"] = f"{current['question']} {line.strip()}".strip()
+    flush()
+    return items
+
+
+def render_mcqs(items, with_answers=True):
+    blocks = []
+    for item in items:
+        lines = [f"Q: {item['question']}"]
+        lines += [f"{letter}) {option}" for letter, option in zip(LETTERS, item["options"])]
+        if with_answers:
+            lines.append(f"Answer: {item['answer']}")
+        blocks.append("\n".join(lines))
+    return "\n---\n".join(blocks)
+
+
+def mcq_key(item):
+    return content_hash(" ".join([item["question"], *item["options"]]).lower())
+
+
+# -------------------- Coding Problems --------------------
+_PROBLEM_SPLIT = re.compile(r"^\s*[#*]*\s*Problem\s*\d+\s*[:.]", re.I | re.M)
+_HEADING = re.compile(
+    r"^\s*[#*]*\s*(Problem Statement|Statement|Description|Input Format|Output Format|"
+    r"Constraints|Sample Input|Sample Output|Example Input|Example Output|Explanation)"
+    r"\s*\d*\s*[*]*\s*:\s*[*]*\s*(.*)$",
+    re.I
+)
+_FIELDS = {
+    "problem statement": "statement", "statement": "statement", "description": "statement",
+    "input format": "input_format",
+    "output format": "output_format",
+    "constraints": "constraints", "explanation": "explanation",
+    "sample input": "sample_input", "example input": "sample_input",
+    "sample output": "sample_output", "example output": "sample_output",
+}
+
+
+def _strip_fences(text):
+    return "\n".join(line for line in text.strip().splitlines() if not line.strip().startswith("```")).strip()
+
+
+def parse_coding_problems(text):
+    """
+    Split generated coding problems on their "Problem N:" headings and pick out
+    the statement, I/O formats and every sample input/output pair.
+    """
+    problems = []
+    starts = [m.start() for m in _PROBLEM_SPLIT.finditer(text)]
+    for begin, end in zip(starts, starts[1:] + [len(text)]):
+        block = text[begin:end].strip().rstrip("-").strip()
+        lines = block.splitlines()
+        title = _PROBLEM_SPLIT.sub("", lines[0], count=1).strip(" *#") or "Untitled"
+        sections = {"statement": [], "samples": []}
+        field = "statement"
+        for line in lines[1:]:
+            h = _HEADING.match(line)
+            if h:
+                field = _FIELDS[h.group(1).lower()]
+                if field == "sample_input":
+                    sections["samples"].append({"input": [], "output": []})
+                rest = h.group(2)
+            else:
+                rest = line
+            if field in ("sample_input", "sample_output"):
+                if not sections["samples"]:
+                    sections["samples"].append({"input": [], "output": []})
+                sections["samples"][-1][field.split("_")[1]].append(rest)
+            else:
+                sections.setdefault(field, []).append(rest)
+        samples = [
+            {"input": _strip_fences("\n".join(s["input"])), "output": _strip_fences("\n".join(s["output"]))}
+            for s in sections.pop("samples")
+        ]
+        problem = {key: "\n".join(value).strip() for key, value in sections.items()}
+        problem.update({
+            "title": title,
+            "samples": [s for s in samples if s["output"]],
+            "text": _PROBLEM_SPLIT.sub("", block, count=1).strip()
+        })
+        if problem["statement"] or problem["text"]:
+            problems.append(problem)
+    return problems
+
+
+def render_coding_problems(items):
+    return "\n\n".join(f"Problem {idx}: {item['text']}" for idx, item in enumerate(items, start=1))
+
+
+def coding_key(item):
+    return content_hash(f"{item['title']} {item.get('statement', '')}".lower())
+
+
+# -------------------- Grading --------------------
+def choice_index(choice, options):
+    """
+    Normalise a submitted MCQ choice to an option index. The frontend sends
+    [option_index]; a bare index, an option letter or the option text also work.
+    """
+    if isinstance(choice, list):
+        choice = choice[0] if choice else None
+    if isinstance(choice, bool) or choice is None:
+        return None
+    if isinstance(choice, int):
+        return choice if 0 <= choice < len(options) else None
+    choice = str(choice).strip()
+    if choice.isdigit():
+        return choice_index(int(choice), options)
+    letter = _answer_letter(choice, options)
+    return LETTERS.index(letter) if letter else None
+
+
+def grade_mcqs(items, answers):
+    """Grade submitted choices against stored items; returns (score, per-question results)."""
+    if not isinstance(answers, list):
+        raise ValueError("Answers must be a list, one choice per question")
+    results = []
+    for idx, item in enumerate(items):
+        chosen = choice_index(answers[idx], item["options"]) if idx < len(answers) else None
+        correct = LETTERS.index(item["answer"])
+        results.append({"index": idx, "chosen": chosen, "correct": correct, "passed": chosen == correct})
+    return sum(r["passed"] for r in results), results
+
+
+def public_mcqs(items):
+    # What the candidate sees: no answer key
+    return [{"question": item["question"], "options": item["options"]} for item in items]
+
+
+def coding_test_cases(problem):
+    return [{"input": sample["input"], "output": sample["output"]} for sample in problem.get("samples", [])]
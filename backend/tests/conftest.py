@@ -0,0 +1,48 @@
+import itertools
+import os
+import sys
+import tempfile
+
+import mongomock
+import pymongo
+import pytest
+
+# Tests import the backend modules the way app.py does, as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read at import time, so they are set before any test module imports the backend
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("CANDIDATE_INDEX_DIR", tempfile.mkdtemp(prefix="candidate-index-"))
+os.environ.setdefault("CODE_EXECUTOR", "local")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/AI_Interviewer")
+# db.py connects when it is first imported, by whichever test gets there first; none of them need a server
+pymongo.MongoClient = mongomock.MongoClient
+
+_emails = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def backend():
+    """The Flask app module, on an in-memory Mongo."""
+    import app
+    return app
+
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
+
+
+@pytest.fixture
+def sign_in(backend, client):
+    """sign_in(recruiter=False) -> (user document, auth headers) for a new user."""
+
+    def sign_in(recruiter=False, password="secret"):
+        email = f"user{next(_emails)}@example.com"
+        client.post("/signup", json={"username": email.split("@")[0], "email": email, "password": password})
+        if recruiter:
+            backend.users_col.update_one({"email": email}, {"$set": {"is_recruiter": True}})
+        token = client.post("/login", json={"email": email, "password": password}).get_json()["token"]
+        return backend.users_col.find_one({"email": email}), {"Authorization": f"Bearer {token}"}
+
+    return sign_in
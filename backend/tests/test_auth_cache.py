@@ -0,0 +1,68 @@
+import time
+
+import mongomock
+import pytest
+
+from auth_cache import LocalKV, PrincipalCache
+
+
+@pytest.fixture(params=["local only", "shared store"])
+def principals(request):
+    users = mongomock.MongoClient().db.users
+    shared = LocalKV() if request.param == "shared store" else None
+    return PrincipalCache(users, ttl=0.05, shared=shared)
+
+
+def add_user(principals, **fields):
+    return principals.users_col.insert_one({"username": "ada", "password": "hash", **fields}).inserted_id
+
+
+def test_lookups_are_cached_without_the_password(principals):
+    user_id = add_user(principals)
+    assert principals.get(user_id)["username"] == "ada"
+    assert "password" not in principals.get(str(user_id))
+    assert principals.db_reads == 1
+
+
+def test_changed_user_is_served_after_invalidation(principals):
+    user_id = add_user(principals)
+    principals.get(user_id)
+    principals.users_col.update_one({"_id": user_id}, {"$set": {"is_recruiter": True}})
+    assert not principals.get(user_id).get("is_recruiter")
+    principals.invalidate(user_id)
+    assert principals.get(user_id)["is_recruiter"]
+
+
+def test_removed_user_stops_being_served_after_the_ttl(principals):
+    user_id = add_user(principals)
+    principals.get(user_id)
+    principals.users_col.delete_one({"_id": user_id})
+    assert principals.get(user_id) is not None
+    time.sleep(0.06)
+    assert principals.get(user_id) is None
+
+
+def test_other_process_reads_the_shared_store():
+    users, shared = mongomock.MongoClient().db.users, LocalKV()
+    user_id = users.insert_one({"username": "ada"}).inserted_id
+    PrincipalCache(users, shared=shared).get(user_id)
+    other = PrincipalCache(users, shared=shared)
+    assert other.get(user_id)["username"] == "ada"
+    assert other.shared_hits == 1 and other.db_reads == 0
+
+
+def test_shared_entries_expire():
+    store = LocalKV()
+    store.setex("key", 0.01, "value")
+    assert store.get("key") == b"value"
+    time.sleep(0.02)
+    assert store.get("key") is None and store.delete("key") == 0
+
+
+# -------------------- Routes --------------------
+def test_cache_stats_are_for_recruiters_only(client, sign_in):
+    _, candidate = sign_in()
+    _, recruiter = sign_in(recruiter=True)
+    assert client.get("/api/cache-stats", headers=candidate).status_code == 403
+    response = client.get("/api/cache-stats", headers=recruiter)
+    assert response.status_code == 200 and "principals" in response.get_json()
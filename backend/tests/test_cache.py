@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from cache import SingleFlight, TTLCache
+
+
+# -------------------- TTLCache --------------------
+def test_hit_miss_and_expiry():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") == 1 and cache.get("b") is None and cache.get("c", "default") == "default"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2 and len(cache) == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_delete_and_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None and len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+
+
+# -------------------- SingleFlight --------------------
+def test_concurrent_calls_share_one_execution():
+    flight, release, calls, results = SingleFlight(), threading.Event(), [], []
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return "value"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flight.coalesced < 4:
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1] and results == ["value"] * 5
+
+
+def test_followers_get_the_leaders_error():
+    flight, release, errors = SingleFlight(), threading.Event(), []
+
+    def failing():
+        release.wait(2)
+        raise ValueError("upstream down")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while flight.coalesced < 2:
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert errors == ["upstream down"] * 3
+
+
+def test_later_calls_run_again():
+    flight, calls = SingleFlight(), []
+    for _ in range(2):
+        flight.do("key", lambda: calls.append(1))
+    assert len(calls) == 2
+    with pytest.raises(KeyError):
+        flight.do("key", lambda: {}["missing"])
+    assert flight.do("key", lambda: "ok") == "ok"
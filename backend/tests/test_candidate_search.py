@@ -0,0 +1,62 @@
+import mongomock
+from bson import ObjectId
+
+from candidate_search import CandidateIndex, bm25, resume_terms
+
+
+def resume(user_id, skills, experience=""):
+    return {"_id": ObjectId(), "user_id": user_id, "resume": {"skills": skills, "experience": experience}}
+
+
+def index(tmp_path, *docs):
+    candidates = CandidateIndex(mongomock.MongoClient().db.resumes, path=str(tmp_path))
+    for doc in docs:
+        candidates.add(doc)
+    return candidates
+
+
+# -------------------- Scoring --------------------
+def test_bm25_rewards_frequency_and_penalises_length():
+    assert bm25(3, 10, 1.0, 10) > bm25(1, 10, 1.0, 10)
+    assert bm25(1, 5, 1.0, 10) > bm25(1, 50, 1.0, 10)
+
+
+def test_resume_terms_weight_listed_skills():
+    terms = resume_terms({"skills": ["Python"], "experience": "python services"})
+    assert terms["skill:python"] > 1 and terms["services"] == 1
+
+
+# -------------------- CandidateIndex --------------------
+def test_search_ranks_the_better_match_first(tmp_path):
+    strong = resume("u1", ["python", "django"], "python backend python")
+    weak = resume("u2", ["java"], "python once")
+    candidates = index(tmp_path, weak, strong, resume("u3", ["go"]))
+    results = candidates.search("python django")
+    assert [key for _, key, _ in results] == ["u1", "u2"]
+
+
+def test_newer_resume_replaces_the_older_one(tmp_path):
+    old = resume("u1", ["java"])
+    new = resume("u1", ["rust"])
+    candidates = index(tmp_path, old, new)
+    assert not candidates.add(old)
+    assert candidates.search("java") == []
+    assert [rid for rid, _, _ in candidates.search("rust")] == [str(new["_id"])]
+
+
+def test_removed_resume_is_not_served(tmp_path):
+    doc = resume("u1", ["python"])
+    candidates = index(tmp_path, doc)
+    assert not candidates.remove("u1", str(ObjectId()))
+    assert candidates.remove("u1", str(doc["_id"]))
+    assert candidates.search("python") == [] and candidates.stats()["candidates"] == 0
+
+
+def test_merge_keeps_live_rows_only(tmp_path):
+    kept, removed = resume("u1", ["python"]), resume("u2", ["python"])
+    candidates = index(tmp_path, kept, removed)
+    candidates.remove("u2", str(removed["_id"]))
+    candidates.merge()
+    assert candidates.stats()["merged_rows"] == 1
+    assert [key for _, key, _ in candidates.search("python")] == ["u1"]
+    assert index(tmp_path).load_snapshot()
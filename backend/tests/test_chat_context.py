@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import mongomock
+
+from chat_context import ChatContext
+
+START = datetime(2026, 3, 2, 9, 0)
+
+
+def context(turns, **kwargs):
+    db = mongomock.MongoClient().db
+    db.chat.insert_many([
+        {"user_id": "u1", "user_message": f"question {i}", "bot_reply": f"answer {i}",
+         "timestamp": START + timedelta(minutes=i)}
+        for i in range(turns)
+    ])
+    settings = {"budget": 2000, "window": 4, "min_turns": 2, "max_turns": 10}
+    return ChatContext(db.chat, db.summaries, lambda prompt: "the summary", **{**settings, **kwargs})
+
+
+def test_short_history_is_carried_verbatim():
+    prompt, kept, stale = context(3).build("u1", "hello")
+    assert kept == 3 and not stale
+    assert "question 0" in prompt and prompt.endswith("User: hello\nAssistant:")
+
+
+def test_turns_past_the_window_are_excerpted_not_dropped():
+    prompt, kept, stale = context(7).build("u1", "hello")
+    assert kept == 4 and stale
+    assert all(f"question {i}" in prompt for i in range(7))
+    assert prompt.index("question 0") < prompt.index("Recent conversation") < prompt.index("question 3")
+
+
+def test_turns_past_the_budget_are_excerpted_not_dropped():
+    prompt, kept, stale = context(3, budget=15).build("u1", "hello")
+    assert kept < 3 and all(f"question {i}" in prompt for i in range(3))
+
+
+def test_not_stale_until_enough_turns_wait():
+    chat = context(5)
+    assert chat.build("u1", "hello")[1:] == (4, False)
+    chat.history_col.insert_one({"user_id": "u1", "user_message": "more", "bot_reply": "",
+                                 "timestamp": START + timedelta(minutes=10)})
+    assert chat.build("u1", "hello")[1:] == (4, True)
+
+
+def test_summary_replaces_the_folded_turns():
+    chat = context(7)
+    _, kept, stale = chat.build("u1", "hello")
+    assert stale and chat.claim("u1")
+    assert chat.update_summary("u1", kept) == {"summarized": 3}
+    prompt, kept, stale = chat.build("u1", "hello")
+    assert "the summary" in prompt and "question 2" not in prompt and "question 3" in prompt
+    assert kept == 4 and not stale
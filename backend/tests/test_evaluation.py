@@ -0,0 +1,99 @@
+import asyncio
+import json
+import re
+
+import mongomock
+
+from evaluation import InterviewEvaluator, make_batches, parse_batch
+
+
+class FakeModel:
+    """Scores every answer in a batch prompt 7/10; the summary prompt gets a fixed reply."""
+
+    def __init__(self, fail_on=None):
+        self.prompts = []
+        self.fail_on = fail_on
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        if "Responses:" not in prompt:
+            return "Solid overall."
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("upstream down")
+        indexes = [int(i) for i in re.findall(r"^\[(\d+)\] Q:", prompt, re.M)]
+        return json.dumps([{"index": i, "score": 7, "strengths": "clear", "improvements": "depth"} for i in indexes])
+
+    @property
+    def batch_calls(self):
+        return sum("Responses:" in prompt for prompt in self.prompts)
+
+
+QUESTIONS = [f"Question {i}?" for i in range(6)]
+ANSWERS = [f"Answer {i}." for i in range(6)]
+
+
+def evaluator(model, **kwargs):
+    return InterviewEvaluator(model, **{"max_parallel": 2, "total_timeout": 5, **kwargs})
+
+
+def test_batches_are_bounded_by_pairs_and_size():
+    pairs = [{"question": "q" * 10, "answer": "a" * 10} for _ in range(7)]
+    assert [len(b) for b in make_batches(pairs, max_chars=1000, max_pairs=3)] == [3, 3, 1]
+    assert [len(b) for b in make_batches(pairs, max_chars=45, max_pairs=10)] == [2, 2, 2, 1]
+
+
+def test_parse_batch_rejects_skipped_answers():
+    pairs = [{"index": 0}, {"index": 1}]
+    try:
+        parse_batch('[{"index": 0, "score": 5}]', pairs)
+    except ValueError as e:
+        assert "[1]" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_evaluates_every_answer_in_batches():
+    model = FakeModel()
+    result = evaluator(model).evaluate("Backend", QUESTIONS, ANSWERS)
+    assert [e["score"] for e in result["evaluations"]] == [7] * 6
+    assert result["overall_score"] == 7.0 and result["summary"] == "Solid overall." and not result["partial"]
+    assert model.batch_calls == 2  # EVAL_BATCH_MAX_PAIRS answers per call
+
+
+def test_resubmission_is_served_from_the_cache():
+    model = FakeModel()
+    scorer = evaluator(model, collection=mongomock.MongoClient().db.eval_cache)
+    scorer.evaluate("Backend", QUESTIONS, ANSWERS)
+    result = scorer.evaluate("backend ", QUESTIONS, ANSWERS[:5] + ["A new answer."])
+    assert model.batch_calls == 3
+    assert [e.get("cached") for e in result["evaluations"]] == [True] * 5 + [False]
+
+    # A fresh process finds the evaluations in the shared collection
+    other = evaluator(FakeModel(), collection=scorer.collection)
+    other.evaluate("Backend", QUESTIONS, ANSWERS)
+    assert other.shared_hits == 6
+
+
+def test_failed_batch_leaves_its_answers_unscored():
+    model = FakeModel(fail_on="[5] Q:")
+    result = evaluator(model).evaluate("Backend", QUESTIONS, ANSWERS)
+    scores = [e["score"] for e in result["evaluations"]]
+    assert scores == [7] * 5 + [None]
+    assert result["partial"] and result["failed"] == 1 and "not evaluated" in result["feedback"]
+
+
+def test_unanswered_questions_score_zero_without_a_call():
+    model = FakeModel()
+    result = evaluator(model).evaluate("Backend", QUESTIONS[:3], ["Answer 0.", None])
+    assert [e["score"] for e in result["evaluations"]] == [7, 0, 0]
+    assert model.batch_calls == 1
+
+
+def test_async_evaluation_matches_the_sync_one():
+    model = FakeModel(fail_on="[5] Q:")
+
+    async def generate(prompt):
+        return model(prompt)
+
+    result = asyncio.run(evaluator(model).evaluate_async("Backend", QUESTIONS, ANSWERS, generate))
+    assert [e["score"] for e in result["evaluations"]] == [7] * 5 + [None]
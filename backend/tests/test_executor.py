@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from executor import AsyncExecutor, CachedExecutor, ExecutionError, LocalExecutor, PistonExecutor, run_test_cases
+
+SQUARE = "n = int(input())\nprint(n * n)\n"
+
+
+def test_results_keep_case_order():
+    cases = [{"input": str(i), "output": str(i * i)} for i in range(6)]
+    results = run_test_cases(LocalExecutor(), "python", SQUARE, cases, max_parallel=3)
+    assert [r["input"] for r in results] == [c["input"] for c in cases]
+    assert all(r["passed"] for r in results)
+
+
+def test_wrong_output_fails_the_case():
+    cases = [{"input": "3", "output": "9"}, {"input": "4", "output": "15"}]
+    results = run_test_cases(LocalExecutor(), "python", SQUARE, cases)
+    assert [r["passed"] for r in results] == [True, False]
+    assert results[1]["output"] == "16"
+
+
+def test_stop_on_failure_skips_the_rest():
+    cases = [{"input": "1", "output": "2"}] + [{"input": str(i), "output": str(i * i)} for i in range(5)]
+    results = run_test_cases(LocalExecutor(latency=0.05), "python", SQUARE, cases,
+                             stop_on_failure=True, max_parallel=1)
+    assert not results[0]["passed"]
+    assert all(r.get("skipped") for r in results[1:])
+
+
+def test_executor_errors_become_failed_cases():
+    results = run_test_cases(LocalExecutor(), "cobol", SQUARE, [{"input": "1", "output": "1"}])
+    assert not results[0]["passed"] and "does not support" in results[0]["error"]
+
+
+def test_total_timeout_marks_pending_cases():
+    cases = [{"input": str(i), "output": str(i * i)} for i in range(4)]
+    results = run_test_cases(LocalExecutor(latency=0.5), "python", SQUARE, cases, max_parallel=1, total_timeout=0.2)
+    assert all(not r["passed"] for r in results)
+    assert results[-1]["error"] == "Timed out"
+
+
+# -------------------- Result cache --------------------
+class CountingExecutor:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def run(self, language, code, stdin="", timeout=None):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class PistonReply:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def test_successful_runs_are_cached():
+    inner = CountingExecutor({"output": "4\n", "killed": False})
+    cached = CachedExecutor(inner)
+    assert cached.run("python", SQUARE, "2") == cached.run("python", SQUARE, "2")
+    assert inner.calls == 1 and cached.stats()["hits"] == 1
+
+
+def test_killed_and_failed_runs_are_not_cached():
+    inner = CountingExecutor(ExecutionError("Timed out"), {"output": "", "killed": True}, {"output": "4\n"})
+    cached = CachedExecutor(inner)
+    with pytest.raises(ExecutionError):
+        cached.run("python", SQUARE, "2")
+    assert cached.run("python", SQUARE, "2")["killed"]
+    assert cached.run("python", SQUARE, "2")["output"] == "4\n"
+    assert inner.calls == 3
+
+
+@pytest.mark.parametrize("payload, killed", [
+    ({"output": "4", "run": {"signal": None, "status": None}}, False),
+    ({"output": "", "run": {"signal": "SIGKILL"}}, True),
+    ({"output": "", "run": {"status": "TO"}}, True),
+    ({"output": "boom", "run": {"status": "RE"}}, False),
+])
+def test_piston_results_flag_timeouts_and_kills(payload, killed):
+    assert PistonExecutor.result(PistonReply(payload))["killed"] is killed
+
+
+def test_async_cold_run_counts_one_miss():
+    cached = CachedExecutor(CountingExecutor({"output": "4\n"}))
+    result = asyncio.run(AsyncExecutor(cached).run("python", SQUARE, "2"))
+    assert result["output"] == "4\n"
+    assert cached.stats()["misses"] == 1
@@ -0,0 +1,208 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+import requests
+
+from http_client import AsyncUpstreamClient, CircuitBreaker, CircuitOpen, RateLimited, TokenBucket, UpstreamClient
+
+_names = itertools.count()
+
+
+class FakeResponse:
+    def __init__(self, status=200, lines=(), error=None):
+        self.status_code = status
+        self.headers = {}
+        self._lines = lines
+        self._error = error
+
+    def iter_lines(self, **kwargs):
+        yield from self._lines
+        if self._error:
+            raise self._error
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else FakeResponse()
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def client(session, **kwargs):
+    settings = {"max_retries": 0, "breaker_failures": 2, "breaker_reset": 0.05, "rate": 0, "burst": 1}
+    upstream = UpstreamClient(f"test-{next(_names)}", **{**settings, **kwargs})
+    upstream.session = session
+    return upstream
+
+
+def open_breaker(upstream):
+    for _ in range(upstream.breaker.threshold):
+        upstream.post("http://upstream")
+    assert upstream.breaker.state == "open"
+    time.sleep(upstream.breaker.reset_timeout)
+
+
+# -------------------- CircuitBreaker --------------------
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failures=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failures=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == "half_open" and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker(failures=1, reset_timeout=60)
+    breaker.record_failure()
+    breaker._opened_at -= 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_released_trial_can_be_retried():
+    breaker = CircuitBreaker(failures=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+# -------------------- TokenBucket --------------------
+def test_bucket_allows_the_burst_then_refuses():
+    bucket = TokenBucket(rate=1, burst=3)
+    assert all(bucket.acquire(0) for _ in range(3))
+    assert not bucket.acquire(0)
+
+
+def test_bucket_waits_for_a_token():
+    bucket = TokenBucket(rate=50, burst=1)
+    assert bucket.acquire(0)
+    started = time.monotonic()
+    assert bucket.acquire(1)
+    assert time.monotonic() - started >= 0.01
+
+
+def test_zero_rate_is_unlimited():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.acquire(0) for _ in range(100))
+
+
+# -------------------- UpstreamClient --------------------
+def test_retries_5xx_until_success():
+    session = FakeSession(FakeResponse(503), FakeResponse(200))
+    upstream = client(session, max_retries=2, backoff=0)
+    assert upstream.post("http://upstream").status_code == 200
+    assert session.calls == 2 and upstream.counters["retries"] == 1
+
+
+def test_open_breaker_fails_fast():
+    upstream = client(FakeSession(FakeResponse(500), FakeResponse(500)), breaker_reset=60)
+    open_breaker_calls = [upstream.post("http://upstream") for _ in range(2)]
+    assert all(res.status_code == 500 for res in open_breaker_calls)
+    with pytest.raises(CircuitOpen):
+        upstream.post("http://upstream")
+
+
+def test_rate_limited_half_open_trial_does_not_stick():
+    # The two failures that open the breaker use up the whole quota
+    upstream = client(FakeSession(FakeResponse(500), FakeResponse(500)), rate=0.001, burst=2, rate_max_wait=0)
+    open_breaker(upstream)
+    with pytest.raises(RateLimited):
+        upstream.post("http://upstream")
+    # The quota is checked before the trial starts, so the breaker still admits one
+    assert not upstream.breaker._trial_running
+    assert upstream.breaker.allow()
+
+
+def test_unexpected_error_in_trial_releases_it():
+    upstream = client(FakeSession(FakeResponse(500), FakeResponse(500), KeyboardInterrupt()))
+    open_breaker(upstream)
+    with pytest.raises(KeyboardInterrupt):
+        upstream.post("http://upstream")
+    assert upstream.post("http://upstream").status_code == 200
+    assert upstream.breaker.state == "closed"
+
+
+def test_other_request_errors_count_as_failures():
+    upstream = client(FakeSession(requests.TooManyRedirects(), requests.TooManyRedirects()))
+    for _ in range(2):
+        with pytest.raises(requests.TooManyRedirects):
+            upstream.post("http://upstream")
+    assert upstream.breaker.state == "open"
+
+
+def test_stream_read_errors_count_as_failures():
+    broken = FakeResponse(200, lines=["data: {}"], error=requests.ConnectionError("reset"))
+    upstream = client(FakeSession(broken))
+    res = upstream.post("http://upstream", stream=True)
+    with pytest.raises(requests.ConnectionError):
+        list(upstream.iter_lines(res))
+    assert upstream.counters["failed"] == 1 and upstream.breaker._failures == 1
+
+
+# -------------------- AsyncUpstreamClient --------------------
+class FakeAsyncSession:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def build_request(self, method, url, **kwargs):
+        return url
+
+    async def send(self, request, stream=False):
+        outcome = self.outcomes.pop(0) if self.outcomes else FakeResponse()
+        if outcome == "hang":
+            await asyncio.sleep(60)
+        return outcome
+
+
+def async_client(session):
+    upstream = AsyncUpstreamClient(f"test-{next(_names)}", max_retries=0, breaker_failures=2,
+                                   breaker_reset=0.05, rate=0, burst=1)
+    upstream.session = session
+    return upstream
+
+
+def test_cancelled_async_trial_releases_it():
+    async def scenario():
+        upstream = async_client(FakeAsyncSession(FakeResponse(500), FakeResponse(500), "hang"))
+        for _ in range(2):
+            await upstream.post("http://upstream")
+        await asyncio.sleep(upstream.breaker.reset_timeout)
+        trial = asyncio.ensure_future(upstream.post("http://upstream"))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        return upstream, await upstream.post("http://upstream")
+
+    upstream, response = asyncio.run(scenario())
+    assert response.status_code == 200 and upstream.breaker.state == "closed"
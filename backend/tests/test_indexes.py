@@ -0,0 +1,45 @@
+import mongomock
+
+from indexes import audit
+
+
+class ExplainedCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def sort(self, sort):
+        return self
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan}}
+
+
+class ExplainedDatabase:
+    """Answers every find() with the same winning plan."""
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def __getitem__(self, name):
+        return self
+
+    def find(self, query):
+        return ExplainedCursor(self.plan)
+
+
+SHAPES = [("by email", "users", {"email": "a@b.c"}, None)]
+
+
+def test_collection_scan_is_flagged():
+    [row] = audit(ExplainedDatabase({"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}), SHAPES)
+    assert row["collscan"] and row["in_memory_sort"] and not row["unverified"]
+
+
+def test_index_scan_passes():
+    [row] = audit(ExplainedDatabase({"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}), SHAPES)
+    assert row["stages"] == ["FETCH", "IXSCAN"] and not row["collscan"]
+
+
+def test_backends_without_explain_are_unverified():
+    rows = audit(mongomock.MongoClient().db)
+    assert rows and all(row["unverified"] and not row["collscan"] for row in rows)
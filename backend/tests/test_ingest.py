@@ -0,0 +1,41 @@
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.corpus import make_pdf
+from ingest import ingest, iter_uploads
+from resume_parser import RESUME_MAX_BYTES
+
+PDF = make_pdf(["Jane Doe", "Skills: Python, Docker", "2019 Stanford University"])
+
+
+def archive(members):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    data.seek(0)
+    return data
+
+
+def test_iter_uploads_unpacks_zips_and_skips_other_members():
+    uploads = list(iter_uploads([
+        ("batch.zip", archive({"a.pdf": PDF, "notes.txt": b"x", "dir/b.PDF": PDF})),
+        ("single.pdf", io.BytesIO(PDF)),
+    ]))
+    assert [name for name, _ in uploads] == ["a.pdf", "dir/b.PDF", "single.pdf"]
+    assert all(data == PDF for _, data in uploads)
+
+
+def test_oversized_files_come_through_as_none():
+    uploads = list(iter_uploads([("big.pdf", io.BytesIO(b"x" * (RESUME_MAX_BYTES + 1)))]))
+    assert uploads == [("big.pdf", None)]
+
+
+def test_ingest_reports_every_file():
+    uploads = [("good.pdf", PDF), ("bad.pdf", b"garbage"), ("big.pdf", None)]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = {r["filename"]: r for r in ingest(uploads, pool=pool, window=2)}
+    assert results["good.pdf"]["ok"] and "python" in results["good.pdf"]["parsed"]["skills"]
+    assert not results["bad.pdf"]["ok"]
+    assert not results["big.pdf"]["ok"] and "larger than" in results["big.pdf"]["error"]
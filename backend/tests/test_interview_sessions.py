@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from interview_sessions import InterviewSessions, SessionFull
+
+
+def sessions(**kwargs):
+    db = mongomock.MongoClient().db
+    return InterviewSessions(db.tests, db.interview_events, **{"bucket_size": 3, "max_events": 10, **kwargs})
+
+
+def test_appends_across_a_bucket_boundary_in_order():
+    store = sessions()
+    session = store.create("u1", "Backend", ["q1"])
+    seqs = [store.append(session["_id"], "answers", answers=[f"a{i}"]) for i in range(5)]
+    assert seqs == [0, 1, 2, 3, 4]
+    buckets = list(store.events_col.find({"session_id": session["_id"]}).sort("bucket", 1))
+    assert [(b["bucket"], b["count"]) for b in buckets] == [(0, 3), (1, 2)]
+    assert [e["answers"] for e in store.events(session["_id"])] == [[f"a{i}"] for i in range(5)]
+
+
+def test_events_filter_by_kind_and_questions_include_follow_ups():
+    store = sessions()
+    session = store.create("u1", "Backend", ["q1"])
+    store.append(session["_id"], "answers", answers=["a1"])
+    store.append(session["_id"], "follow_up", questions=["q2", "q3"])
+    assert [e["seq"] for e in store.events(session["_id"], "follow_up")] == [1]
+    assert store.questions(store.find("u1", session_id=str(session["_id"]))) == ["q1", "q2", "q3"]
+
+
+def test_full_session_refuses_appends():
+    store = sessions(max_events=2)
+    session = store.create("u1", "Backend", [])
+    store.append(session["_id"], "answers")
+    store.append(session["_id"], "answers")
+    with pytest.raises(SessionFull):
+        store.append(session["_id"], "answers")
+
+
+def test_find_by_session_id_or_latest_for_the_role():
+    store = sessions()
+    first = store.create("u1", "Backend", ["q1"], timestamp=datetime.now() - timedelta(hours=1))
+    latest = store.create("u1", "Backend", ["q2"])
+    assert store.find("u1", session_id=str(first["_id"]))["_id"] == first["_id"]
+    assert store.find("u1", "Backend")["_id"] == latest["_id"]
+    assert store.find("u2", session_id=str(first["_id"])) is None
+    assert store.find("u1", session_id="not-an-id") is None
+
+
+def test_only_the_first_score_counts():
+    store = sessions()
+    session = store.create("u1", "Backend", ["q1"])
+    assert not store.set_feedback(session["_id"], "no score", [])
+    assert store.set_feedback(session["_id"], "first", [], score=6.5, total=10)
+    assert not store.set_feedback(session["_id"], "again", [], score=8.0, total=10)
+    stored = store.tests_col.find_one({"_id": session["_id"]})
+    assert stored["feedback"] == "again" and stored["score"] == 8.0
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobQueue, QueueFull, begin_writes
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_failure_before_writes_is_retried():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise RuntimeError("upstream hiccup")
+        begin_writes()
+        return "ok"
+
+    queue = JobQueue(workers=1, max_retries=2, backoff=0).start()
+    job = wait_for(queue, queue.submit("test", "owner", flaky))
+    assert job["status"] == "succeeded" and job["result"] == "ok" and job["attempts"] == 2
+
+
+def test_failure_after_writes_is_not_retried():
+    writes = []
+
+    def fails_after_write():
+        begin_writes()
+        writes.append("feedback")
+        raise RuntimeError("stats update failed")
+
+    queue = JobQueue(workers=1, max_retries=2, backoff=0).start()
+    job = wait_for(queue, queue.submit("test", "owner", fails_after_write))
+    assert job["status"] == "failed" and job["attempts"] == 1
+    assert writes == ["feedback"]
+
+
+def test_begin_writes_outside_a_job_is_a_noop():
+    begin_writes()
+
+
+def test_full_queue_rejects_and_counts():
+    release = threading.Event()
+    queue = JobQueue(workers=1, max_queue=1).start()
+    queue.submit("test", "owner", release.wait)
+    time.sleep(0.05)  # the worker holds the first job
+    queue.submit("test", "owner", lambda: None)
+    with pytest.raises(QueueFull):
+        queue.submit("test", "owner", lambda: None)
+    release.set()
+    assert queue.stats()["rejected"] == 1 and queue.stats()["submitted"] == 2
+
+
+def test_pending_retry_does_not_block_shutdown():
+    started = threading.Event()
+
+    def fails():
+        started.set()
+        raise RuntimeError("upstream hiccup")
+
+    queue = JobQueue(workers=1, max_retries=1, backoff=60).start()
+    queue.submit("test", "owner", fails)
+    started.wait(2)
+    time.sleep(0.05)
+    timers = [t for t in threading.enumerate() if isinstance(t, threading.Timer)]
+    assert timers and all(t.daemon for t in timers)
+    for timer in timers:
+        timer.cancel()
+
+
+def test_job_stats_are_for_recruiters_only(client, sign_in):
+    _, candidate = sign_in()
+    _, recruiter = sign_in(recruiter=True)
+    assert client.get("/jobs/stats", headers=candidate).status_code == 403
+    assert client.get("/jobs/stats", headers=recruiter).status_code == 200
@@ -0,0 +1,99 @@
+import logging
+import re
+
+from flask import Flask
+
+from logs import StructuredLogger
+from metrics import Counter, Histogram, current_route, instrument
+
+# name{labels} value, as Prometheus parses a sample line
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="(\\.|[^"\\])*",?)*\})? -?[0-9.e+-]+$')
+
+
+def test_counter_renders_one_sample_per_label_set():
+    errors = Counter("upstream_errors_total", "Failed attempts.", ("upstream", "reason"))
+    errors.inc("gemini", "timeout")
+    errors.inc("gemini", "timeout")
+    errors.inc("piston", 'bad "quote"')
+    assert list(errors.render()) == [
+        "# HELP upstream_errors_total Failed attempts.",
+        "# TYPE upstream_errors_total counter",
+        'upstream_errors_total{upstream="gemini",reason="timeout"} 2',
+        'upstream_errors_total{upstream="piston",reason="bad \\"quote\\""} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("span_seconds", "Spans.", ("span",), buckets=(0.1, 1))
+    for seconds in (0.05, 0.5, 5):
+        latency.observe(seconds, "mongo")
+    lines = list(latency.render())
+    assert lines[2:] == [
+        'span_seconds_bucket{span="mongo",le="0.1"} 1',
+        'span_seconds_bucket{span="mongo",le="1"} 2',
+        'span_seconds_bucket{span="mongo",le="+Inf"} 3',
+        'span_seconds_sum{span="mongo"} 5.55',
+        'span_seconds_count{span="mongo"} 3',
+    ]
+
+
+def test_instrument_times_requests_by_route_template():
+    app = Flask(__name__)
+    instrument(app)
+    seen = []
+
+    @app.route("/items/<item_id>")
+    def item(item_id):
+        seen.append(current_route.get())
+        return "ok"
+
+    app.test_client().get("/items/42")
+    assert seen == ["/items/<item_id>"] and current_route.get() == "background"
+
+
+def test_metrics_endpoint_is_prometheus_text(client, sign_in):
+    _, headers = sign_in()
+    client.get("/api/progress/nobody", headers=headers)
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.mimetype == "text/plain"
+    lines = response.get_data(as_text=True).splitlines()
+    series = 'http_request_duration_seconds_count{method="GET",route="/api/progress/<username>",status="403"} '
+    assert any(line.startswith(series) for line in lines)
+    for line in lines:
+        assert line.startswith(("# HELP ", "# TYPE ")) or SAMPLE.match(line), line
+
+
+# -------------------- Log Sampling --------------------
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def sampled_logger(rate):
+    logger = logging.getLogger(f"interviewer.test-sampling-{rate}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    capture = Capture()
+    logger.handlers = [capture]
+    return StructuredLogger(logger, sample_rate=rate), capture
+
+
+def test_info_lines_are_sampled_at_the_rate():
+    log, capture = sampled_logger(0.25)
+    for _ in range(4000):
+        log.info("tick")
+    assert 800 < len(capture.records) < 1200
+
+
+def test_warnings_and_errors_are_never_sampled():
+    log, capture = sampled_logger(0.0)
+    log.info("dropped")
+    log.info("kept anyway", sample=1)
+    log.warning("kept")
+    log.error("kept", error="boom")
+    assert [r.getMessage() for r in capture.records] == ["kept anyway", "kept", "kept"]
+    assert capture.records[-1].fields == {"error": "boom"}
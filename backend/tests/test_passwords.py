@@ -0,0 +1,89 @@
+import threading
+
+import bcrypt
+import pytest
+
+from passwords import HasherBusy, PasswordHasher, hash_rounds
+
+PASSWORD = "correct horse battery staple"
+
+
+def hasher(**kwargs):
+    return PasswordHasher(**{"rounds": 4, "workers": 2, "max_pending": 4, **kwargs})
+
+
+def test_verify_matches_only_the_right_password():
+    passwords = hasher()
+    hashed = passwords.hash(PASSWORD)
+    assert hash_rounds(hashed) == 4
+    assert passwords.verify(PASSWORD, hashed) == (True, None)
+    assert passwords.verify("wrong", hashed) == (False, None)
+    assert passwords.stats()["checked"] == 2 and passwords.stats()["rehashed"] == 0
+
+
+def test_old_cost_is_rehashed_on_login():
+    old = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(5))
+    matches, new_hash = hasher().verify(PASSWORD, old)
+    assert matches and hash_rounds(new_hash) == 4
+    assert bcrypt.checkpw(PASSWORD.encode("utf-8"), new_hash)
+
+
+def test_wrong_password_is_never_rehashed():
+    old = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(5))
+    assert hasher().verify("wrong", old) == (False, None)
+
+
+def test_backlog_past_max_pending_is_turned_away():
+    passwords, started, release = hasher(workers=1, max_pending=1), threading.Event(), threading.Event()
+
+    def blocked(*args):
+        started.set()
+        release.wait(2)
+        return True
+
+    worker = threading.Thread(target=passwords._run, args=("checked", blocked))
+    worker.start()
+    started.wait(2)
+    with pytest.raises(HasherBusy):
+        passwords.check(PASSWORD, b"$2b$04$unused")
+    release.set()
+    worker.join()
+    assert passwords.stats()["rejected"] == 1 and passwords.stats()["pending"] == 0
+
+
+def test_rehash_under_backpressure_still_logs_in():
+    passwords = hasher()
+    old = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(5))
+
+    def busy(password):
+        raise HasherBusy()
+
+    passwords.hash = busy
+    assert passwords.verify(PASSWORD, old) == (True, None)
+
+
+# -------------------- Login --------------------
+def test_login_stores_the_rehash(backend, client, sign_in):
+    user, _ = sign_in()
+    old = bcrypt.hashpw(b"secret", bcrypt.gensalt(5))
+    backend.users_col.update_one({"_id": user["_id"]}, {"$set": {"password": old}})
+    assert client.post("/login", json={"email": user["email"], "password": "secret"}).status_code == 200
+    assert hash_rounds(backend.users_col.find_one({"_id": user["_id"]})["password"]) == backend.passwords.rounds
+
+
+def test_concurrent_rehash_does_not_overwrite_a_newer_hash(backend, client, sign_in, monkeypatch):
+    user, _ = sign_in()
+    old = bcrypt.hashpw(b"secret", bcrypt.gensalt(5))
+    backend.users_col.update_one({"_id": user["_id"]}, {"$set": {"password": old}})
+    newer = bcrypt.hashpw(b"changed", bcrypt.gensalt(4))
+    verify = backend.passwords.verify
+
+    def racing_verify(password, hashed):
+        result = verify(password, hashed)
+        # Another request changes the password while this login is still verifying the old one
+        backend.users_col.update_one({"_id": user["_id"]}, {"$set": {"password": newer}})
+        return result
+
+    monkeypatch.setattr(backend.passwords, "verify", racing_verify)
+    assert client.post("/login", json={"email": user["email"], "password": "secret"}).status_code == 200
+    assert backend.users_col.find_one({"_id": user["_id"]})["password"] == newer
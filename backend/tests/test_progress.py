@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+START = datetime(2026, 3, 2, 9, 0)
+
+
+def add_tests(backend, user, count):
+    # Pairs share a timestamp, so paging has to break ties on _id
+    backend.tests_col.insert_many([
+        {"user_id": user["_id"], "test_type": "aptitude" if i % 3 else "coding",
+         "timestamp": START + timedelta(minutes=i // 2)}
+        for i in range(count)
+    ])
+
+
+def ids(response):
+    return [entry["id"] for entry in response.get_json()]
+
+
+def test_pages_cover_the_full_history_once(backend, client, sign_in):
+    user, headers = sign_in()
+    add_tests(backend, user, 7)
+    url = f"/api/progress/{user['username']}"
+    everything = ids(client.get(url, headers=headers))
+    assert len(everything) == 7
+
+    pages, cursor = [], None
+    while True:
+        query = {"limit": 3, "cursor": cursor} if cursor else {"limit": 3}
+        response = client.get(url, headers=headers, query_string=query)
+        pages.append(ids(response))
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [test_id for page in pages for test_id in page] == everything
+
+
+def test_exact_last_page_has_no_next_cursor(backend, client, sign_in):
+    user, headers = sign_in()
+    add_tests(backend, user, 4)
+    response = client.get(f"/api/progress/{user['username']}", headers=headers, query_string={"limit": 4})
+    assert len(ids(response)) == 4 and "X-Next-Cursor" not in response.headers
+
+
+def test_filters_by_type_and_date(backend, client, sign_in):
+    user, headers = sign_in()
+    add_tests(backend, user, 6)
+    url = f"/api/progress/{user['username']}"
+    coding = client.get(url, headers=headers, query_string={"test_type": "coding"}).get_json()
+    assert {entry["type"] for entry in coding} == {"coding"} and len(coding) == 2
+    early = client.get(url, headers=headers, query_string={"to": (START + timedelta(minutes=1)).isoformat()})
+    assert len(ids(early)) == 2
+
+
+def test_invalid_queries_are_rejected(backend, client, sign_in):
+    user, headers = sign_in()
+    url = f"/api/progress/{user['username']}"
+    for query in ({"limit": -1}, {"cursor": "not-a-cursor"}, {"from": "yesterday"}):
+        response = client.get(url, headers=headers, query_string=query)
+        assert response.status_code == 400 and response.get_json() == {"error": "Invalid progress query"}
+
+
+def test_other_users_history_is_forbidden(client, sign_in):
+    other, _ = sign_in()
+    _, headers = sign_in()
+    assert client.get(f"/api/progress/{other['username']}", headers=headers).status_code == 403
@@ -0,0 +1,71 @@
+import mongomock
+
+from db import INDEXES
+from question_bank import QuestionBank
+
+
+def problem(i):
+    return {"title": f"Problem {i}", "statement": f"Solve case {i}."}
+
+
+class Generator:
+    """Coding generator that returns `per_call` problems, starting over at `repeat_after`."""
+
+    def __init__(self, per_call=2, repeat_after=None):
+        self.calls = 0
+        self.per_call = per_call
+        self.repeat_after = repeat_after
+
+    def __call__(self, level, topic):
+        start = self.calls * self.per_call
+        self.calls += 1
+        numbers = range(start, start + self.per_call)
+        return [problem(i % self.repeat_after if self.repeat_after else i) for i in numbers]
+
+
+def bank(generator):
+    collection = mongomock.MongoClient().db.question_bank
+    collection.create_indexes(INDEXES["question_bank"])
+    return QuestionBank(collection, {"coding": generator, "aptitude": generator})
+
+
+def test_repeated_generations_are_stored_once():
+    questions = bank(Generator())
+    assert questions.add("coding", "Easy", "Arrays", [problem(1), problem(2), problem(1)]) == 2
+    assert questions.add("coding", "easy ", "arrays", [problem(2), problem(3)]) == 1
+    assert questions.count("coding", "easy", "arrays") == 3
+
+
+def test_buckets_are_separate():
+    questions = bank(Generator())
+    questions.add("coding", "easy", "arrays", [problem(1)])
+    questions.add("coding", "hard", "arrays", [problem(1)])
+    assert questions.count("coding", "easy", "arrays") == 1 and questions.count("coding", "hard", "arrays") == 1
+
+
+def test_stocked_bucket_is_served_without_the_generator():
+    generator = Generator()
+    questions = bank(generator)
+    questions.add("coding", "easy", "arrays", [problem(i) for i in range(4)])
+    items = questions.take("coding", "easy", "arrays")
+    assert len(items) == 2 and generator.calls == 0 and questions.cold_misses == 0
+    served = questions.collection.count_documents({"served": 1})
+    assert served == 2
+
+
+def test_cold_bucket_generates_once_then_serves_from_the_bank():
+    generator = Generator()
+    questions = bank(generator)
+    assert len(questions.take("coding", "easy", "graphs")) == 2
+    assert generator.calls == 1 and questions.cold_misses == 1
+    questions.take("coding", "easy", "graphs")
+    assert generator.calls == 1
+
+
+def test_refill_stops_when_the_generator_only_repeats_itself():
+    generator = Generator(repeat_after=2)
+    questions = bank(generator)
+    questions.take("coding", "easy", "arrays")
+    questions.refill_all()
+    assert questions.count("coding", "easy", "arrays") == 2
+    assert generator.calls == 2  # the second call added nothing, so the pass gave up
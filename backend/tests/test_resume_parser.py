@@ -0,0 +1,66 @@
+import time
+
+from resume_parser import _Deadline, extract_resume_data, segment_sections
+
+RESUME = """Jane Doe
+jane@example.com
+Education
+2019 Springfield University
+2016 Springfield High School
+Work Experience
+Acme Corp | 1 June, 2021 - 30 May, 2023
+Projects: Chat bot | Resume parser
+Skills
+Python, C++, Docker
+"""
+
+
+def test_segments_by_heading():
+    sections = segment_sections(RESUME, _Deadline(1))
+    assert [kind for kind, _ in sections] == ["other", "education", "experience", "projects", "skills"]
+    assert sections[3][1] == "Chat bot | Resume parser"
+
+
+def test_unknown_headings_stay_in_the_section_body():
+    sections = segment_sections("Skills\nHobbies and more: chess\n", _Deadline(1))
+    assert sections == [("skills", "Hobbies and more: chess\n")]
+
+
+def test_extracts_each_field_from_its_section():
+    data = extract_resume_data(RESUME)
+    assert data["education"] == ["2019 Springfield University", "2016 Springfield High School"]
+    assert data["experience"] == ["Acme Corp (1 June, 2021 - 30 May, 2023)"]
+    assert data["projects"] == ["Chat bot", "Resume parser"]
+    assert data["skills"] == ["c++", "docker", "python"]
+    assert "parse_truncated" not in data
+
+
+def test_education_is_not_read_from_projects():
+    data = extract_resume_data("Projects\n2020 Built a site for Springfield University\n")
+    assert data["education"] == []
+
+
+def test_out_of_budget_returns_partial_output():
+    data = extract_resume_data(RESUME, budget=-1)
+    assert data["parse_truncated"] and data["skills"] == ["c++", "docker", "python"]
+
+
+def parse_seconds(text):
+    started = time.perf_counter()
+    data = extract_resume_data(text, budget=60)
+    return time.perf_counter() - started, data
+
+
+def test_unnamed_date_ranges_parse_in_linear_time():
+    line = "(1 January, 2020 - 2 March, 2021)\n"
+    small, _ = parse_seconds("Experience\n" + line * 1000)
+    large, data = parse_seconds("Experience\n" + line * 8000)
+    # Quadratic work would take about 64 times as long for 8 times the text
+    assert large < max(small, 0.005) * 24
+    assert data["experience"] == [] and "parse_truncated" not in data
+
+
+def test_company_name_is_looked_for_only_just_before_its_dates():
+    data = extract_resume_data("Experience\n" + "x" * 500 + " Initech | 1 June, 2021 - 30 May, 2023\n")
+    assert len(data["experience"]) == 1 and len(data["experience"][0]) < 250
+    assert data["experience"][0].endswith(" Initech (1 June, 2021 - 30 May, 2023)")
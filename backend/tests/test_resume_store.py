@@ -0,0 +1,70 @@
+import json
+
+import mongomock
+import pytest
+
+from resume_store import RESUME_FORMAT, ResumeStore, decode_resume, encode_resume, normalize_resume
+
+RESUME = {"name": "Ada", "skills": ["python", "sql"], "raw_text": "Ada Lovelace\nPython, SQL\n" * 20}
+
+
+def store(history_limit=3, on_delete=None):
+    db = mongomock.MongoClient().db
+    return ResumeStore(db.resumes, db.resume_heads, history_limit=history_limit, on_delete=on_delete)
+
+
+# -------------------- Encoding --------------------
+@pytest.mark.parametrize("resume", [RESUME, json.dumps(RESUME)])
+def test_encode_decode_round_trip(resume):
+    fields = encode_resume(resume)
+    assert fields["format"] == RESUME_FORMAT and "raw_text" not in fields["resume"]
+    assert fields["raw_text"]["size"] == len(RESUME["raw_text"].encode("utf-8"))
+    assert decode_resume(fields) == RESUME
+
+
+def test_plain_text_becomes_raw_text():
+    assert normalize_resume("just some text") == {"raw_text": "just some text"}
+    assert decode_resume(encode_resume("just some text")) == {"raw_text": "just some text"}
+
+
+def test_legacy_documents_decode_as_saved():
+    assert decode_resume({"resume": json.dumps(RESUME)}) == RESUME
+
+
+def test_hash_ignores_key_order():
+    reordered = dict(reversed(list(RESUME.items())))
+    assert encode_resume(reordered)["hash"] == encode_resume(RESUME)["hash"]
+
+
+# -------------------- ResumeStore --------------------
+def test_saving_the_current_resume_again_writes_nothing():
+    resumes = store()
+    first, created = resumes.save("u1", RESUME)
+    again, created_again = resumes.save("u1", json.dumps(RESUME))
+    assert created and not created_again
+    assert again["_id"] == first["_id"] and resumes.versions_col.count_documents({}) == 1
+
+
+def test_history_is_bounded_and_evictions_reported():
+    deleted = []
+    resumes = store(history_limit=2, on_delete=lambda user_id, ids: deleted.append((user_id, list(ids))))
+    saved = [resumes.save("u1", {**RESUME, "name": f"v{i}"})[0]["_id"] for i in range(4)]
+    assert [v["_id"] for v in resumes.history("u1")] == saved[:1:-1]
+    assert resumes.current("u1")["_id"] == saved[-1]
+    assert resumes.versions_col.count_documents({}) == 2
+    assert deleted == [("u1", [saved[0]]), ("u1", [saved[1]])]
+
+
+def test_failed_head_update_deletes_the_version():
+    deleted = []
+    resumes = store(on_delete=lambda user_id, ids: deleted.append(list(ids)))
+
+    def fail(*args):
+        raise RuntimeError("head update failed")
+
+    resumes._advance = fail
+    with pytest.raises(RuntimeError):
+        resumes.save("u1", RESUME)
+    assert resumes.versions_col.count_documents({}) == 0
+    assert len(deleted) == 1
+
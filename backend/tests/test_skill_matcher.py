@@ -0,0 +1,43 @@
+import json
+import os
+import time
+
+from skill_matcher import SkillMatcher, SkillRegistry, tokenize
+
+SKILLS = {"python": ["python3"], "c": [], "c++": ["cpp"], "node.js": ["nodejs"], "machine learning": ["ml"]}
+
+
+def test_tokens_keep_suffixes_and_dots_but_not_full_stops():
+    assert tokenize("C++, C#, Node.js and Python.") == ["c++", "c#", "node.js", "and", "python"]
+
+
+def test_finds_aliases_and_phrases():
+    matcher = SkillMatcher(SKILLS)
+    assert matcher.find("Python3 services on NodeJS; Machine Learning with ML") == ["machine learning", "node.js",
+                                                                                    "python"]
+
+
+def test_c_plus_plus_does_not_also_report_c():
+    matcher = SkillMatcher(SKILLS)
+    assert matcher.find("Modern C++ (cpp17)") == ["c++"]
+    assert matcher.find("C and C++") == ["c", "c++"]
+
+
+def write_skills(path, skills, mtime):
+    with open(path, "w") as f:
+        json.dump(skills, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_reload_happens_in_the_background(tmp_path):
+    path = str(tmp_path / "skills.json")
+    write_skills(path, {"python": []}, 1_000_000)
+    registry = SkillRegistry(path=path, interval=0)
+    assert registry.matcher().find("rust") == []
+    write_skills(path, {"rust": []}, 2_000_000)
+
+    registry.matcher()  # starts the reload and returns the current matcher straight away
+    deadline = time.monotonic() + 2
+    while registry.matcher().find("rust") != ["rust"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.matcher().find("rust") == ["rust"]
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import mongomock
+
+from stats import format_summary, rebuild_user, record_test, summary_increments
+
+DAY = datetime(2026, 3, 2, 9, 30)
+
+
+def collections():
+    db = mongomock.MongoClient().db
+    return db.tests, db.progress
+
+
+def test_increments_count_and_score_every_group():
+    inc = summary_increments("aptitude", topic="Logic", level="Easy", score=3, total=4)
+    assert inc["total_tests"] == 1
+    assert inc["by_topic.logic.count"] == 1 and inc["by_level.easy.score_sum"] == 75.0
+
+
+def test_late_grade_is_not_counted_again():
+    inc = summary_increments("interview", score=7, total=10, counted=False)
+    assert inc == {"by_type.interview.scored": 1, "by_type.interview.score_sum": 70.0}
+
+
+def test_record_test_keeps_averages_and_streaks():
+    _, progress = collections()
+    record_test(progress, "u1", "aptitude", score=1, total=2, timestamp=DAY - timedelta(days=1))
+    record_test(progress, "u1", "aptitude", score=2, total=2, timestamp=DAY)
+    record_test(progress, "u1", "interview", timestamp=DAY)
+    summary = format_summary(progress.find_one({"_id": "u1"}), today=DAY)
+    assert summary["total_tests"] == 3 and summary["by_type"]["aptitude"]["average_score"] == 75.0
+    assert summary["current_streak"] == 2 and summary["best_streak"] == 2
+
+
+def test_rebuild_replaces_a_stale_summary():
+    tests, progress = collections()
+    tests.insert_many([{"user_id": "u1", "test_type": "coding", "score": 1, "total": 1, "timestamp": DAY}
+                       for _ in range(2)])
+    progress.insert_one({"_id": "u1", "total_tests": 9, "updated_at": DAY})
+    assert rebuild_user(tests, progress, "u1")
+    assert progress.find_one({"_id": "u1"})["total_tests"] == 2
+
+
+def test_rebuild_backs_off_from_a_summary_updated_since_it_started():
+    tests, progress = collections()
+    tests.insert_one({"user_id": "u1", "test_type": "coding", "timestamp": DAY})
+    progress.insert_one({"_id": "u1", "total_tests": 5, "updated_at": datetime.now() + timedelta(hours=1)})
+    assert not rebuild_user(tests, progress, "u1", attempts=2)
+    assert progress.find_one({"_id": "u1"})["total_tests"] == 5
+
+
+def test_late_grade_leaves_last_test_and_streak_alone():
+    _, progress = collections()
+    record_test(progress, "u1", "aptitude", timestamp=DAY)
+    record_test(progress, "u1", "aptitude", score=3, total=4, timestamp=DAY + timedelta(days=1), counted=False)
+    summary = progress.find_one({"_id": "u1"})
+    assert summary["last_test_at"] == DAY and summary["current_streak"] == 1
+    assert summary["by_type"]["aptitude"] == {"count": 1, "scored": 1, "score_sum": 75.0}
@@ -0,0 +1,77 @@
+import pytest
+
+from test_parser import choice_index, grade_mcqs, parse_coding_problems, parse_mcqs, public_mcqs, render_mcqs
+
+MCQS = """Here are your questions:
+Q1: What is 2 + 2?
+A) 3
+B) 4
+C) 5
+D) 6
+Answer: B
+---
+**Question 2:** Which is a prime
+number?
+(a) 4
+(b) 6
+(c) 7
+(d) 9
+**Correct Answer:** 7
+---
+Q3: Missing options
+A) yes
+Answer: A
+"""
+
+
+def test_parse_mcqs_reads_both_formats_and_drops_incomplete():
+    items = parse_mcqs(MCQS)
+    assert [item["answer"] for item in items] == ["B", "C"]
+    assert items[1]["question"] == "Which is a prime number?"
+    assert items[1]["options"] == ["4", "6", "7", "9"]
+
+
+def test_render_then_parse_round_trips():
+    items = parse_mcqs(MCQS)
+    assert parse_mcqs(render_mcqs(items)) == items
+
+
+def test_public_mcqs_hide_the_answer():
+    assert all("answer" not in item for item in public_mcqs(parse_mcqs(MCQS)))
+
+
+@pytest.mark.parametrize("choice, expected", [
+    ([1], 1), (2, 2), ("3", 3), ("b", 1), ("C) 5", 2), ("5", None), ([], None), (None, None), (True, None), (9, None),
+])
+def test_choice_index(choice, expected):
+    assert choice_index(choice, ["3", "4", "5", "6"]) == expected
+
+
+def test_grade_mcqs_scores_by_position():
+    items = parse_mcqs(MCQS)
+    score, results = grade_mcqs(items, [[1]])
+    assert score == 1
+    assert [r["passed"] for r in results] == [True, False] and results[1]["chosen"] is None
+
+
+@pytest.mark.parametrize("answers", [{"0": [1]}, "B", None])
+def test_grade_mcqs_rejects_answers_that_are_not_a_list(answers):
+    with pytest.raises(ValueError):
+        grade_mcqs(parse_mcqs(MCQS), answers)
+
+
+def test_parse_coding_problems_collects_samples():
+    text = """Problem 1: Sum
+Given two numbers, print their sum.
+Input Format: two integers
+Sample Input:
+1 2
+Sample Output:
+3
+Sample Input: 5 5
+Sample Output: 10
+"""
+    problems = parse_coding_problems(text)
+    assert [p["title"] for p in problems] == ["Sum"]
+    assert problems[0]["statement"] == "Given two numbers, print their sum."
+    assert problems[0]["samples"] == [{"input": "1 2", "output": "3"}, {"input": "5 5", "output": "10"}]